@@ -0,0 +1,81 @@
+"""Stress test for the multi-process store: N worker processes RSVP to the
+same events at the same time and every RSVP must survive.
+
+Run from the repository root:
+    python -m benchmarks.bench_concurrent_rsvp --procs 4 --rsvps 200 --storage json
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import data_dir, make_events
+from utils import storage
+from utils.models import Attendee, append_attendee
+
+
+def _events(count: int):
+    when = (datetime.now() + timedelta(days=30)).replace(microsecond=0)
+    return make_events(count, fields=lambda i: {"datetime": when.isoformat()})
+
+
+def _worker(workdir: str, mode: str, window_ms: int, worker: int, rsvps: int):
+    os.chdir(workdir)
+    storage.configure_storage({"storage": mode, "write_window_ms": window_ms})
+    events = storage.load_events()
+    rng = random.Random(worker)
+    for i in range(rsvps):
+        storage.sync_events(events)  # what the menu loop does between actions
+        e = events[rng.randrange(len(events))]
+        attendee = Attendee(
+            username=f"w{worker}-u{i}", timestamp=datetime.now().isoformat()
+        )
+        append_attendee(e, attendee)
+        change = {"id": e["id"], "attendee": attendee}
+        storage.log_change(events, "add_attendee", change)
+    storage.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--rsvps", type=int, default=200, help="per process")
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--storage", choices=storage.STORAGE_MODES, default="json")
+    parser.add_argument("--window-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    with data_dir("rsvp-bench-", events=_events(args.events)) as workdir:
+        ctx = multiprocessing.get_context("spawn")
+        procs = [
+            ctx.Process(
+                target=_worker,
+                args=(workdir, args.storage, args.window_ms, w, args.rsvps),
+            )
+            for w in range(args.procs)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        storage.configure_storage({"storage": args.storage})
+        events = storage.load_events()
+        names = {a["username"] for e in events for a in e.get("attendees", [])}
+        counted = sum(e.get("attendee_count", 0) for e in events)
+    expected = args.procs * args.rsvps
+    print(f"storage={args.storage} procs={args.procs} rsvps/proc={args.rsvps}")
+    print(f"elapsed:         {elapsed:.2f}s")
+    print(f"throughput:      {expected / elapsed:.0f} RSVPs/s")
+    print(f"stored RSVPs:    {len(names)} / {expected} (attendee_count {counted})")
+    print(f"lost updates:    {expected - len(names)}")
+    if len(names) != expected or counted != expected:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
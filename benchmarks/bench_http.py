@@ -0,0 +1,181 @@
+"""Load test for the HTTP service: many keep-alive connections issuing (and
+optionally pipelining) requests; reports requests/s and p50/p99 latency.
+
+Run from the repository root. Without --url a server is started on a copy
+of data/ padded to --events events and stopped afterwards:
+    python -m benchmarks.bench_http --connections 50 --requests 200
+    python -m benchmarks.bench_http --url http://127.0.0.1:8080 --pipeline 8
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+from benchmarks.common import REPO, data_dir, save_events
+from utils import storage
+
+
+def _targets(today: date):
+    """A read-heavy mix over the query endpoints."""
+    d = today.isoformat()
+    return [
+        "/events",
+        f"/events/day?date={d}",
+        f"/events/week?date={d}",
+        f"/events/month?date={d}",
+        f"/events/range?from={d}&to={(today + timedelta(days=90)).isoformat()}",
+        "/events/location?q=malang",
+        "/events/search?name=konser",
+        "/stats",
+    ]
+
+
+def _pad(count: int):
+    """Grow the working directory's data/ to at least `count` events spread
+    over a year."""
+    events = storage.load_json(os.path.join("data", "events.json"), [])
+    cities = ["Malang", "Surabaya", "Kediri", "Batu", "Blitar", "Jember"]
+    kinds = ["Konser", "Pameran", "Festival", "Seminar", "Lomba"]
+    rng = random.Random(1)
+    now = datetime.now().replace(second=0, microsecond=0)
+    for i in range(len(events), count):
+        when = now + timedelta(days=rng.randint(-180, 180), hours=rng.randint(0, 12))
+        events.append(
+            {
+                "id": 10_000 + i,
+                "name": f"{rng.choice(kinds)} {i}",
+                "datetime": when.isoformat(),
+                "location": rng.choice(cities),
+                "address": f"Jl. Contoh {i}",
+                "organizer": f"Panitia {i % 40}",
+                "description": "",
+                "htm": "gratis",
+                "category": rng.choice(["MUSIK", "SENI", "OLAHRAGA", "LAINNYA"]),
+                "status": "scheduled",
+                "attendees": [],
+                "reviews": [],
+            }
+        )
+    save_events(events)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workdir: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=REPO)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "core.server", "--port", str(port)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    print(proc.stdout.readline().strip())  # "serving N events on ..."
+    return proc
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, targets, count, pipeline, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = 0
+    while sent < count:
+        batch = min(pipeline, count - sent)
+        start = time.perf_counter()
+        writer.write(
+            b"".join(
+                f"GET {rng.choice(targets)} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+                for _ in range(batch)
+            )
+        )
+        for _ in range(batch):
+            status = await _read_response(reader)
+            # latency of a pipelined request counts from when its batch went out
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+        sent += batch
+    writer.close()
+
+
+async def _run(host, port, connections, requests, pipeline):
+    targets = _targets(date.today())
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _client(host, port, targets, requests, pipeline, latencies, errors, c)
+            for c in range(connections)
+        )
+    )
+    return time.perf_counter() - start, latencies, errors
+
+
+def _percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running service (default: start one)")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="per connection")
+    parser.add_argument("--pipeline", type=int, default=1, help="requests in flight")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            workdir = stack.enter_context(data_dir("http-bench-", copy_repo_data=True))
+            _pad(args.events)
+            host, port = "127.0.0.1", _free_port()
+            proc = _start_server(workdir, port)
+            stack.callback(proc.wait)
+            stack.callback(proc.terminate)
+        elapsed, latencies, errors = asyncio.run(
+            _run(host, port, args.connections, args.requests, max(1, args.pipeline))
+        )
+    total = len(latencies)
+    print(
+        f"connections={args.connections} requests/conn={args.requests} "
+        f"pipeline={args.pipeline}"
+    )
+    print(f"requests:     {total} ({len(errors)} errors)")
+    print(f"elapsed:      {elapsed:.2f}s")
+    print(f"throughput:   {total / elapsed:.0f} req/s")
+    print(f"latency p50:  {_percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"latency p99:  {_percentile(latencies, 0.99) * 1000:.2f} ms")
+    if errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Concurrent logins per second against the size of the KDF process pool.
+
+Each of --clients threads logs in --logins times (authenticate(): user
+lookup plus one key derivation in the pool). The "inline" row derives on the
+calling threads instead, the way logins ran before the pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_logins --clients 8 --logins 10
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.common import data_dir
+from utils import auth, kdf, storage
+
+PASSWORD = "rahasia"
+
+
+def _seed(count: int):
+    storage.configure_storage({"storage": "json"})
+    record = kdf.hash_password(PASSWORD)  # current parameters: no re-hash
+    for i in range(count):
+        user = {"username": f"kiosk{i}", "password": record, "role": "visitor"}
+        storage.add_user(user)
+
+
+def _inline_authenticate(username: str, password: str):
+    u = storage.find_user(username)
+    return u if u is not None and kdf.verify_password(u["password"], password) else None
+
+
+def _run(login, clients: int, logins: int) -> float:
+    failed = []
+
+    def client(c: int):
+        for _ in range(logins):
+            if login(f"kiosk{c}", PASSWORD) is None:
+                failed.append(c)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    rate = clients * logins / (time.perf_counter() - start)
+    if failed:
+        raise SystemExit(f"{len(failed)} logins with the right password failed")
+    return rate
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=max(4, 2 * cores))
+    parser.add_argument("--logins", type=int, default=10, help="per client")
+    parser.add_argument("--workers", help="pool sizes to try (default: 1,2,4.. cores)")
+    args = parser.parse_args()
+    if args.workers:
+        sizes = [int(n) for n in args.workers.split(",")]
+    else:
+        sizes = sorted({min(2**i, cores) for i in range(cores.bit_length() + 1)})
+
+    with data_dir("login-bench-"):
+        _seed(args.clients)
+        print(f"cores={cores} clients={args.clients} kdf={kdf.DEFAULT_PARAMS}")
+        rate = _run(_inline_authenticate, args.clients, args.logins)
+        print(f"inline      {rate:7.1f} logins/s")
+        for workers in sizes:
+            auth.set_kdf_workers(workers)
+            auth.verify_password(kdf.hash_password("warm-up"), "warm-up")
+            rate = _run(auth.authenticate, args.clients, args.logins)
+            print(f"workers={workers:<3} {rate:7.1f} logins/s")
+        assert auth.authenticate("kiosk0", "wrong password") is None
+        auth.set_kdf_workers(cores)
+
+
+if __name__ == "__main__":
+    main()
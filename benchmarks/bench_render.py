@@ -0,0 +1,128 @@
+"""Screen redraws per second into a pseudo-terminal: the visitor menu plus
+one page of the event table, drawn the way each renderer does it.
+
+    clear+lines  clear(1) in a shell, stdout line-buffered (before)
+    ansi+lines   ANSI clear, stdout line-buffered: one write() per print()
+    frame        ANSI clear and utils.screen.FrameWriter: one write() a frame
+
+A thread reads the terminal side as fast as it can, like a local terminal
+emulator; over SSH every write() also costs a packet, so the gap widens.
+POSIX only (needs the pty module).
+
+Run from the repository root:
+    python -m benchmarks.bench_render --frames 300
+"""
+import argparse
+import io
+import os
+import pty
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from core.actions import TABLE_PAGE_SIZE, print_table
+from localizations.translations import TRANSLATIONS
+from utils import screen
+from utils.colors import Colors, color_text
+from utils.models import Event
+
+
+def _events(count: int):
+    now = datetime.now().replace(second=0, microsecond=0)
+    return [
+        Event(
+            {
+                "id": 1000 + i,
+                "name": f"Festival Budaya {i}",
+                "datetime": (now + timedelta(hours=i)).isoformat(),
+                "location": "Malang",
+                "address": f"Jl. Ijen No. {i}, Klojen",
+                "organizer": "Dinas Pariwisata",
+                "category": "SENI",
+                "status": "scheduled",
+                "htm": "gratis",
+                "attendees": [],
+                "reviews": [],
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def _draw(events, t, clear):
+    """One screen: what visitor_loop and list_events print."""
+    clear()
+    print(color_text(t["menu_visitor_title"], Colors.BOLD + Colors.CYAN))
+    print(color_text("0. Keluar / Kembali", Colors.YELLOW))
+    for idx, opt in enumerate(t["menu_options_visitor"], start=1):
+        print(f"{idx}. {opt}")
+    print(color_text(t.get("list_header", "List:"), Colors.BOLD))
+    print_table(events, t, presorted=True, limit=TABLE_PAGE_SIZE)
+    # the prompt, and the flush input() does before reading
+    sys.stdout.write(t["prompt_choice"])
+    sys.stdout.flush()
+
+
+def _drain(fd: int, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            if not os.read(fd, 1 << 16):
+                break
+        except OSError:
+            break
+
+
+def _clear_shell():
+    sys.stdout.flush()
+    os.system("clear")
+
+
+def _clear_ansi():
+    sys.stdout.write(screen.CLEAR_SEQUENCE)
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    events = _events(TABLE_PAGE_SIZE)
+    t = TRANSLATIONS["id"]
+    master, slave = pty.openpty()
+    stop = threading.Event()
+    reader = threading.Thread(target=_drain, args=(master, stop), daemon=True)
+    reader.start()
+    os.environ.setdefault("TERM", "xterm")
+    saved_fd, saved_stdout = os.dup(1), sys.stdout
+    results = []
+    try:
+        os.dup2(slave, 1)  # clear(1) writes to the inherited descriptor
+        tty_stdout = io.TextIOWrapper(
+            open(1, "wb", closefd=False), encoding="utf-8", line_buffering=True
+        )
+        modes = [
+            ("clear+lines", tty_stdout, _clear_shell),
+            ("ansi+lines", tty_stdout, _clear_ansi),
+            ("frame", screen.FrameWriter(tty_stdout), screen.clear),
+        ]
+        for name, stdout, clear in modes:
+            sys.stdout = stdout
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                _draw(events, t, clear)
+            results.append((name, args.frames / (time.perf_counter() - start)))
+    finally:
+        sys.stdout = saved_stdout
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+        stop.set()
+        os.close(slave)
+        os.close(master)
+    for name, fps in results:
+        print(f"{name:<12} {fps:8.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
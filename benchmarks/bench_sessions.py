@@ -0,0 +1,78 @@
+"""Login-to-menu latency: a full password login against resuming a session.
+
+Both paths end the way main_loop does before showing the visitor menu
+(settings, storage, events and their statuses). "password" verifies the
+password with the KDF (in the auth pool, as the kiosk does); "resume"
+checks a session token instead: one HMAC, the revocation set, one lookup.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions --events 2000 --rounds 20
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import data_dir, make_events
+from utils import auth, kdf, storage
+from utils.status_updater import refresh_event_statuses
+
+PASSWORD = "rahasia"
+
+
+def _events(count: int):
+    now = datetime.now().replace(second=0, microsecond=0)
+    return make_events(
+        count,
+        fields=lambda i: {
+            "datetime": (now + timedelta(days=i % 180)).isoformat(),
+            "category": "MUSIK",
+        },
+    )
+
+
+def _users():
+    record = kdf.hash_password(PASSWORD)  # current parameters: no re-hash
+    return [{"username": "kiosk", "password": record, "role": "visitor"}]
+
+
+def _to_menu(user):
+    assert user is not None
+    settings = storage.load_settings()
+    storage.configure_storage(settings)
+    refresh_event_statuses(storage.load_events())
+
+
+def _measure(login, rounds: int):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _to_menu(login())
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with data_dir("session-bench-", events=_events(args.events), users=_users()):
+        _to_menu(storage.find_user("kiosk"))  # first load of events and users
+        auth.verify_password(kdf.hash_password("warm-up"), "warm-up")
+        token = auth.create_session(storage.find_user("kiosk"))
+        print(f"events={args.events} kdf={kdf.DEFAULT_PARAMS}")
+        rows = [
+            ("password", lambda: auth.authenticate("kiosk", PASSWORD)),
+            ("resume", lambda: auth.resume_session(token)),
+        ]
+        for name, login in rows:
+            median, worst = _measure(login, args.rounds)
+            print(f"{name:<9} median {median:8.2f} ms  max {worst:8.2f} ms")
+        auth.revoke_session(token)
+        assert auth.resume_session(token) is None
+
+
+if __name__ == "__main__":
+    main()
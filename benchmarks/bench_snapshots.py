@@ -0,0 +1,133 @@
+"""Reader threads run date filters and stats while a writer thread keeps
+editing events; reports reads/s per reader count and how many reads saw an
+edit half applied.
+
+Every event's name and address carry the same number and the writer changes
+both (one field at a time, yielding in between), so a result where the two
+disagree is a torn read. With snapshots (the default) there must be none;
+--live reads the mutable store directly for comparison.
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshots --events 20000 --readers 1,2,4,8
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import data_dir, make_events
+from utils import storage
+
+
+def _events(count: int):
+    rng = random.Random(1)
+    now = datetime.now().replace(second=0, microsecond=0)
+    return make_events(
+        count,
+        fields=lambda i: {
+            "datetime": (now + timedelta(days=rng.randint(-180, 180))).isoformat(),
+            "location": rng.choice(["Malang", "Surabaya", "Kediri", "Batu"]),
+            "category": rng.choice(["MUSIK", "SENI", "OLAHRAGA", "LAINNYA"]),
+        },
+    )
+
+
+def _torn(events) -> int:
+    return sum(
+        1 for e in events if e["name"].split()[-1] != e["address"].split()[-1]
+    )
+
+
+def _writer(events, stop: threading.Event, counter: list):
+    rng = random.Random(2)
+    ids = [e["id"] for e in events]
+    k = 0
+    while not stop.is_set():
+        k += 1
+        e = events.writable(events.by_id[rng.choice(ids)])
+        e["name"] = f"Acara {k}"
+        time.sleep(0)  # let readers run mid-edit
+        e["address"] = f"Jl. Contoh {k}"
+        storage.log_change(
+            events,
+            "edit_event",
+            {"id": e["id"], "fields": {"name": e["name"], "address": e["address"]}},
+        )
+        counter[0] += 1
+
+
+def _reader(events, live: bool, stop: threading.Event, results: list, seed: int):
+    rng = random.Random(seed)
+    today = date.today()
+    reads = torn = errors = 0
+    while not stop.is_set():
+        start = today + timedelta(days=rng.randint(-180, 150))
+        end = start + timedelta(days=7)
+        try:
+            if live:
+                found = events.by_date.range(start, end)
+                events.ensure_stats().snapshot()
+            else:
+                snap = events.snapshot()
+                found = snap.range(start, end)
+                snap.stats()
+            torn += _torn(found)
+        except RuntimeError:  # e.g. a dict changed size during iteration
+            errors += 1
+        reads += 1
+    results.append((reads, torn, errors))
+
+
+def _run(events, readers: int, seconds: float, live: bool):
+    stop = threading.Event()
+    writes = [0]
+    results: list = []
+    threads = [threading.Thread(target=_writer, args=(events, stop, writes))]
+    threads += [
+        threading.Thread(target=_reader, args=(events, live, stop, results, r))
+        for r in range(readers)
+    ]
+    for th in threads:
+        th.start()
+    time.sleep(seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+    reads = sum(r[0] for r in results)
+    torn = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    return reads / seconds, writes[0] / seconds, torn, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--readers", default="1,2,4,8")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--live", action="store_true", help="skip snapshots")
+    args = parser.parse_args()
+
+    inconsistent = 0
+    with data_dir("snapshot-bench-", events=_events(args.events)):
+        # row-level writes, batched, so rewriting files does not set the pace
+        storage.configure_storage(
+            {"storage": "sqlite", "write_window_ms": 200, "write_batch_size": 1000}
+        )
+        events = storage.load_events()
+        events.ensure_stats()  # build the incremental counters up front
+        print(f"events={len(events)} mode={'live' if args.live else 'snapshot'}")
+        for readers in (int(n) for n in args.readers.split(",")):
+            reads, writes, torn, errors = _run(events, readers, args.seconds, args.live)
+            print(
+                f"readers={readers:<3} reads/s={reads:8.0f}  writes/s={writes:7.0f}"
+                f"  torn={torn}  errors={errors}"
+            )
+            inconsistent += torn + errors
+        storage.flush()
+    if inconsistent and not args.live:
+        raise SystemExit(1)  # a snapshot showed an edit half done
+
+
+if __name__ == "__main__":
+    main()
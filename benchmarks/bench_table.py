@@ -0,0 +1,87 @@
+"""Time to render the event table for growing result sizes: one page of the
+paginated view (what the menus show now) against the whole table at once.
+
+Output goes to an in-memory buffer, so this measures formatting alone; a
+real terminal adds the time to draw every line on top.
+
+Run from the repository root:
+    python -m benchmarks.bench_table --sizes 1000,10000,100000
+"""
+import argparse
+import contextlib
+import io
+import time
+from datetime import timedelta
+
+from benchmarks.common import data_dir, make_events, save_events
+from core.actions import TABLE_PAGE_SIZE, print_table
+from localizations.translations import TRANSLATIONS
+from utils import storage
+
+
+def _events(count: int):
+    return make_events(
+        count,
+        step=timedelta(minutes=10),
+        fields=lambda i: {
+            "name": f"Festival Budaya {i}",
+            "address": f"Jl. Ijen No. {i}, Klojen, Kota Malang, Jawa Timur",
+            "organizer": "Dinas Pariwisata",
+            "category": "SENI",
+            "htm": "gratis",
+        },
+    )
+
+
+def _render(render) -> str:
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        render()
+    return out.getvalue()
+
+
+def _render_ms(render, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _render(render)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _rows(output: str) -> int:
+    return output.count("Festival Budaya")
+
+
+def _run(count: int, full: bool):
+    save_events(_events(count))
+    storage.configure_storage({"storage": "json"})
+    events = storage.load_events(fresh=True)
+    t = TRANSLATIONS["id"]
+    listing = events.snapshot().view()  # what list_events pages through
+    middle = (len(listing) // 2 // TABLE_PAGE_SIZE) * TABLE_PAGE_SIZE
+
+    def page():
+        print_table(listing, t, presorted=True, offset=middle, limit=TABLE_PAGE_SIZE)
+
+    def whole():
+        print_table(list(listing), t, presorted=True)
+
+    assert _rows(_render(page)) == min(TABLE_PAGE_SIZE, count - middle)
+    line = f"events={count:<8} page {_render_ms(page, 50):8.2f} ms"
+    if full:
+        assert _rows(_render(whole)) == count
+        line += f"  whole table {_render_ms(whole, 1):10.1f} ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--no-full", action="store_true", help="skip whole table")
+    args = parser.parse_args()
+
+    with data_dir("table-bench-"):
+        for count in (int(n) for n in args.sizes.split(",")):
+            _run(count, not args.no_full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Login lookups, duplicate checks and registrations against user
+directories of growing size; per-operation cost should stay flat.
+
+Run from the repository root:
+    python -m benchmarks.bench_users --sizes 10000,100000,300000 --storage json
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from benchmarks.common import data_dir
+from utils import storage
+
+PASSWORD = {"salt": "00" * 16, "hash": "00" * 32}
+
+
+def _users(count: int):
+    return [
+        {"username": f"user{i}", "password": PASSWORD, "role": "visitor"}
+        for i in range(count)
+    ]
+
+
+def _per_op_us(fn, args, expect) -> float:
+    start = time.perf_counter()
+    results = [fn(a) for a in args]
+    elapsed = time.perf_counter() - start
+    assert all(expect(r) for r in results), fn.__name__
+    return elapsed / len(args) * 1e6
+
+
+def _run(workdir: str, mode: str, size: int, lookups: int, registrations: int):
+    os.chdir(workdir)
+    storage.configure_storage({"storage": mode})
+    rng = random.Random(size)
+    start = time.perf_counter()
+    storage.find_user("user0")  # first use: parse the users file (or import it)
+    load_s = time.perf_counter() - start
+    hits = [f"USER{rng.randrange(size)}" for _ in range(lookups)]
+    misses = [f"nobody{i}" for i in range(lookups)]
+    hit_us = _per_op_us(storage.find_user, hits, lambda u: u is not None)
+    miss_us = _per_op_us(storage.find_user, misses, lambda u: u is None)
+    dup_us = _per_op_us(
+        storage.add_user,
+        [{"username": name, "password": PASSWORD, "role": "visitor"} for name in hits],
+        lambda added: added is False,
+    )
+    new = [
+        {"username": f"new{i}", "password": PASSWORD, "role": "visitor"}
+        for i in range(registrations)
+    ]
+    add_us = _per_op_us(storage.add_user, new, lambda added: added is True)
+    print(
+        f"{mode:<8} users={size:<8} first load {load_s * 1000:7.0f} ms  "
+        f"login {hit_us:6.1f} us  miss {miss_us:6.1f} us  "
+        f"duplicate {dup_us:7.1f} us  register {add_us:7.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    parser.add_argument("--storage", choices=storage.STORAGE_MODES, default="json")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--registrations", type=int, default=500)
+    args = parser.parse_args()
+
+    # one fresh process per size, so nothing is cached from the previous one
+    ctx = multiprocessing.get_context("spawn")
+    for size in (int(n) for n in args.sizes.split(",")):
+        with data_dir("users-bench-", users=_users(size)) as workdir:
+            run_args = (workdir, args.storage, size, args.lookups, args.registrations)
+            proc = ctx.Process(target=_run, args=run_args)
+            proc.start()
+            proc.join()
+        if proc.exitcode:
+            raise SystemExit(proc.exitcode)
+
+
+if __name__ == "__main__":
+    main()
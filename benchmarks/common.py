@@ -0,0 +1,74 @@
+"""Scaffolding shared by the benchmarks: generated events and a throw-away
+data directory to run in."""
+import contextlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable, Iterator, Optional
+
+from utils import storage
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_events(
+    count: int,
+    step: timedelta = timedelta(hours=1),
+    first_id: int = 1000,
+    fields: Optional[Callable[[int], Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """`count` scheduled events with ids from `first_id`, one every `step`
+    from now (to the minute); `fields(i)` adds to or overrides event i."""
+    now = datetime.now().replace(second=0, microsecond=0)
+    events = []
+    for i in range(count):
+        e = {
+            "id": first_id + i,
+            "name": f"Acara {i}",
+            "datetime": (now + step * i).isoformat(),
+            "location": "Malang",
+            "address": f"Jl. Contoh {i}",
+            "category": "LAINNYA",
+            "status": "scheduled",
+            "attendees": [],
+            "reviews": [],
+        }
+        if fields is not None:
+            e.update(fields(i))
+        events.append(e)
+    return events
+
+
+def save_events(events: List[Dict[str, Any]]):
+    """Write `events` as data/events.json of the working directory."""
+    storage.save_json(os.path.join("data", "events.json"), events)
+
+
+@contextlib.contextmanager
+def data_dir(
+    prefix: str,
+    events: Optional[List[Dict[str, Any]]] = None,
+    users: Optional[List[Dict[str, Any]]] = None,
+    copy_repo_data: bool = False,
+) -> Iterator[str]:
+    """Work in a new temporary directory with an empty data/ (a copy of the
+    repository's with `copy_repo_data`) holding `events` and `users` as its
+    JSON files. Yields the directory; afterwards the previous working
+    directory is restored and the temporary one removed."""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    cwd = os.getcwd()
+    try:
+        if copy_repo_data:
+            shutil.copytree(os.path.join(REPO, "data"), os.path.join(workdir, "data"))
+        else:
+            os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        if events is not None:
+            save_events(events)
+        if users is not None:
+            storage.save_json(os.path.join("data", "users.json"), users)
+        yield workdir
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -1,17 +1,53 @@
-import collections
 from typing import List, Dict, Any, Tuple, Optional
 from utils.colors import *
 from utils.parser import *
 from utils.clear import clear_screen
 from utils.storage import *
 from datetime import timedelta
-from utils.status_updater import auto_update_event_statuses
+from utils.status_updater import refresh_event_statuses
+from utils.models import Event, Attendee, Review, append_attendee, append_review
+from utils.ids import new_event_id
+from utils.event_store import (
+    EventStore,
+    RangeView,
+    find_event,
+    writable_event,
+    remove_event,
+    in_display_order,
+    is_attending,
+    has_reviewed,
+    attended_events,
+)
+from utils.text_index import rank
+from utils.stats_engine import StatsEngine
 
 
 # --------------------------
 # Table printing (hide id)
 # --------------------------
-def print_table(events: List[Dict[str, Any]], t: Dict[str, Any]):
+TABLE_PAGE_SIZE = 20  # rows per page of the paginated table
+# widest each column may get (None = as wide as its text); longer text is cut
+# with an ellipsis so one long name or address cannot stretch every row
+TABLE_COLUMN_CAPS = [None, 32, None, 20, 32, 20, 14, 10, 12, None, None]
+
+
+def _cell(text: str, cap: Optional[int]) -> str:
+    if cap is not None and len(text) > cap:
+        return text[: cap - 3] + "..."
+    return text
+
+
+def print_table(
+    events: List[Event],
+    t: Dict[str, Any],
+    presorted: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+):
+    """Print events as a table ordered by datetime. Pass presorted=True when
+    `events` is already in that order (index slices, select_event_for_detail).
+    With `limit`, only rows offset+1 .. offset+limit are formatted, and the
+    column widths come from those rows alone."""
     if not events:
         print(color_text(t["no_events"], Colors.YELLOW))
         return
@@ -32,43 +68,89 @@ def print_table(events: List[Dict[str, Any]], t: Dict[str, Any]):
         ],
     )
     rows = []
-    for i, e in enumerate(sorted(events, key=lambda x: x["datetime"]), start=1):
-        att = len(e.get("attendees", []))
-        revs = e.get("reviews", [])
-        avg_rating = (
-            round(sum(r.get("rating", 0) for r in revs) / len(revs), 2) if revs else "-"
-        )
-        rows.append(
-            [
-                str(i),
-                e.get("name", ""),
-                format_dt(e.get("datetime", "")),
-                e.get("location", ""),
-                e.get("address", ""),
-                e.get("organizer", ""),
-                e.get("category", ""),
-                e.get("status", ""),
-                str(e.get("htm", "")),
-                str(att),
-                str(avg_rating),
-            ]
-        )
+    if not presorted:
+        events = in_display_order(events)
+    end = len(events) if limit is None else offset + limit
+    for i, e in enumerate(events[offset:end], start=offset + 1):
+        att = e.get("attendee_count", 0)
+        avg_rating = e.avg_rating if e.avg_rating is not None else "-"
+        row = [
+            str(i),
+            e.get("name", ""),
+            format_event_dt(e),
+            e.get("location", ""),
+            e.get("address", ""),
+            e.get("organizer", ""),
+            e.get("category", ""),
+            e.get("status", ""),
+            str(e.get("htm", "")),
+            str(att),
+            str(avg_rating),
+        ]
+        rows.append([_cell(v, cap) for v, cap in zip(row, TABLE_COLUMN_CAPS)])
     cols = len(headers)
     widths = [len(headers[i]) for i in range(cols)]
     for r in rows:
         for i in range(cols):
             widths[i] = max(widths[i], len(r[i]))
     hdr = " | ".join(headers[i].ljust(widths[i]) for i in range(cols))
-    print(color_text(hdr, Colors.BOLD + Colors.CYAN))
-    print("-" * (sum(widths) + 3 * (cols - 1)))
+    lines = [
+        color_text(hdr, Colors.BOLD + Colors.CYAN),
+        "-" * (sum(widths) + 3 * (cols - 1)),
+    ]
     for r in rows:
-        print(" | ".join(r[i].ljust(widths[i]) for i in range(cols)))
+        lines.append(" | ".join(r[i].ljust(widths[i]) for i in range(cols)))
+    print("\n".join(lines))
+
+
+def browse_table(
+    events: List[Event], t: Dict[str, Any], prompt: str, page: int = 0
+) -> Tuple[str, int]:
+    """Show `events` (already in display order) one page at a time. The
+    user may go to the next (n) or previous (p) page or jump to one (g<no>);
+    anything else they type is returned, together with the page shown last.
+    Row numbers count from the top of the whole list, so any row can be
+    picked from any page."""
+    pages = max(1, -(-len(events) // TABLE_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    while True:
+        print_table(
+            events,
+            t,
+            presorted=True,
+            offset=page * TABLE_PAGE_SIZE,
+            limit=TABLE_PAGE_SIZE,
+        )
+        if pages > 1:
+            info = t.get("table_page", "Halaman {page}/{pages} ({total} event)")
+            hint = t.get(
+                "table_nav_hint", "n=berikutnya, p=sebelumnya, g<no>=ke halaman"
+            )
+            print(
+                color_text(
+                    info.format(page=page + 1, pages=pages, total=len(events))
+                    + "  "
+                    + hint,
+                    Colors.CYAN,
+                )
+            )
+        sel = input(prompt).strip()
+        nav = sel.lower()
+        if pages > 1 and nav == "n":
+            page = min(page + 1, pages - 1)
+        elif pages > 1 and nav == "p":
+            page = max(page - 1, 0)
+        elif pages > 1 and nav[:1] == "g" and nav[1:].strip().isdigit():
+            page = min(max(int(nav[1:].strip()) - 1, 0), pages - 1)
+        else:
+            return sel, page
+        clear_screen()
 
 
 # --------------------------
 # CRUD and interactive functions (status numeric, default scheduled, address field)
 # --------------------------
-def add_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def add_event_interactive(events: List[Event], t: Dict[str, Any]):
     clear_screen()
     print(color_text("Add Event", Colors.GREEN))
     name = input(t["prompt_name"]).strip()
@@ -97,37 +179,36 @@ def add_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
         status="scheduled",
     )
     events.append(ev)
+    log_change(events, "add_event", {"event": ev})
     # Auto update statuses (in case dt already in past)
-    if auto_update_event_statuses(events):
-        save_events(events)
-    else:
-        save_events(events)
+    refresh_event_statuses(events)
     print(color_text(t["event_added"], Colors.GREEN))
     input(t["press_enter"])
 
 
-def pick_event_index(
-    events: List[Dict[str, Any]], t: Dict[str, Any], allow_past: bool = False
-) -> Optional[int]:
-    """Show table and let user pick index. By default, hide past events (before today).
-    If allow_past True, show all events regardless of date.
-    Returns original index in events list, or None."""
+def pick_event(
+    events: List[Event], t: Dict[str, Any], allow_past: bool = False
+) -> Optional[Event]:
+    """Show table and let user pick an event. By default, hide past events
+    (before today). If allow_past True, show all events regardless of date.
+    Returns the picked event, or None."""
     if not events:
         print(color_text(t["no_events"], Colors.YELLOW))
         input(t["press_enter"])
         return None
     # Optionally filter out events before today
     today = datetime.now().date()
-    display_events = []
-    mapping = []  # maps displayed index to original index
-    for orig_idx, e in enumerate(sorted(events, key=lambda x: x["datetime"])):
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-        except Exception:
-            continue
-        if (not allow_past) and dt.date() < today:
-            continue
-        display_events.append(e)
+    if allow_past:
+        require_events(events)
+    if isinstance(events, EventStore):
+        display_events = events.snapshot().view(None if allow_past else today)
+    else:
+        display_events = [
+            e
+            for e in in_display_order(events)
+            if e.dt is not None
+            and (allow_past or e.date_ordinal >= today.toordinal())
+        ]
     if not display_events:
         # nothing to pick
         print(
@@ -138,8 +219,7 @@ def pick_event_index(
         )
         input(t["press_enter"])
         return None
-    print_table(display_events, t)
-    sel = input(t["prompt_select_index"]).strip()
+    sel, _ = browse_table(display_events, t, t["prompt_select_index"])
     if sel == "" or sel == "0":
         return None
     if not sel.isdigit():
@@ -151,30 +231,26 @@ def pick_event_index(
         print(color_text(t["invalid_index"], Colors.RED))
         input(t["press_enter"])
         return None
-    selected_event = display_events[idx]
-    # find in original events by unique id
-    for orig_idx, e in enumerate(events):
-        if e.get("id") == selected_event.get("id"):
-            return orig_idx
-    return None
+    # resolve the picked row by id (a hash lookup for a store, no list scan)
+    return find_event(events, display_events[idx].get("id"))
 
 
-def edit_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def edit_event_interactive(events: List[Event], t: Dict[str, Any]):
     clear_screen()
-    idx = pick_event_index(events, t, allow_past=True)
-    if idx is None:
+    e = pick_event(events, t, allow_past=True)
+    if e is None:
         return
-    e = events[idx]
     print(color_text("Edit (enter = keep existing)", Colors.CYAN))
     new_name = input(f"{t['prompt_name']} [{e['name']}]: ").strip() or e["name"]
-    dt_input = input(f"{t['prompt_datetime']} [{format_dt(e['datetime'])}]: ").strip()
+    dt_input = input(f"{t['prompt_datetime']} [{format_event_dt(e)}]: ").strip()
+    new_dt = e["datetime"]
     if dt_input:
         dt_parsed = parse_datetime(dt_input)
         if dt_parsed is None:
             print(color_text(t["invalid_date"], Colors.RED))
             input(t["press_enter"])
             return
-        e["datetime"] = dt_parsed.isoformat()
+        new_dt = dt_parsed.isoformat()
     new_location = input(
         f"{t['prompt_location']} [{e.get('location','')}]: "
     ).strip() or e.get("location", "")
@@ -193,6 +269,16 @@ def edit_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
     new_cat = input(
         f"{t['prompt_category']} [{e.get('category','LAINNYA')}]: "
     ).strip() or e.get("category", "LAINNYA")
+    fields = {
+        "name": new_name,
+        "datetime": new_dt,
+        "location": new_location,
+        "address": new_address,
+        "organizer": new_org,
+        "description": new_desc,
+        "htm": new_htm,
+        "category": new_cat,
+    }
     # Status: allow numeric selection
     print("Current status:", e.get("status", "scheduled"))
     stat_in = input(t["prompt_status_num"]).strip()
@@ -203,45 +289,37 @@ def edit_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
             "3": "postponed",
             "4": "cancelled",
         }
-        e["status"] = mapping[stat_in]
+        fields["status"] = mapping[stat_in]
     # apply rest
-    e["name"] = new_name
-    e["location"] = new_location
-    e["address"] = new_address
-    e["organizer"] = new_org
-    e["description"] = new_desc
-    e["htm"] = new_htm
-    e["category"] = new_cat
+    e = writable_event(events, e)
+    e.update(fields)
+    log_change(events, "edit_event", {"id": e.get("id"), "fields": fields})
     # auto update statuses then save
-    if auto_update_event_statuses(events):
-        save_events(events)
-    else:
-        save_events(events)
+    refresh_event_statuses(events)
     print(color_text(t["event_updated"], Colors.GREEN))
     input(t["press_enter"])
 
 
-def delete_event_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def delete_event_interactive(events: List[Event], t: Dict[str, Any]):
     clear_screen()
-    idx = pick_event_index(events, t, allow_past=True)
-    if idx is None:
+    e = pick_event(events, t, allow_past=True)
+    if e is None:
         return
     confirm = input(t["prompt_confirm_delete"]).strip()
     if confirm.upper() in ("YA", "YES"):
-        events.pop(idx)
-        save_events(events)
+        remove_event(events, e)
+        log_change(events, "delete_event", {"id": e.get("id")})
         print(color_text(t["event_deleted"], Colors.GREEN))
     else:
         print(color_text(t["invalid_choice"], Colors.YELLOW))
     input(t["press_enter"])
 
 
-def update_event_status_interactive(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def update_event_status_interactive(events: List[Event], t: Dict[str, Any]):
     clear_screen()
-    idx = pick_event_index(events, t, allow_past=True)
-    if idx is None:
+    e = pick_event(events, t, allow_past=True)
+    if e is None:
         return
-    e = events[idx]
     print("Current status:", e.get("status", "scheduled"))
     stat_in = input(t["prompt_status_num"]).strip()
     if stat_in not in ("1", "2", "3", "4"):
@@ -249,8 +327,9 @@ def update_event_status_interactive(events: List[Dict[str, Any]], t: Dict[str, A
         input(t["press_enter"])
         return
     mapping = {"1": "scheduled", "2": "finished", "3": "postponed", "4": "cancelled"}
+    e = writable_event(events, e)
     e["status"] = mapping[stat_in]
-    save_events(events)
+    log_change(events, "set_status", {"id": e.get("id"), "status": e["status"]})
     print(color_text(t["status_updated"], Colors.GREEN))
     input(t["press_enter"])
 
@@ -259,53 +338,78 @@ def update_event_status_interactive(events: List[Dict[str, Any]], t: Dict[str, A
 # Listing & filters (default hides past events)
 # --------------------------
 def list_events(
-    events: List[Dict[str, Any]],
+    events: List[Event],
     t: Dict[str, Any],
     allow_past: bool = False,
-    filtered: Optional[List[Dict[str, Any]]] = None,
+    filtered: Optional[List[Event]] = None,
 ):
     # Always run auto-update before display
-    if auto_update_event_statuses(events):
-        save_events(events)
+    refresh_event_statuses(events)
+    if allow_past and filtered is None:
+        require_events(events)
     data = filtered if filtered is not None else events
     # By default hide events before today unless allow_past True
     if not allow_past:
         today = datetime.now().date()
-        data = [
-            e for e in data if datetime.fromisoformat(e["datetime"]).date() >= today
-        ]
+        if isinstance(data, EventStore):
+            data = data.snapshot().view(today)
+        else:
+            data = [
+                e
+                for e in data
+                if e.date_ordinal is not None and e.date_ordinal >= today.toordinal()
+            ]
     clear_screen()
     print(color_text(t.get("list_header", "List:"), Colors.BOLD))
     print(color_text(t.get("show_all_info_hint", ""), Colors.CYAN))
     select_event_for_detail(data, t)
 
 
-def events_on_day(events: List[Dict[str, Any]], target: date) -> List[Dict[str, Any]]:
-    res = []
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-        except Exception:
-            continue
-        if dt.date() == target:
-            res.append(e)
-    return res
+def _indexed_range(
+    events: List[Event], start: date, end: date
+) -> Optional[List[Event]]:
+    """Events with start <= date < end answered by the storage backend or the
+    store's sorted date index (O(log n + k)). None when `events` is a plain
+    list that has to be scanned."""
+    pushed = query_events(events, start=start, end=end)
+    if pushed is not None:
+        return pushed
+    if isinstance(events, EventStore):
+        return events.snapshot().range(start, end)
+    return None
+
+
+def events_on_day(events: List[Event], target: date) -> List[Event]:
+    indexed = _indexed_range(events, target, target + timedelta(days=1))
+    if indexed is not None:
+        return indexed
+    target_ord = target.toordinal()
+    return [e for e in events if e.date_ordinal == target_ord]
 
 
 def filter_by_location(
-    events: List[Dict[str, Any]], location_substr: str
-) -> List[Dict[str, Any]]:
+    events: List[Event], location_substr: str
+) -> List[Event]:
     s = location_substr.strip().lower()
+    pushed = query_events(events, location=s)
+    if pushed is not None:
+        return pushed
     return [
         e
         for e in events
-        if s in e.get("location", "").lower() or s in e.get("address", "").lower()
+        if s in e.lc.get("location", "") or s in e.lc.get("address", "")
     ]
 
 
+def first_of_next_month(d: date) -> date:
+    if d.month == 12:
+        return d.replace(year=d.year + 1, month=1, day=1)
+    return d.replace(month=d.month + 1, day=1)
+
+
 def filter_by_period(
-    events: List[Dict[str, Any]], period: str, ref_date: date
-) -> List[Dict[str, Any]]:
+    events: List[Event], period: str, ref_date: date
+) -> List[Event]:
     if period == "day":
         start = ref_date
         end = start + timedelta(days=1)
@@ -316,60 +420,76 @@ def filter_by_period(
         end = start_of_week + timedelta(days=7)
     elif period == "month":
         start = ref_date.replace(day=1)
-        if start.month == 12:
-            next_month = start.replace(year=start.year + 1, month=1, day=1)
-        else:
-            next_month = start.replace(month=start.month + 1, day=1)
-        end = next_month
+        end = first_of_next_month(start)
     else:
         start = ref_date
         end = ref_date + timedelta(days=1)
-    res = []
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-            if start <= dt.date() < end:
-                res.append(e)
-        except Exception:
-            continue
-    return res
+    indexed = _indexed_range(events, start, end)
+    if indexed is not None:
+        return indexed
+    lo, hi = start.toordinal(), end.toordinal()
+    return [
+        e for e in events if e.date_ordinal is not None and lo <= e.date_ordinal < hi
+    ]
 
 
 def filter_by_date_range(
-    events: List[Dict[str, Any]], start_date: date, end_date: date
-) -> List[Dict[str, Any]]:
-    res = []
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-            if start_date <= dt.date() <= end_date:
-                res.append(e)
-        except Exception:
-            continue
-    return res
+    events: List[Event], start_date: date, end_date: date
+) -> List[Event]:
+    indexed = _indexed_range(events, start_date, end_date + timedelta(days=1))
+    if indexed is not None:
+        return indexed
+    lo, hi = start_date.toordinal(), end_date.toordinal()
+    return [
+        e for e in events if e.date_ordinal is not None and lo <= e.date_ordinal <= hi
+    ]
 
 
 def filter_week_full(
-    events: List[Dict[str, Any]], ref_date: date
-) -> Tuple[List[Dict[str, Any]], date, date]:
+    events: List[Event], ref_date: date
+) -> Tuple[List[Event], date, date]:
     start_of_week = ref_date - timedelta(days=ref_date.weekday())
     end_of_week = start_of_week + timedelta(days=6)
-    res = []
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-            if start_of_week <= dt.date() <= end_of_week:
-                res.append(e)
-        except Exception:
-            continue
+    indexed = _indexed_range(events, start_of_week, start_of_week + timedelta(days=7))
+    if indexed is not None:
+        return indexed, start_of_week, end_of_week
+    lo, hi = start_of_week.toordinal(), end_of_week.toordinal()
+    res = [
+        e for e in events if e.date_ordinal is not None and lo <= e.date_ordinal <= hi
+    ]
     return res, start_of_week, end_of_week
 
 
+def keyword_search(
+    events: List[Event],
+    keywords: List[Tuple[str, str]],
+    within: Optional[List[Event]] = None,
+) -> List[Event]:
+    """Events (of `within`, default all) whose lowercased columns contain
+    every (column, keyword) pair, ranked best match first."""
+    within = events if within is None else within
+    if isinstance(events, EventStore):
+        # inverted index: one set intersection per column
+        ids = events.text.search(keywords)
+        if within is events:
+            found = [events.by_id[i] for i in ids]
+        else:
+            found = [ev for ev in within if ev.get("id") in ids]
+    else:
+        found = [
+            ev
+            for ev in within
+            if all(kw in ev.lc.get(key, "") for key, kw in keywords)
+        ]
+    return rank(found, keywords)
+
+
 # --------------------------
 # Advanced filter menu (allows access to past events too)
 # --------------------------
-def filter_menu(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def filter_menu(events: List[Event], t: Dict[str, Any]):
     clear_screen()
+    require_events(events)  # filters may reach any month
     if not events:
         print(color_text(t["no_events"], Colors.YELLOW))
         input(t["press_enter"])
@@ -402,6 +522,7 @@ def filter_menu(events: List[Dict[str, Any]], t: Dict[str, Any]):
         input(t["press_enter"])
         return
     filtered = events
+    keywords = []  # (column, keyword) pairs, matched together at the end
     for idx in chosen_idx:
         key = cols[idx][0]
         if key == "datetime":
@@ -442,49 +563,51 @@ def filter_menu(events: List[Dict[str, Any]], t: Dict[str, Any]):
             )
             if kw == "":
                 continue
-            filtered = [ev for ev in filtered if kw in str(ev.get(key, "")).lower()]
+            keywords.append((key, kw))
+    if keywords:
+        filtered = keyword_search(events, keywords, filtered)
     clear_screen()
     print(color_text("Hasil filter (termasuk acara lampau jika cocok):", Colors.GREEN))
-    select_event_for_detail(filtered, t)
+    select_event_for_detail(filtered, t, presorted=bool(keywords))
 
 
 # --------------------------
 # Attendance & review using username (no extra name input)
 # --------------------------
 def attend_event(
-    events: List[Dict[str, Any]], t: Dict[str, Any], current_user: Dict[str, Any]
+    events: List[Event], t: Dict[str, Any], current_user: Dict[str, Any]
 ):
     clear_screen()
-    idx = pick_event_index(events, t, allow_past=False)
-    if idx is None:
+    e = pick_event(events, t, allow_past=False)
+    if e is None:
         return
-    username = current_user["username"]
-    e = events[idx]
-    if any(
-        a.get("username", "").strip().lower() == username.lower()
-        for a in e.get("attendees", [])
-    ):
+    if record_attendance(events, e, current_user["username"]) is None:
         print(color_text(t["already_attending"], Colors.YELLOW))
         input(t["press_enter"])
         return
-    e.setdefault("attendees", []).append(
-        {"username": username, "timestamp": datetime.now().isoformat()}
-    )
-    save_events(events)
     print(color_text(t["attend_confirmed"], Colors.GREEN))
     input(t["press_enter"])
 
 
+def record_attendance(
+    events: List[Event], e: Event, username: str
+) -> Optional[Attendee]:
+    """RSVP `username` to `e` and log it. None if they already attend."""
+    e.load_details()
+    if is_attending(events, e, username):
+        return None
+    attendee = Attendee(username=username, timestamp=datetime.now().isoformat())
+    e = writable_event(events, e)
+    append_attendee(e, attendee)
+    log_change(events, "add_attendee", {"id": e.get("id"), "attendee": attendee})
+    return attendee
+
+
 def view_my_attendance(
-    events: List[Dict[str, Any]], t: Dict[str, Any], current_user: Dict[str, Any]
+    events: List[Event], t: Dict[str, Any], current_user: Dict[str, Any]
 ):
-    username = current_user["username"]
-    matched = []
-    for e in events:
-        for a in e.get("attendees", []):
-            if a.get("username", "").strip().lower() == username.lower():
-                matched.append(e)
-                break
+    require_events(events)
+    matched = attended_events(events, current_user["username"])
     clear_screen()
     if not matched:
         print(
@@ -495,27 +618,23 @@ def view_my_attendance(
         )
         input(t["press_enter"])
         return
-    select_event_for_detail(matched, t)
+    select_event_for_detail(matched, t, presorted=True)
 
 
 def add_review(
-    events: List[Dict[str, Any]], t: Dict[str, Any], current_user: Dict[str, Any]
+    events: List[Event], t: Dict[str, Any], current_user: Dict[str, Any]
 ):
     clear_screen()
-    idx = pick_event_index(events, t, allow_past=False)
-    if idx is None:
+    e = pick_event(events, t, allow_past=False)
+    if e is None:
         return
-    e = events[idx]
-    if e.get("status", "") != "finished":
+    username = current_user["username"]
+    error = review_error(events, e, username)
+    if error == "not_allowed_review":
         print(color_text(t["not_allowed_review"], Colors.YELLOW))
         input(t["press_enter"])
         return
-    username = current_user["username"]
-    # check if user already reviewed? permit multiple reviews if desired; we'll allow one review per user per event
-    if any(
-        r.get("username", "").strip().lower() == username.lower()
-        for r in e.get("reviews", [])
-    ):
+    if error == "already_reviewed":
         print(color_text("Anda sudah memberi review untuk acara ini.", Colors.YELLOW))
         input(t["press_enter"])
         return
@@ -530,23 +649,42 @@ def add_review(
         input(t["press_enter"])
         return
     comment = input(t["prompt_review_comment"]).strip()
-    e.setdefault("reviews", []).append(
-        {
-            "username": username,
-            "rating": rating,
-            "comment": comment,
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
-    save_events(events)
+    record_review(events, e, username, rating, comment)
     print(color_text(t["review_added"], Colors.GREEN))
     input(t["press_enter"])
 
 
+def review_error(events: List[Event], e: Event, username: str) -> Optional[str]:
+    """Why `username` may not review `e` ("not_allowed_review" before it is
+    finished, "already_reviewed": one review per user per event), or None."""
+    e.load_details()
+    if e.get("status", "") != "finished":
+        return "not_allowed_review"
+    if has_reviewed(events, e, username):
+        return "already_reviewed"
+    return None
+
+
+def record_review(
+    events: List[Event], e: Event, username: str, rating: int, comment: str
+) -> Review:
+    """Append a (validated) review to `e` and log it."""
+    review = Review(
+        username=username,
+        rating=rating,
+        comment=comment,
+        timestamp=datetime.now().isoformat(),
+    )
+    e = writable_event(events, e)
+    append_review(e, review)
+    log_change(events, "add_review", {"id": e.get("id"), "review": review})
+    return review
+
+
 # --------------------------
 # Event detail view (with reviews)
 # --------------------------
-def view_event_detail(events: List[Dict[str, Any]], t: Dict[str, Any], direct=False):
+def view_event_detail(events: List[Event], t: Dict[str, Any], direct=False):
     clear_screen()
 
     if direct:
@@ -554,80 +692,76 @@ def view_event_detail(events: List[Dict[str, Any]], t: Dict[str, Any], direct=Fa
         e = events[0]
     else:
         # OLD behavior – digunakan jika masuk via menu lain
-        idx = pick_event_index(events, t, allow_past=True)
-        if idx is None:
+        e = pick_event(events, t, allow_past=True)
+        if e is None:
             return
-        e = events[idx]
+    e.load_details()  # attendees/reviews may still be on disk
 
     clear_screen()
-    print(color_text("Event Detail", Colors.BOLD + Colors.CYAN))
-    print("-" * 40)
-    print(f"Name     : {e.get('name','')}")
-    print(f"When     : {format_dt(e.get('datetime',''))}")
-    print(f"Location : {e.get('location','')}")
-    print(f"Address  : {e.get('address','')}")
-    print(f"Organizer: {e.get('organizer','')}")
-    print(f"Category : {e.get('category','')}")
-    print(f"Status   : {e.get('status','')}")
-    print(f"HTM      : {e.get('htm','')}")
-    print(f"Desc     : {e.get('description','')}")
-    print("\nAttendees:")
+    lines = [
+        color_text("Event Detail", Colors.BOLD + Colors.CYAN),
+        "-" * 40,
+        f"Name     : {e.get('name','')}",
+        f"When     : {format_event_dt(e)}",
+        f"Location : {e.get('location','')}",
+        f"Address  : {e.get('address','')}",
+        f"Organizer: {e.get('organizer','')}",
+        f"Category : {e.get('category','')}",
+        f"Status   : {e.get('status','')}",
+        f"HTM      : {e.get('htm','')}",
+        f"Desc     : {e.get('description','')}",
+        "\nAttendees:",
+    ]
     atts = e.get("attendees", [])
     if not atts:
-        print("  - (no attendees)")
+        lines.append("  - (no attendees)")
     else:
         for a in atts:
-            print(f"  - {a.get('username','')} at {a.get('timestamp','')}")
-    print("\nReviews:")
+            lines.append(f"  - {a.get('username','')} at {a.get('timestamp','')}")
+    lines.append("\nReviews:")
     revs = e.get("reviews", [])
     if not revs:
-        print("  - (no reviews)")
+        lines.append("  - (no reviews)")
     else:
         for r in revs:
-            print(
+            lines.append(
                 f"  - {r.get('username','')} | {r.get('rating','-')} | {r.get('comment','')} | {r.get('timestamp','')}"
             )
+    print("\n".join(lines))
     input("\n" + t.get("detail_back", "Press Enter to go back..."))
 
 
 # --------------------------
 # Statistics
 # --------------------------
-def stats(events: List[Dict[str, Any]]) -> Dict[str, Any]:
-    by_category = collections.Counter()
-    by_month = collections.Counter()
-    by_city = collections.Counter()
-    for e in events:
-        cat = e.get("category", "LAINNYA")
-        by_category[cat] += 1
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-            ym = dt.strftime("%Y-%m")
-            by_month[ym] += 1
-        except Exception:
-            pass
-        loc = e.get("location", "Unknown")
-        by_city[loc] += 1
-    return {
-        "by_category": dict(by_category),
-        "by_month": dict(by_month),
-        "by_city": dict(by_city),
-    }
+def stats(events: List[Event]) -> Dict[str, Any]:
+    require_events(events)
+    if isinstance(events, EventStore):
+        # maintained incrementally by the store: cost is the number of buckets
+        events.ensure_stats()
+        return events.snapshot().stats()
+    return StatsEngine(events).snapshot()
 
 
-def show_stats(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def show_stats(events: List[Event], t: Dict[str, Any]):
     s = stats(events)
+    by_count = lambda x: (-x[1], str(x[0]))
+    by_key = lambda x: x[0]
+    sections = [
+        ("stats_by_category", "by_category", by_count),
+        ("stats_by_month", "by_month", by_key),
+        ("stats_by_city", "by_city", by_count),
+        ("stats_by_status", "by_status", by_count),
+        ("stats_by_organizer", "by_organizer", by_count),
+        ("stats_attendance_by_month", "attendance_by_month", by_key),
+        ("stats_rating_distribution", "rating_distribution", by_key),
+    ]
     print("\n" + color_text(t["stats_title"], Colors.BOLD))
     print("-" * 30)
-    print(color_text(t["stats_by_category"], Colors.CYAN))
-    for k, v in sorted(s["by_category"].items(), key=lambda x: (-x[1], x[0])):
-        print(f"  {k}: {v}")
-    print("\n" + color_text(t["stats_by_month"], Colors.CYAN))
-    for k, v in sorted(s["by_month"].items(), key=lambda x: x[0]):
-        print(f"  {k}: {v}")
-    print("\n" + color_text(t["stats_by_city"], Colors.CYAN))
-    for k, v in sorted(s["by_city"].items(), key=lambda x: (-x[1], x[0])):
-        print(f"  {k}: {v}")
+    for i, (title_key, dim, order) in enumerate(sections):
+        print(("\n" if i else "") + color_text(t[title_key], Colors.CYAN))
+        for k, v in sorted(s[dim].items(), key=order):
+            print(f"  {k}: {v}")
     input("\n" + t["press_enter"])
 
 
@@ -641,24 +775,28 @@ def new_event_object(
     htm: str,
     category: str,
     status: str = "scheduled",
-) -> Dict[str, Any]:
-    return {
-        "id": int(datetime.now().timestamp() * 1000),
-        "name": name,
-        "datetime": dt.isoformat(),
-        "location": location,
-        "address": address,
-        "organizer": organizer,
-        "description": description,
-        "htm": htm,
-        "category": category,
-        "status": status,
-        "attendees": [],  # list of {"username","timestamp"}
-        "reviews": [],  # list of {"username","rating","comment","timestamp"}
-    }
+) -> Event:
+    return Event(
+        {
+            "id": new_event_id(),
+            "name": name,
+            "datetime": dt.isoformat(),
+            "location": location,
+            "address": address,
+            "organizer": organizer,
+            "description": description,
+            "htm": htm,
+            "category": category,
+            "status": status,
+            "attendees": [],  # list of Attendee
+            "reviews": [],  # list of Review
+        }
+    )
 
 
-def select_event_for_detail(events: List[Dict[str, Any]], t: Dict[str, Any]):
+def select_event_for_detail(
+    events: List[Event], t: Dict[str, Any], presorted: bool = False
+):
     """Reusable helper: show table and allow selecting event by its table row number.
 
     IMPORTANT:
@@ -666,6 +804,8 @@ def select_event_for_detail(events: List[Dict[str, Any]], t: Dict[str, Any]):
       order here to make table row numbers match selection.
     - This function prints the sorted table, accepts a row number (1..n) and opens
       the detail view for the event shown on that row (no second selection).
+    - presorted=True skips the sort and shows `events` in the given order
+      (ranked keyword search results).
     """
     if not events:
         print(color_text(t["no_events"], Colors.YELLOW))
@@ -673,15 +813,24 @@ def select_event_for_detail(events: List[Dict[str, Any]], t: Dict[str, Any]):
         return
 
     # Sort events the same way print_table does so indices match what's displayed.
-    sorted_events = sorted(events, key=lambda x: x["datetime"])
+    # presorted=True keeps the given order (e.g. ranked keyword results).
+    if isinstance(events, EventStore):
+        sorted_events = events.snapshot().view()
+    elif presorted or isinstance(events, RangeView):
+        sorted_events = events  # pages are sliced from it as they are shown
+    else:
+        sorted_events = in_display_order(events)
 
+    page = 0
     while True:
         clear_screen()
-        print_table(sorted_events, t)
-
-        user_input = input(
-            f"\n{t.get('enter_event_id_to_view','Masukkan nomor event untuk melihat detail')} (0=Quit): "
-        ).strip()
+        # the page shown last, so coming back from a detail keeps the place
+        user_input, page = browse_table(
+            sorted_events,
+            t,
+            f"\n{t.get('enter_event_id_to_view','Masukkan nomor event untuk melihat detail')} (0=Quit): ",
+            page,
+        )
 
         if user_input in ("0", ""):
             break
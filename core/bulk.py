@@ -0,0 +1,391 @@
+"""Non-interactive bulk import / export of events as CSV or JSON Lines.
+
+Both directions stream. The importer reads one row at a time and checks it
+against the store's own id and date indexes. Memory is therefore the event
+store itself (which holds every event in all storage modes) plus the batch
+not yet committed: `--batch-size` events in sqlite mode, up to half the
+store in the others (see import_events). The exporter writes each event as
+soon as it is reached.
+
+Run from the repository root:
+    python -m core.bulk import calendar.csv --batch-size 500
+    python -m core.bulk export june.jsonl --from 2025-06-01 --to 2025-06-30
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from utils.models import Event, Attendee, Review, append_attendee, append_review
+from utils.models import to_jsonable
+from utils.parser import parse_datetime, parse_date, format_event_dt
+from utils.storage import (
+    configure_storage,
+    flush,
+    load_events,
+    load_settings,
+    log_changes,
+    require_events,
+    rewrites_all_events,
+)
+from utils.event_store import EventStore, find_event, in_display_order
+from core.actions import new_event_object, filter_by_date_range, filter_by_location
+
+FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 20
+STATUSES = ("scheduled", "finished", "postponed", "cancelled")
+
+# CSV columns, in order. Import reads the first ten; the aggregates are
+# exported for spreadsheets and recomputed on import.
+CSV_FIELDS = (
+    "id",
+    "name",
+    "datetime",
+    "location",
+    "address",
+    "organizer",
+    "description",
+    "htm",
+    "category",
+    "status",
+    "attendee_count",
+    "review_count",
+    "avg_rating",
+)
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """`fmt` if given, else "jsonl" for .jsonl/.ndjson files and "csv" otherwise."""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson") else "csv"
+
+
+# --------------------------
+# Import
+# --------------------------
+def read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """(line number, row) pairs read lazily from `path`. A JSONL line that is
+    not a JSON object comes back as None."""
+    if fmt == "csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for n, row in enumerate(csv.DictReader(f), start=2):
+                yield n, row
+        return
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield n, row if isinstance(row, dict) else None
+
+
+def _text(row: Dict[str, Any], key: str) -> str:
+    v = row.get(key)
+    return "" if v is None else str(v).strip()
+
+
+def _row_datetime(raw: str) -> Optional[datetime]:
+    # the formats the add-event form accepts, then the ISO form the JSONL
+    # exporter writes
+    dt = parse_datetime(raw)
+    if dt is None:
+        try:
+            dt = datetime.fromisoformat(raw)
+        except ValueError:
+            return None
+    return dt
+
+
+def _row_id(row: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(row.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _nested_error(row: Dict[str, Any]) -> Optional[str]:
+    """Why the attendee / review lists of a JSONL row can't be loaded, if
+    they can't: each entry needs a username, each review a rating of 1-5."""
+    for key in ("attendees", "reviews"):
+        entries = row.get(key)
+        if entries is None:
+            continue
+        if not isinstance(entries, list):
+            return f"{key} is not a list"
+        for n, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict) or not isinstance(
+                entry.get("username"), str
+            ):
+                return f"{key} entry {n} has no username"
+            rating = entry.get("rating")
+            if key == "reviews" and (type(rating) is not int or not 1 <= rating <= 5):
+                return f"reviews entry {n} has an invalid rating {rating!r}"
+    return None
+
+
+def row_to_event(row: Dict[str, Any]) -> Tuple[Optional[Event], Optional[str]]:
+    """Validate one input row the way add_event_interactive does and build the
+    event with new_event_object. Returns (event, None) or (None, reason)."""
+    name = _text(row, "name")
+    if not name:
+        return None, "name is empty"
+    dt = _row_datetime(_text(row, "datetime"))
+    if dt is None:
+        return None, f"invalid datetime {_text(row, 'datetime')!r}"
+    status = _text(row, "status").lower() or "scheduled"
+    if status not in STATUSES:
+        return None, f"invalid status {status!r}"
+    nested_error = _nested_error(row)
+    if nested_error is not None:
+        return None, nested_error
+    if status == "scheduled" and dt < datetime.now():
+        # what refresh_event_statuses does right after the add-event form
+        status = "finished"
+    ev = new_event_object(
+        name,
+        dt,
+        _text(row, "location"),
+        _text(row, "address"),
+        _text(row, "organizer"),
+        _text(row, "description"),
+        _text(row, "htm"),
+        _text(row, "category") or "LAINNYA",
+        status=status,
+    )
+    row_id = _row_id(row)
+    if row_id is not None:
+        ev["id"] = row_id
+    # JSONL rows may carry the lists (a previous export); keep the aggregates
+    # in step through the usual helpers
+    attendees, reviews = row.get("attendees"), row.get("reviews")
+    for a in attendees or []:
+        append_attendee(ev, Attendee.from_dict(a))
+    for r in reviews or []:
+        append_review(ev, Review.from_dict(r))
+    return ev, None
+
+
+def dedupe_key(e: Event) -> Tuple[str, str, str]:
+    """Two events are the same entry if name, start time and location match."""
+    return (
+        e.lc.get("name", ""),
+        str(e.get("datetime", "")),
+        e.lc.get("location", ""),
+    )
+
+
+def _stored_duplicate(events: List[Event], ev: Event, row_id: Optional[int]) -> bool:
+    """Whether a stored event has the row's id or `ev`'s dedupe_key: two
+    index probes for a store (a scan for a plain list)."""
+    if row_id is not None and find_event(events, row_id) is not None:
+        return True
+    key = dedupe_key(ev)
+    if isinstance(events, EventStore):
+        candidates = events.by_date.at(str(ev.get("datetime", "")))
+    else:
+        candidates = events
+    return any(dedupe_key(e) == key for e in candidates)
+
+
+def import_events(
+    events: List[Event],
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Stream `path` into `events`. Rows that fail validation are skipped and
+    reported, rows matching an existing event (same id, or same dedupe_key)
+    are counted as duplicates. New events are committed every `batch_size`
+    rows with a single save. Where a save rewrites every stored event (see
+    rewrites_all_events), a batch may also grow to half the store, so the
+    total written stays linear in the final size instead of quadratic.
+    Returns a report dict."""
+    fmt = detect_format(path, fmt)
+    require_events(events)  # dedupe against every stored event
+    # dedupe keys and ids of the batch, which the store's indexes lack yet
+    batch_keys: set = set()
+    batch_ids: set = set()
+    report: Dict[str, Any] = {
+        "rows": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "errors": [],
+    }
+    batch: List[Event] = []
+
+    def commit():
+        if not batch:
+            return
+        events.extend(batch)
+        log_changes(events, [("add_event", {"event": e}) for e in batch])
+        flush()
+        batch.clear()
+        batch_keys.clear()
+        batch_ids.clear()
+
+    start = time.perf_counter()
+    for line, row in read_rows(path, fmt):
+        report["rows"] += 1
+        ev, error = row_to_event(row) if row is not None else (None, "not an object")
+        if ev is None:
+            report["invalid"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(f"line {line}: {error}")
+            continue
+        key = dedupe_key(ev)
+        row_id = _row_id(row)
+        if (
+            key in batch_keys
+            or row_id is not None
+            and row_id in batch_ids
+            or _stored_duplicate(events, ev, row_id)
+        ):
+            report["duplicates"] += 1
+            continue
+        batch_keys.add(key)
+        batch_ids.add(ev["id"])
+        batch.append(ev)
+        report["imported"] += 1
+        limit = batch_size
+        if rewrites_all_events():
+            limit = max(batch_size, len(events) // 2)
+        if len(batch) >= limit:
+            commit()
+    commit()
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_sec"] = report["rows"] / max(report["seconds"], 1e-9)
+    return report
+
+
+# --------------------------
+# Export
+# --------------------------
+def _csv_row(e: Event) -> Dict[str, Any]:
+    row = {f: e.get(f, "") for f in CSV_FIELDS[:-1]}
+    row["datetime"] = format_event_dt(e)  # what parse_datetime reads back
+    avg = e.avg_rating
+    row["avg_rating"] = "" if avg is None else avg
+    return row
+
+
+def export_events(
+    events: Iterable[Event], path: str, fmt: Optional[str] = None
+) -> Dict[str, Any]:
+    """Write `events` (any iterable, e.g. a filtered result) to `path` one row
+    at a time. JSONL keeps every field, CSV the CSV_FIELDS columns."""
+    fmt = detect_format(path, fmt)
+    rows = 0
+    start = time.perf_counter()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for e in events:
+                writer.writerow(_csv_row(e))
+                rows += 1
+        else:
+            for e in events:
+                f.write(json.dumps(e, ensure_ascii=False, default=to_jsonable))
+                f.write("\n")
+                rows += 1
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / max(seconds, 1e-9),
+    }
+
+
+def select_events(
+    events: List[Event],
+    start=None,
+    end=None,
+    location: str = "",
+    category: str = "",
+    status: str = "",
+) -> Iterator[Event]:
+    """The events matching every given filter, in display order."""
+    if start or end:
+        start = start or date.min
+        end = end or date.max - timedelta(days=1)
+        require_events(events, start, end)
+        selected = filter_by_date_range(events, start, end)
+    else:
+        require_events(events)
+        selected = events
+    if location:
+        selected = filter_by_location(selected, location)
+    category, status = category.strip().lower(), status.strip().lower()
+    for e in in_display_order(selected):
+        if category and e.lc.get("category", "") != category:
+            continue
+        if status and e.get("status") != status:
+            continue
+        yield e
+
+
+# --------------------------
+# Command line
+# --------------------------
+def _date_arg(s: str):
+    d = parse_date(s)
+    if d is None:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {s!r}")
+    return d
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.bulk",
+        description="Bulk import / export of events (CSV or JSON Lines).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="add the events of a CSV/JSONL file")
+    imp.add_argument("file")
+    imp.add_argument("--format", choices=FORMATS, help="default: from extension")
+    imp.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    exp = sub.add_parser("export", help="write (filtered) events to a file")
+    exp.add_argument("file")
+    exp.add_argument("--format", choices=FORMATS, help="default: from extension")
+    exp.add_argument("--from", dest="start", type=_date_arg, help="YYYY-MM-DD")
+    exp.add_argument("--to", dest="end", type=_date_arg, help="YYYY-MM-DD")
+    exp.add_argument("--location", default="", help="location/address contains")
+    exp.add_argument("--category", default="")
+    exp.add_argument("--status", default="", choices=("",) + STATUSES)
+    args = parser.parse_args(argv)
+
+    if args.command == "import" and not os.path.isfile(args.file):
+        parser.error(f"{args.file}: no such file")
+    configure_storage(load_settings())
+    events = load_events()
+    if args.command == "import":
+        report = import_events(events, args.file, args.format, max(1, args.batch_size))
+        print(
+            f"{report['rows']} rows: {report['imported']} imported, "
+            f"{report['duplicates']} duplicates, {report['invalid']} invalid"
+        )
+        for error in report["errors"]:
+            print(f"  {error}")
+        if report["invalid"] > len(report["errors"]):
+            print(f"  ... {report['invalid'] - len(report['errors'])} more")
+    else:
+        selected = select_events(
+            events, args.start, args.end, args.location, args.category, args.status
+        )
+        report = export_events(selected, args.file, args.format)
+        print(f"{report['rows']} events -> {args.file}")
+    print(f"{report['seconds']:.2f}s ({report['rows_per_sec']:.0f} rows/s)")
+    flush()
+
+
+if __name__ == "__main__":
+    main()
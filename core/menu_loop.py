@@ -12,12 +12,14 @@ from localizations.translations import TRANSLATIONS
 
 
 def visitor_loop(
-    events: List[Dict[str, Any]],
+    events: List[Event],
     settings: Dict[str, Any],
     t: Dict[str, Any],
     current_user: Dict[str, Any],
 ):
     while True:
+        # pick up changes made by other running instances
+        sync_events(events)
         clear_screen()
         print(color_text(t["menu_visitor_title"], Colors.BOLD + Colors.CYAN))
         print(color_text("0. Keluar / Kembali", Colors.YELLOW))
@@ -120,12 +122,14 @@ def visitor_loop(
 
 
 def organizer_loop(
-    events: List[Dict[str, Any]],
+    events: List[Event],
     settings: Dict[str, Any],
     t: Dict[str, Any],
     current_user: Dict[str, Any],
 ):
     while True:
+        # pick up changes made by other running instances
+        sync_events(events)
         clear_screen()
         print(color_text(t["menu_organizer_title"], Colors.BOLD + Colors.CYAN))
         print(color_text("0. Keluar / Kembali", Colors.YELLOW))
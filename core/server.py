@@ -0,0 +1,543 @@
+"""Local HTTP/JSON service for the event calendar (asyncio, no dependencies).
+
+Run from the repository root:
+    python -m core.server --port 8080
+
+Endpoints (dates are YYYY-MM-DD):
+    GET  /events                      upcoming events (?past=1: all)
+    GET  /events/day?date=D
+    GET  /events/week?date=D          week (Mon-Sun) containing D
+    GET  /events/month?date=D
+    GET  /events/range?from=D&to=D
+    GET  /events/location?q=TEXT      location or address contains TEXT
+    GET  /events/search?name=..&category=..   keyword per column, ranked
+    GET  /events/<id>                 detail with attendees and reviews
+    GET  /stats
+    POST /sessions                    {"username": ..., "password": ...}
+                                      -> {"token": ...}
+    DELETE /sessions                  log the token out
+    POST /events/<id>/attend
+    POST /events/<id>/reviews         {"rating": 1-5, "comment": ...}
+
+The two event writes act for the user of the session token sent as
+"Authorization: Bearer <token>" (see utils.auth); checking it is one HMAC,
+the password KDF only runs in POST /sessions.
+
+Event ids are sent as strings: they use up to 63 bits (utils.ids), and a
+JSON number past 2**53 loses its last digits in JavaScript clients.
+
+Lists are paged with ?offset= and ?limit= (default 50, at most 500) and
+report the total in "count". Every connection is kept alive (HTTP/1.1) and
+may pipeline requests; they are answered in order. All requests share the
+one EventStore and its indexes. The service reads the same data/ directory
+as main.py and picks up other processes' commits once a second.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import traceback
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from utils import kdf
+from utils.auth import (
+    SESSION_TTL,
+    create_session,
+    resume_session,
+    revoke_session,
+    submit_kdf,
+)
+from utils.models import Event, to_jsonable
+from utils.parser import parse_date
+from utils.storage import (
+    configure_storage,
+    find_user,
+    flush,
+    load_events,
+    load_settings,
+    require_events,
+    set_flush_scheduler,
+    set_user_password,
+    sync_events,
+)
+from utils.status_updater import refresh_event_statuses
+from utils.event_store import EventStore, find_event
+from core.actions import (
+    events_on_day,
+    filter_by_date_range,
+    filter_by_location,
+    filter_by_period,
+    filter_week_full,
+    first_of_next_month,
+    keyword_search,
+    record_attendance,
+    record_review,
+    review_error,
+    stats,
+)
+
+KEEPALIVE_TIMEOUT = 15.0  # seconds an idle connection stays open
+MAX_BODY = 64 * 1024
+SYNC_INTERVAL = 1.0  # seconds between checks for other processes' commits
+RESPONSE_CACHE_SIZE = 1024
+PAGE_SIZE = 50  # events per list response unless ?limit= says otherwise
+MAX_PAGE_SIZE = 500
+# the last date a query may name: every window around it (the rest of its
+# week or month, the day after a range) still ends within date.max
+LAST_QUERY_DATE = date(date.max.year, 11, 30)
+# ASCII digits only (str.isdigit also accepts "²" and other Unicode digits,
+# which int() rejects); at most 20, enough for any 64-bit event id
+EVENT_ID = re.compile(r"-?[0-9]{1,20}")
+NUMBER = re.compile(r"[0-9]{1,18}")
+
+# columns /events/search accepts, as in the filter menu
+SEARCH_COLUMNS = (
+    "name",
+    "location",
+    "address",
+    "organizer",
+    "category",
+    "status",
+    "htm",
+)
+SUMMARY_FIELDS = (
+    "id",
+    "name",
+    "datetime",
+    "location",
+    "address",
+    "organizer",
+    "category",
+    "status",
+    "htm",
+    "attendee_count",
+    "review_count",
+)
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _internal_error() -> Tuple[int, Dict[str, str]]:
+    """A 500 for a bug in a handler: logged, and the client still gets an
+    answer (and keeps its connection)."""
+    traceback.print_exc(file=sys.stderr)
+    return 500, {"error": "internal error"}
+
+
+def summary(e: Event) -> Dict[str, Any]:
+    """The list view of an event (no attendee / review lists)."""
+    d = {f: e.get(f) for f in SUMMARY_FIELDS}
+    d["id"] = str(d["id"])  # see the module docstring
+    d["avg_rating"] = e.avg_rating
+    return d
+
+
+def detail(e: Event) -> Dict[str, Any]:
+    e.load_details()
+    d = summary(e)
+    d["description"] = e.get("description", "")
+    d["attendees"] = e.get("attendees", [])
+    d["reviews"] = e.get("reviews", [])
+    return d
+
+
+def _date_param(query: Dict[str, List[str]], name: str) -> date:
+    d = parse_date(query.get(name, [""])[0])
+    if d is None:
+        raise HTTPError(400, f"'{name}' must be a date (YYYY-MM-DD)")
+    if d > LAST_QUERY_DATE:
+        raise HTTPError(400, f"'{name}' is out of range (last is {LAST_QUERY_DATE})")
+    return d
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int) -> int:
+    raw = query.get(name, [""])[0]
+    if not raw:
+        return default
+    if not NUMBER.fullmatch(raw):
+        raise HTTPError(400, f"'{name}' must be a non-negative integer")
+    return int(raw)
+
+
+def _event_list(events: List[Event], query: Dict[str, List[str]]) -> Dict[str, Any]:
+    """One page (?offset=&limit=) of `events` plus the total count."""
+    offset = _int_param(query, "offset", 0)
+    limit = min(_int_param(query, "limit", PAGE_SIZE), MAX_PAGE_SIZE)
+    page = events[offset : offset + limit]
+    return {
+        "count": len(events),
+        "offset": offset,
+        "limit": limit,
+        "events": [summary(e) for e in page],
+    }
+
+
+class EventService:
+    """Request handling on top of one shared EventStore. Everything runs on
+    the event loop thread, including the storage group commit, so handlers
+    never race with each other or with a flush."""
+
+    def __init__(self, events: EventStore):
+        self.events = events
+        # GET target -> encoded response body; dropped whenever the store
+        # changes (a write here, another process' commit, a status update)
+        self._responses: Dict[str, bytes] = {}
+        self._today = date.today()
+
+    def invalidate(self):
+        self._responses.clear()
+
+    def maintain(self):
+        """Pull in other processes' commits and due status changes."""
+        changed = sync_events(self.events)
+        changed = refresh_event_statuses(self.events) or changed
+        if changed or date.today() != self._today:
+            self._today = date.today()
+            self.invalidate()
+
+    # ---- dispatch ----
+    def handle(
+        self, method: str, target: str, body: bytes, authorization: str = ""
+    ) -> Tuple[int, bytes]:
+        if method == "GET":
+            cached = self._responses.get(target)
+            if cached is not None:
+                return 200, cached
+        try:
+            status, payload = self._route(method, target, body, authorization)
+        except HTTPError as exc:
+            status, payload = exc.status, {"error": exc.message}
+        except Exception:
+            status, payload = _internal_error()
+        data = json.dumps(payload, ensure_ascii=False, default=to_jsonable).encode()
+        if method == "GET" and status == 200:
+            if len(self._responses) >= RESPONSE_CACHE_SIZE:
+                self._responses.clear()
+            self._responses[target] = data
+        return status, data
+
+    def _route(
+        self, method: str, target: str, body: bytes, authorization: str
+    ) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["sessions"]:
+            if method != "DELETE":  # POST /sessions goes through login()
+                raise HTTPError(405, "use POST or DELETE")
+            if not revoke_session(self._bearer(authorization)):
+                raise HTTPError(401, "invalid session token")
+            return 200, {"revoked": True}
+        if parts == ["stats"]:
+            self._only(method, "GET")
+            return 200, stats(self.events)
+        if not parts or parts[0] != "events":
+            raise HTTPError(404, "not found")
+        if len(parts) == 1:
+            self._only(method, "GET")
+            return 200, self._upcoming(query)
+        if len(parts) == 2 and not EVENT_ID.fullmatch(parts[1]):
+            self._only(method, "GET")
+            return 200, self._filter(parts[1], query)
+        if not EVENT_ID.fullmatch(parts[1]):
+            raise HTTPError(404, "not found")
+        e = self._event(parts[1])
+        if len(parts) == 2:
+            self._only(method, "GET")
+            return 200, detail(e)
+        if parts[2:] == ["attend"]:
+            self._only(method, "POST")
+            return self._attend(e, self._session_user(authorization))
+        if parts[2:] == ["reviews"]:
+            self._only(method, "POST")
+            username = self._session_user(authorization)
+            return self._review(e, username, self._json(body))
+        raise HTTPError(404, "not found")
+
+    @staticmethod
+    def _only(method: str, allowed: str):
+        if method != allowed:
+            raise HTTPError(405, f"use {allowed}")
+
+    @staticmethod
+    def _json(body: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return data
+
+    def _event(self, raw_id: str) -> Event:
+        e = find_event(self.events, int(raw_id))
+        if e is None:
+            require_events(self.events)  # may sit in an old month shard
+            e = find_event(self.events, int(raw_id))
+        if e is None:
+            raise HTTPError(404, "no such event")
+        return e
+
+    # ---- queries ----
+    def _upcoming(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        if query.get("past", ["0"])[0] not in ("", "0"):
+            require_events(self.events)
+            return _event_list(self.events.snapshot().view(None), query)
+        return _event_list(self.events.snapshot().view(date.today()), query)
+
+    def _filter(self, name: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        events = self.events
+        if name == "day":
+            d = _date_param(query, "date")
+            require_events(events, d, d + timedelta(days=1))
+            return _event_list(events_on_day(events, d), query)
+        if name == "week":
+            d = _date_param(query, "date")
+            monday = d - timedelta(days=d.weekday())
+            require_events(events, monday, monday + timedelta(days=7))
+            found, start, end = filter_week_full(events, d)
+            res = _event_list(found, query)
+            res.update(start=start.isoformat(), end=end.isoformat())
+            return res
+        if name == "month":
+            d = _date_param(query, "date")
+            first = d.replace(day=1)
+            require_events(events, first, first_of_next_month(first))
+            return _event_list(filter_by_period(events, "month", d), query)
+        if name == "range":
+            start, end = _date_param(query, "from"), _date_param(query, "to")
+            if end < start:
+                raise HTTPError(400, "'to' is before 'from'")
+            require_events(events, start, end + timedelta(days=1))
+            return _event_list(filter_by_date_range(events, start, end), query)
+        if name == "location":
+            text = query.get("q", [""])[0].strip()
+            if not text:
+                raise HTTPError(400, "'q' is required")
+            require_events(events)
+            return _event_list(filter_by_location(events, text), query)
+        if name == "search":
+            keywords = [
+                (col, query[col][0].strip().lower())
+                for col in SEARCH_COLUMNS
+                if query.get(col, [""])[0].strip()
+            ]
+            if not keywords:
+                columns = ", ".join(SEARCH_COLUMNS)
+                raise HTTPError(400, f"give at least one of {columns}")
+            require_events(events)
+            return _event_list(keyword_search(events, keywords), query)
+        raise HTTPError(404, "not found")
+
+    # ---- sessions ----
+    async def login(self, body: bytes) -> Tuple[int, bytes]:
+        """POST /sessions: check the password (in the KDF pool, awaited so
+        other requests go on meanwhile) and issue a session token."""
+        try:
+            data = self._json(body)
+            username = str(data.get("username") or "").strip()
+            password = str(data.get("password") or "")
+            if not username:
+                raise HTTPError(400, "'username' is required")
+            u = find_user(username)
+            if u is None or not await asyncio.wrap_future(
+                submit_kdf(kdf.verify_password, u["password"], password)
+            ):
+                raise HTTPError(401, "wrong username or password")
+            if kdf.needs_rehash(u["password"]):  # as auth.authenticate does
+                rehashed = await asyncio.wrap_future(
+                    submit_kdf(kdf.hash_password, password)
+                )
+                if set_user_password(u["username"], rehashed):
+                    u["password"] = rehashed
+            status = 201
+            payload = {
+                "token": create_session(u),
+                "username": u["username"],
+                "role": u.get("role"),
+                "expires_in": SESSION_TTL,
+            }
+        except HTTPError as exc:
+            status, payload = exc.status, {"error": exc.message}
+        except Exception:
+            status, payload = _internal_error()
+        return status, json.dumps(payload, ensure_ascii=False).encode()
+
+    @staticmethod
+    def _bearer(authorization: str) -> str:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            raise HTTPError(401, "send 'Authorization: Bearer <token>'")
+        return token.strip()
+
+    def _session_user(self, authorization: str) -> str:
+        """Username of the request's session; 401 unless it is valid."""
+        user = resume_session(self._bearer(authorization))
+        if user is None:
+            raise HTTPError(401, "session expired or revoked")
+        return user["username"]
+
+    # ---- writes ----
+    def _attend(self, e: Event, username: str) -> Tuple[int, Any]:
+        if e.dt is not None and e.dt.date() < date.today():
+            raise HTTPError(409, "event is in the past")
+        attendee = record_attendance(self.events, e, username)
+        if attendee is None:
+            raise HTTPError(409, "already_attending")
+        self.invalidate()
+        e = find_event(self.events, e.get("id"))  # the updated record
+        return 201, {"event": summary(e), "attendee": attendee}
+
+    def _review(self, e: Event, username: str, data: Dict[str, Any]) -> Tuple[int, Any]:
+        rating = data.get("rating")
+        if type(rating) is not int or not 1 <= rating <= 5:
+            raise HTTPError(400, "'rating' must be an integer from 1 to 5")
+        error = review_error(self.events, e, username)
+        if error is not None:
+            raise HTTPError(409, error)
+        comment = str(data.get("comment") or "").strip()
+        review = record_review(self.events, e, username, rating, comment)
+        self.invalidate()
+        e = find_event(self.events, e.get("id"))
+        return 201, {"event": summary(e), "review": review}
+
+
+# --------------------------
+# HTTP/1.1 over asyncio streams
+# --------------------------
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """(method, target, version, headers, body) of the next request, or None
+    when the client closed the connection or stayed idle too long."""
+    try:
+        line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+        while line in (b"\r\n", b"\n"):
+            line = await reader.readline()
+    except asyncio.TimeoutError:
+        return None
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise HTTPError(400, "malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = h.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, "body too large")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return parts[0].upper(), parts[1], parts[2].upper(), headers, body
+
+
+async def serve_connection(
+    service: EventService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except HTTPError as exc:
+                body = json.dumps({"error": exc.message}).encode()
+                writer.write(_response(exc.status, body, False))
+                break
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            connection = headers.get("connection", "").lower()
+            if version == "HTTP/1.0":
+                keep_alive = connection == "keep-alive"
+            else:
+                keep_alive = connection != "close"
+            if method == "POST" and urlsplit(target).path.strip("/") == "sessions":
+                status, data = await service.login(body)
+            else:
+                authorization = headers.get("authorization", "")
+                status, data = service.handle(method, target, body, authorization)
+            writer.write(_response(status, data, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass  # client went away, or a line over the stream limit
+    finally:
+        writer.close()
+
+
+async def _maintenance(service: EventService):
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL)
+        service.maintain()
+
+
+async def serve(host: str, port: int):
+    loop = asyncio.get_running_loop()
+    configure_storage(load_settings())
+    set_flush_scheduler(loop.call_later)
+    events = load_events()
+    refresh_event_statuses(events)
+    service = EventService(events)
+    server = await asyncio.start_server(
+        lambda r, w: serve_connection(service, r, w), host, port
+    )
+    maintenance = asyncio.ensure_future(_maintenance(service))
+    addr = server.sockets[0].getsockname()
+    print(f"serving {len(events)} events on http://{addr[0]}:{addr[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        maintenance.cancel()
+        set_flush_scheduler(None)
+        flush()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.server", description="Event calendar HTTP/JSON service."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
     "id": {
         "menu_title": "Manajemen Event & Tradisi Jatim",
         "prompt_register_or_login": "1=Register, 2=Login, 0=Keluar: ",
+        "prompt_session_menu": "1=Register, 2=Login, 3=Lanjutkan, 4=Logout, 0=Keluar: ",
+        "menu_resume": "Lanjutkan sebagai {username}",
         "prompt_username": "Username: ",
         "prompt_password": "Password: ",
         "prompt_role_register": "Role (visitor/organizer): ",
@@ -64,6 +66,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "prompt_range_start": "Mulai dari (YYYY-MM-DD): ",
         "prompt_range_end": "Sampai (YYYY-MM-DD): ",
         "prompt_select_index": "Masukkan nomor acara (index, 0 = batal): ",
+        "table_page": "Halaman {page}/{pages} ({total} event)",
+        "table_nav_hint": "n=berikutnya, p=sebelumnya, g<no>=ke halaman",
         "prompt_confirm_delete": "Ketik 'YA' untuk mengonfirmasi penghapusan: ",
         "prompt_attend_confirm": "Anda akan terdaftar hadir menggunakan username: ",
         "attend_confirmed": "Anda telah terdaftar hadir pada acara ini.",
@@ -85,6 +89,10 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "stats_by_category": "Jumlah per kategori:",
         "stats_by_month": "Jumlah per bulan (YYYY-MM):",
         "stats_by_city": "Jumlah per lokasi/kota:",
+        "stats_by_status": "Jumlah per status:",
+        "stats_by_organizer": "Jumlah per penyelenggara:",
+        "stats_attendance_by_month": "Jumlah kehadiran per bulan (YYYY-MM):",
+        "stats_rating_distribution": "Sebaran rating (1-5):",
         "header_table_cols": [
             "#",
             "Name",
@@ -108,6 +116,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
     "en": {
         "menu_title": "East Java Events & Traditions Manager",
         "prompt_register_or_login": "1=Register, 2=Login, 0=Quit: ",
+        "prompt_session_menu": "1=Register, 2=Login, 3=Continue, 4=Logout, 0=Quit: ",
+        "menu_resume": "Continue as {username}",
         "prompt_username": "Username: ",
         "prompt_password": "Password: ",
         "prompt_role_register": "Role (visitor/organizer): ",
@@ -168,6 +178,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "prompt_range_start": "Start date (YYYY-MM-DD): ",
         "prompt_range_end": "End date (YYYY-MM-DD): ",
         "prompt_select_index": "Enter event number (index, 0 = cancel): ",
+        "table_page": "Page {page}/{pages} ({total} events)",
+        "table_nav_hint": "n=next, p=previous, g<no>=go to page",
         "prompt_confirm_delete": "Type 'YES' to confirm deletion: ",
         "prompt_attend_confirm": "You will be marked as attending using username: ",
         "attend_confirmed": "You have been marked as attending this event.",
@@ -189,6 +201,10 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "stats_by_category": "Counts by category:",
         "stats_by_month": "Counts by month (YYYY-MM):",
         "stats_by_city": "Counts by location/city:",
+        "stats_by_status": "Counts by status:",
+        "stats_by_organizer": "Counts by organizer:",
+        "stats_attendance_by_month": "Attendance by month (YYYY-MM):",
+        "stats_rating_distribution": "Rating distribution (1-5):",
         "header_table_cols": [
             "#",
             "Name",
@@ -213,6 +229,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         # Minimal Javanese translations for key phrases
         "menu_title": "Manajemen Acara & Tradisi Jatim",
         "prompt_register_or_login": "1=Register, 2=Login, 0=Metu: ",
+        "prompt_session_menu": "1=Register, 2=Login, 3=Lanjut, 4=Logout, 0=Metu: ",
+        "menu_resume": "Lanjut dadi {username}",
         "prompt_username": "Username: ",
         "prompt_password": "Password: ",
         "prompt_role_register": "Role (visitor/organizer): ",
@@ -268,6 +286,8 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "list_header": "Daftar acara:",
         "event_format": "{idx}. {name} | {dt} | {loc} | {addr} | {org} | Kategori: {cat} | Status: {status} | HTM: {htm}\n   {desc}",
         "prompt_select_index": "Lebokno nomer acara (index, 0 = batal): ",
+        "table_page": "Kaca {page}/{pages} ({total} acara)",
+        "table_nav_hint": "n=sabanjure, p=sadurunge, g<no>=menyang kaca",
         "prompt_confirm_delete": "Tulis 'YA' gawe konfirmasi mbusek: ",
         "prompt_attend_confirm": "Sampeyan bakal kedaftar nganggo username: ",
         "attend_confirmed": "Sampeyan wis kedaftar teka ndek acara iki.",
@@ -289,6 +309,10 @@ TRANSLATIONS: Dict[str, Dict[str, Any]] = {
         "stats_by_category": "Jumlah menurut kategori:",
         "stats_by_month": "Jumlah menurut wulan (YYYY-MM):",
         "stats_by_city": "Jumlah menurut lokasi/kutha:",
+        "stats_by_status": "Jumlah menurut status:",
+        "stats_by_organizer": "Jumlah menurut penyelenggara:",
+        "stats_attendance_by_month": "Jumlah sing teka menurut wulan (YYYY-MM):",
+        "stats_rating_distribution": "Sebaran rating (1-5):",
         "header_table_cols": [
             "#",
             "Name",
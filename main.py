@@ -3,49 +3,83 @@ import sys
 from localizations.translations import TRANSLATIONS
 from utils.colors import Colors, color_text
 from utils.clear import clear_screen
+from utils import screen
 from utils.storage import *
 from core.actions import *
-from utils.status_updater import auto_update_event_statuses
+from utils.status_updater import refresh_event_statuses
 from utils.auth import register_user, login_user
+from utils.auth import create_session, resume_session, revoke_session
 from core.menu_loop import visitor_loop, organizer_loop
 
 
 def main_loop():
     settings = load_settings()
+    configure_storage(settings)
     events = load_events()
     # Auto-update statuses on load
-    if auto_update_event_statuses(events):
-        save_events(events)
+    refresh_event_statuses(events)
     users = load_users()
     lang = settings.get("lang", "id")
     t = TRANSLATIONS.get(lang, TRANSLATIONS["id"])
+    # the last login on this kiosk, resumable without the password until it
+    # expires or is logged out
+    token = load_kiosk_session()
     while True:
+        session_user = resume_session(token) if token else None
         clear_screen()
         print(color_text(t["menu_title"], Colors.BOLD + Colors.BLUE))
         print(color_text("1. Register", Colors.GREEN))
         print(color_text("2. Login", Colors.CYAN))
+        if session_user is not None:
+            resume_label = t.get("menu_resume", "Lanjutkan sebagai {username}")
+            print(
+                color_text(
+                    "3. " + resume_label.format(username=session_user["username"]),
+                    Colors.CYAN,
+                )
+            )
+            print(color_text("4. Logout", Colors.CYAN))
+            prompt = t.get(
+                "prompt_session_menu",
+                "1=Register, 2=Login, 3=Lanjutkan, 4=Logout, 0=Keluar: ",
+            )
+        else:
+            prompt = t["prompt_register_or_login"]
         print(color_text("0. Quit", Colors.YELLOW))
-        choice = input(t["prompt_register_or_login"]).strip()
+        choice = input(prompt).strip()
         if choice == "0":
+            flush()
             print("\n" + color_text(t.get("quit_msg", "Sampai jumpa!"), Colors.GREEN))
             break
         elif choice == "1":
             register_user(t)
             input("Press Enter to continue...")
             continue
-        elif choice == "2":
-            user = login_user(t)
-            if user is None:
-                input("Press Enter to continue...")
-                continue
+        elif choice == "4" and session_user is not None:
+            revoke_session(token)
+            token = None
+            save_kiosk_session(None)
+            continue
+        elif choice in ("2", "3"):
+            if choice == "3" and session_user is not None:
+                user = session_user
+            else:
+                user = login_user(t)
+                if user is None:
+                    input("Press Enter to continue...")
+                    continue
+                if token:
+                    revoke_session(token)  # one live session per kiosk
+                token = create_session(user)
+                save_kiosk_session(token)
             # refresh state
             settings = load_settings()
             lang = settings.get("lang", "id")
             t = TRANSLATIONS.get(lang, TRANSLATIONS["id"])
+            configure_storage(settings)
             events = load_events()
             # ensure statuses up to date
-            if auto_update_event_statuses(events):
-                save_events(events)
+            refresh_event_statuses(events)
             if user.get("role") == "visitor":
                 visitor_loop(events, settings, t, user)
             elif user.get("role") == "organizer":
@@ -62,9 +96,11 @@ if __name__ == "__main__":
     settings = load_settings()
     lang = settings.get("lang", "id")
     t = TRANSLATIONS.get(lang, TRANSLATIONS["id"])
+    screen.install()  # one write per screen (see utils/screen.py)
     try:
         main_loop()
     except KeyboardInterrupt:
+        flush()
         print("\n" + color_text(t.get("quit_msg", "Sampai jumpa!"), Colors.GREEN))
         try:
             sys.exit(0)
@@ -0,0 +1,36 @@
+"""Every test runs in its own empty data directory, with the storage module's
+per-process state (loaded store, users, session key, open database, ...)
+reset, since those caches are keyed by the relative data/ paths."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import sqlite_backend, storage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    fresh_state = {
+        "_storage_mode": "json",
+        "_known_version": 0,
+        "_journal_entries": 0,
+        "_shard_of": {},
+        "_load_cache": {},
+        "_loaded_store": None,
+        "_users": None,
+        "_session_key": None,
+        "_claimed_node": None,
+    }
+    for name, value in fresh_state.items():
+        monkeypatch.setattr(storage, name, value)
+    monkeypatch.setattr(sqlite_backend, "_conn", None)
+    yield tmp_path
+    storage.flush()
+    storage.wait_for_compaction()
+    if sqlite_backend._conn is not None:
+        sqlite_backend._conn.close()
@@ -0,0 +1,47 @@
+"""Building blocks shared by the tests."""
+import os
+import subprocess
+import sys
+import textwrap
+from datetime import datetime, timedelta
+
+from core.actions import new_event_object
+from utils import storage
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def open_store(mode: str, **settings):
+    """configure_storage() for `mode` (writes go out on flush()) and load."""
+    storage.configure_storage({"storage": mode, "write_window_ms": 0, **settings})
+    return storage.load_events()
+
+
+def add_event(events, name: str, days: int = 7, location: str = "Malang", **fields):
+    """Add and log an event `days` from now, as the add-event form does."""
+    when = datetime.now().replace(second=0, microsecond=0) + timedelta(days=days)
+    e = new_event_object(
+        name, when, location, "Jl. Ijen 1", "Panitia", "", "gratis", "SENI"
+    )
+    e.update(fields)
+    events.append(e)
+    storage.log_change(events, "add_event", {"event": e})
+    return e
+
+
+def run_other_process(mode: str, body: str):
+    """Run `body` in a separate interpreter on the same data directory, with
+    `events` loaded in `mode` and its writes flushed at the end: another
+    kiosk or the HTTP service committing in between."""
+    script = (
+        "from utils import storage\n"
+        "from utils.event_store import find_event, writable_event, remove_event\n"
+        "from core.actions import record_attendance\n"
+        f"storage.configure_storage({{'storage': {mode!r}}})\n"
+        "events = storage.load_events()\n"
+        "storage.require_events(events)\n"
+        + textwrap.dedent(body)
+        + "\nstorage.flush()\n"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO)
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
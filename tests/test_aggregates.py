@@ -0,0 +1,61 @@
+import pytest
+
+from core.actions import record_attendance, record_review
+from utils import storage
+from utils.event_store import find_event, writable_event
+from utils.models import Event
+
+from helpers import add_event, open_store
+
+
+def _aggregates(e):
+    return (e["attendee_count"], e["review_count"], e["rating_sum"], e["rating_hist"])
+
+
+def _finished(events, e):
+    e = writable_event(events, e)
+    e["status"] = "finished"
+    storage.log_change(events, "set_status", {"id": e["id"], "status": "finished"})
+    return e
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_rsvps_and_reviews_keep_the_counts(mode):
+    events = open_store(mode)
+    e = add_event(events, "Konser", days=-1)
+    assert _aggregates(e) == (0, 0, 0, [0, 0, 0, 0, 0])
+    assert e.avg_rating is None
+
+    for name in ("budi", "sari", "dewi"):
+        record_attendance(events, find_event(events, e["id"]), name)
+    e = _finished(events, find_event(events, e["id"]))
+    for name, rating in (("budi", 5), ("sari", 4), ("dewi", 4)):
+        record_review(events, find_event(events, e["id"]), name, rating, "")
+
+    e = find_event(events, e["id"])
+    assert _aggregates(e) == (3, 3, 13, [0, 0, 0, 2, 1])
+    assert e.avg_rating == 4.33
+    storage.flush()
+    reloaded = find_event(storage.load_events(fresh=True), e["id"])
+    assert _aggregates(reloaded) == _aggregates(e)
+
+
+def test_records_saved_before_the_aggregates_are_backfilled():
+    old = {
+        "id": 1,
+        "name": "Konser",
+        "datetime": "2024-05-01T19:00:00",
+        "status": "finished",
+        "attendees": [{"username": "budi"}, {"username": "sari"}],
+        "reviews": [
+            {"username": "budi", "rating": 5},
+            {"username": "sari", "rating": 2},
+        ],
+    }
+    e = Event.from_dict(old)
+    assert _aggregates(e) == (2, 2, 7, [0, 1, 0, 0, 1])
+    assert e.avg_rating == 3.5
+
+    storage.save_json(storage.DATA_FILE, [old])
+    loaded = find_event(open_store("json"), 1)
+    assert _aggregates(loaded) == _aggregates(e)
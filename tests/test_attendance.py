@@ -0,0 +1,60 @@
+from core.actions import record_attendance, record_review, review_error
+from utils import storage
+from utils.event_store import find_event, has_reviewed, is_attending, writable_event
+
+from helpers import add_event, open_store, run_other_process
+
+
+def _finished(events, e):
+    e = writable_event(events, e)
+    e["status"] = "finished"
+    storage.log_change(events, "set_status", {"id": e["id"], "status": "finished"})
+    return e
+
+
+def test_a_second_rsvp_is_refused_whatever_the_case():
+    events = open_store("json")
+    e = add_event(events, "Konser")
+    assert not is_attending(events, e, "budi")
+
+    assert record_attendance(events, e, "Budi") is not None
+    e = find_event(events, e["id"])
+    assert is_attending(events, e, "BUDI")
+    assert record_attendance(events, e, "budi") is None
+    assert [a["username"] for a in find_event(events, e["id"])["attendees"]] == ["Budi"]
+    assert not is_attending(events, e, "sari")
+
+
+def test_one_review_per_user():
+    events = open_store("json")
+    e = _finished(events, add_event(events, "Konser", days=-1))
+    assert review_error(events, e, "budi") is None
+
+    record_review(events, e, "Budi", 4, "seru")
+    e = find_event(events, e["id"])
+    assert has_reviewed(events, e, "budi")
+    assert review_error(events, e, "BUDI") == "already_reviewed"
+    assert review_error(events, e, "sari") is None
+
+
+def test_the_sets_agree_with_the_lists_after_a_reload():
+    events = open_store("journal")
+    e = add_event(events, "Konser")
+    record_attendance(events, e, "budi")
+    storage.flush()
+    run_other_process(
+        "journal",
+        f"""
+        record_attendance(events, find_event(events, {e['id']}), "Sari")
+        """,
+    )
+
+    events = storage.load_events()
+    e = find_event(events, e["id"])
+    assert events.attendees_of(e["id"]) == {"budi", "sari"}
+    assert record_attendance(events, e, "SARI") is None
+
+    fresh = storage.load_events(fresh=True)
+    for name in ("budi", "sari", "dewi"):
+        scanned = is_attending(list(fresh), find_event(fresh, e["id"]), name)
+        assert is_attending(fresh, find_event(fresh, e["id"]), name) == scanned
@@ -0,0 +1,108 @@
+import csv
+import json
+
+import pytest
+
+from core.bulk import CSV_FIELDS, export_events, import_events, select_events
+from utils import storage
+
+from helpers import add_event, open_store
+
+ROWS = [
+    ["name", "datetime", "location", "category", "status"],
+    ["Konser Jazz", "2099-03-01 19:00", "Malang", "musik", ""],
+    ["konser jazz", "2099-03-01 19:00", "MALANG", "musik", ""],  # same entry
+    ["Pameran Batik", "2099-03-02", "Batu", "", "postponed"],
+    ["", "2099-03-03 10:00", "Malang", "", ""],
+    ["Lomba Lari", "kemarin", "Malang", "", ""],
+    ["Seminar", "2099-03-04 09:00", "Surabaya", "", "selesai"],
+    ["Festival Kopi", "2099-03-05 08:00", "Malang", "", ""],
+]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def _summary(events):
+    storage.require_events(events)
+    return sorted((e["name"], e["datetime"], e["status"]) for e in events)
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_import_skips_duplicates_and_reports_invalid_rows(tmp_path, mode):
+    events = open_store(mode)
+    add_event(events, "Festival Kopi", location="malang")  # another day
+    path = _write_csv(tmp_path / "acara.csv", ROWS)
+
+    report = import_events(events, path, batch_size=2)
+    assert (report["rows"], report["imported"]) == (7, 3)
+    assert (report["duplicates"], report["invalid"]) == (1, 3)
+    assert report["errors"] == [
+        "line 5: name is empty",
+        "line 6: invalid datetime 'kemarin'",
+        "line 7: invalid status 'selesai'",
+    ]
+
+    again = import_events(events, path)
+    assert (again["imported"], again["duplicates"]) == (0, 4)
+    expected = _summary(events)
+    assert len(expected) == 4
+    assert _summary(storage.load_events(fresh=True)) == expected
+
+
+def test_rows_with_a_stored_id_are_duplicates(tmp_path):
+    events = open_store("json")
+    stored = add_event(events, "Konser")
+    rows = [["id", "name", "datetime"], [stored["id"], "Lain", "2099-01-01 10:00"]]
+    report = import_events(events, _write_csv(tmp_path / "id.csv", rows))
+    assert (report["imported"], report["duplicates"]) == (0, 1)
+
+
+def test_malformed_attendees_and_reviews_are_invalid_rows(tmp_path):
+    events = open_store("json")
+    base = {"name": "Konser", "datetime": "2099-03-01 19:00", "location": "Batu"}
+    rows = [
+        dict(base, attendees=[{"username": "budi"}], reviews=[]),
+        dict(base, name="A", attendees=["budi"]),
+        dict(base, name="B", attendees={"username": "budi"}),
+        dict(base, name="C", reviews=[{"username": "sari", "rating": "5"}]),
+        dict(base, name="D", reviews=[{"username": "sari", "rating": 9}]),
+        dict(base, name="E", reviews=[{"rating": 4}]),
+        "bukan objek",
+    ]
+    path = tmp_path / "acara.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+    report = import_events(events, str(path))
+    assert (report["imported"], report["invalid"]) == (1, 6)
+    assert report["errors"] == [
+        "line 2: attendees entry 1 has no username",
+        "line 3: attendees is not a list",
+        "line 4: reviews entry 1 has an invalid rating '5'",
+        "line 5: reviews entry 1 has an invalid rating 9",
+        "line 6: reviews entry 1 has no username",
+        "line 7: not an object",
+    ]
+    (e,) = storage.load_events(fresh=True)
+    assert (e["attendee_count"], e["review_count"]) == (1, 0)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_then_import_gives_the_same_events(tmp_path, fmt):
+    events = open_store("json")
+    import_events(events, _write_csv(tmp_path / "acara.csv", ROWS))
+    path = str(tmp_path / f"ekspor.{fmt}")
+    report = export_events(select_events(events, location="malang"), path)
+    expected = _summary(list(select_events(events, location="malang")))
+    assert report["rows"] == len(expected) == 2
+    if fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            assert next(csv.reader(f)) == list(CSV_FIELDS)
+
+    (tmp_path / "data" / "events.json").unlink()
+    empty = storage.load_events(fresh=True)
+    assert import_events(empty, path)["imported"] == 2
+    assert _summary(storage.load_events(fresh=True)) == expected
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from utils import ids, storage
+
+from helpers import open_store, run_other_process
+
+
+def _node(event_id):
+    return (event_id >> ids.SEQ_BITS) & ids.MAX_NODE
+
+
+def test_ids_keep_increasing_within_one_millisecond(monkeypatch):
+    now = ids.time.time()
+    monkeypatch.setattr(ids.time, "time", lambda: now)
+    made = [ids.new_event_id() for _ in range(3 * (ids.MAX_SEQ + 1))]
+    assert made == sorted(set(made))  # past 4096 it borrows the next ms
+
+    monkeypatch.setattr(ids.time, "time", lambda: now - 60)  # clock went back
+    later = ids.new_event_id()
+    assert later > made[-1]
+    assert 0 < later < 2**63
+
+
+def test_processes_sharing_data_get_their_own_node():
+    open_store("json")
+    node = storage.claim_id_node()
+    assert storage.claim_id_node() == node  # once per process
+    mine = [ids.new_event_id() for _ in range(2000)]
+    run_other_process(
+        "json",
+        """
+        import json
+        from utils import ids
+        made = [ids.new_event_id() for _ in range(2000)]
+        with open("other.json", "w") as f:
+            json.dump({"node": storage.claim_id_node(), "ids": made}, f)
+        """,
+    )
+    with open("other.json") as f:
+        other = json.load(f)
+
+    assert other["node"] != node
+    assert {_node(i) for i in mine} == {node}
+    assert {_node(i) for i in other["ids"]} == {other["node"]}
+    assert not set(mine) & set(other["ids"])
+
+
+def test_node_must_fit_its_bits():
+    with pytest.raises(ValueError):
+        ids.set_node(ids.MAX_NODE + 1)
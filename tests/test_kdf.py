@@ -0,0 +1,61 @@
+import sys
+import types
+
+import pytest
+
+from utils import auth, kdf, storage
+
+FAST = {"algorithm": "pbkdf2_sha256", "iterations": 1000}
+
+
+def _legacy(password):
+    """A record from before the algorithm was stored: PBKDF2, 100k rounds."""
+    stored = kdf.hash_password(password, kdf.LEGACY_PARAMS)
+    return {"salt": stored["salt"], "hash": stored["hash"]}
+
+
+def test_hash_and_verify_in_the_pool():
+    stored = auth.hash_password("rahasia")
+    assert kdf.params_of(stored) == kdf.DEFAULT_PARAMS
+    assert auth.verify_password(stored, "rahasia")
+    assert not auth.verify_password(stored, "Rahasia")
+    assert auth.hash_password("rahasia")["salt"] != stored["salt"]
+
+
+def test_records_keep_their_parameters():
+    stored = kdf.hash_password("rahasia", FAST, salt=b"\0" * kdf.SALT_BYTES)
+    assert stored == kdf.hash_password("rahasia", FAST, salt=b"\0" * kdf.SALT_BYTES)
+    assert kdf.verify_password(stored, "rahasia")
+    assert kdf.needs_rehash(stored)
+    assert not kdf.needs_rehash(stored, FAST)
+    with pytest.raises(ValueError):
+        kdf.params_of({**stored, "algorithm": "md5"})
+
+
+def test_legacy_records_verify_and_are_rehashed_on_login():
+    legacy = _legacy("rahasia")
+    assert kdf.verify_password(legacy, "rahasia")
+    assert kdf.needs_rehash(legacy)
+    storage.add_user({"username": "budi", "password": legacy, "role": "visitor"})
+
+    assert auth.authenticate("budi", "salah") is None
+    assert storage.find_user("budi")["password"] == legacy  # untouched
+    assert auth.authenticate("budi", "rahasia")["username"] == "budi"
+    upgraded = storage.find_user("budi")["password"]
+    assert not kdf.needs_rehash(upgraded)
+    assert auth.authenticate("budi", "rahasia") is not None
+
+
+def test_workers_do_not_import_the_main_module(tmp_path, monkeypatch):
+    # An unguarded script: re-importing it in a spawned worker would fail.
+    script = tmp_path / "kiosk.py"
+    script.write_text("raise SystemExit('main module imported in a worker')\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    workers = auth.KDF_WORKERS
+    auth.set_kdf_workers(1)  # a new pool, started under this main module
+    try:
+        assert auth.verify_password(kdf.hash_password("x", FAST), "x")
+    finally:
+        auth.set_kdf_workers(workers)
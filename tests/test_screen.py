@@ -0,0 +1,57 @@
+import io
+import sys
+
+from utils import screen
+from utils.screen import CLEAR_SEQUENCE, FrameWriter
+
+
+def test_output_is_held_until_flush_and_written_at_once(tmp_path, monkeypatch):
+    writes = []
+    os_write = screen.os.write
+
+    def counting(fd, data):
+        writes.append(len(data))
+        return os_write(fd, data)
+
+    monkeypatch.setattr(screen.os, "write", counting)
+    with open(tmp_path / "out.txt", "w", encoding="utf-8") as f:
+        out = FrameWriter(f)
+        for i in range(500):
+            print(f"baris {i} | Malang | Jl. Ijen 1", file=out)
+        assert writes == []
+        out.flush()
+        out.flush()  # nothing left
+    text = (tmp_path / "out.txt").read_text(encoding="utf-8")
+    assert len(writes) == 1 and writes[0] == len(text.encode("utf-8"))
+    assert text.splitlines()[-1] == "baris 499 | Malang | Jl. Ijen 1"
+
+
+def test_input_sends_the_screen_with_its_prompt(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", FrameWriter(stream))
+    monkeypatch.setattr(sys, "stdin", io.StringIO("2\n"))
+    print("1=Register, 2=Login")
+    assert stream.getvalue() == ""
+    assert input("Pilih: ") == "2"
+    assert stream.getvalue() == "1=Register, 2=Login\nPilih: "
+
+
+def test_clear_starts_the_next_screen_with_escapes(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", FrameWriter(stream))
+    monkeypatch.setattr(screen, "_ansi", True)
+    monkeypatch.setattr(screen.os, "system", None)  # no shell may be run
+    print("layar lama")
+    screen.clear()
+    assert stream.getvalue() == "layar lama\n"  # the clear waits for the screen
+    print("layar baru")
+    sys.stdout.flush()
+    assert stream.getvalue() == "layar lama\n" + CLEAR_SEQUENCE + "layar baru\n"
+
+
+def test_install_wraps_stdout_once(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    writer = screen.install()
+    assert writer.stream is stream
+    assert screen.install() is writer
@@ -0,0 +1,54 @@
+from core.actions import keyword_search
+from utils import storage
+from utils.event_store import find_event, remove_event, writable_event
+
+from helpers import add_event, open_store
+
+
+def _names(found):
+    return [e["name"] for e in found]
+
+
+def _store():
+    events = open_store("json")
+    add_event(events, "Konser Jazz Malam", days=1, location="Malang")
+    add_event(events, "Festival Jazz", days=2, location="Batu")
+    add_event(events, "Pameran Batik", days=3, location="Malang")
+    add_event(events, "Konser Rock", days=4, location="Surabaya")
+    return events
+
+
+def test_index_matches_a_scan():
+    events = _store()
+    queries = [
+        [("name", "jazz")],
+        [("name", "konser"), ("location", "malang")],
+        [("name", "az")],
+        [("location", "a")],
+        [("name", "tidak ada")],
+    ]
+    for keywords in queries:
+        scanned = keyword_search(list(events), keywords)
+        assert _names(keyword_search(events, keywords)) == _names(scanned), keywords
+
+
+def test_whole_words_rank_before_substrings():
+    events = _store()
+    add_event(events, "Jazzfest", days=0)
+    found = _names(keyword_search(events, [("name", "jazz")]))
+    assert found == ["Konser Jazz Malam", "Festival Jazz", "Jazzfest"]
+
+
+def test_index_follows_edits_and_deletes():
+    events = _store()
+    batik = writable_event(events, events[2])
+    batik["name"] = "Pameran Jazz"
+    storage.log_change(
+        events, "edit_event", {"id": batik["id"], "fields": {"name": batik["name"]}}
+    )
+    first = events[0]
+    remove_event(events, first)
+    storage.log_change(events, "delete_event", {"id": first["id"]})
+    found = _names(keyword_search(events, [("name", "jazz")]))
+    assert found == ["Festival Jazz", "Pameran Jazz"]
+    assert find_event(events, first["id"]) is None
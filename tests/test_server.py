@@ -0,0 +1,222 @@
+import asyncio
+import json
+
+import pytest
+
+from core.server import EventService, HTTPError, _read_request
+from utils import kdf, storage
+from utils.auth import create_session
+
+from helpers import add_event, open_store
+
+
+@pytest.fixture
+def service():
+    events = open_store("json")
+    add_event(events, "Konser", days=3)
+    add_event(events, "Pameran", days=-3)
+    storage.add_user(
+        {
+            "username": "budi",
+            "password": kdf.hash_password("rahasia", kdf.LEGACY_PARAMS),
+            "role": "visitor",
+        }
+    )
+    return EventService(events)
+
+
+def _call(service, method, target, body=b"", authorization=""):
+    status, data = service.handle(method, target, body, authorization)
+    return status, json.loads(data)
+
+
+def _login(service, body):
+    status, data = asyncio.run(service.login(body))
+    return status, json.loads(data)
+
+
+def _token(service):
+    return "Bearer " + create_session(storage.find_user("budi"))
+
+
+# --------------------------
+# Reads
+# --------------------------
+def test_lists_and_details(service):
+    status, page = _call(service, "GET", "/events")
+    assert status == 200 and page["count"] == 1
+    event_id = page["events"][0]["id"]
+    assert event_id == str(service.events[0]["id"])  # past 2**53: a string
+    status, e = _call(service, "GET", f"/events/{event_id}")
+    assert (status, e["id"], e["name"], e["attendees"]) == (
+        200,
+        event_id,
+        "Konser",
+        [],
+    )
+    assert _call(service, "GET", "/events?past=1&limit=1")[1]["count"] == 2
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/events/12345",
+        "/events/²",  # a Unicode digit int() would reject
+        "/events/" + "9" * 20,  # beyond any 64-bit id
+        "/events/" + "9" * 400,
+        "/events/1/unknown",
+        "/unknown",
+    ],
+)
+def test_unknown_ids_and_paths_are_404(service, target):
+    assert _call(service, "GET", target)[0] == 404
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/events/abc/attend",
+        "/events/abc/reviews",
+        "/events/day/x",
+        "/events/%C2%B2/attend",
+        "/events/²/reviews",
+    ],
+)
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_sub_paths_of_bad_ids_are_404(service, method, target):
+    assert _call(service, method, target, authorization=_token(service))[0] == 404
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/events/day?date=besok",
+        "/events/day",
+        "/events/month?date=9999-12-05",
+        "/events/week?date=9999-12-31",
+        "/events/range?from=2025-01-01&to=9999-12-31",
+        "/events/range?from=2025-02-01&to=2025-01-01",
+        "/events?offset=-1",
+        "/events?limit=sepuluh",
+        "/events?offset=" + "9" * 40,
+        "/events/location?q=",
+        "/events/search",
+    ],
+)
+def test_bad_parameters_are_400(service, target):
+    status, data = _call(service, "GET", target)
+    assert status == 400 and data["error"]
+
+
+def test_the_last_query_date_still_answers(service):
+    for target in (
+        "/events/month?date=9999-11-30",
+        "/events/week?date=9999-11-30",
+        "/events/range?from=9999-11-01&to=9999-11-30",
+    ):
+        assert _call(service, "GET", target)[0] == 200, target
+
+
+@pytest.mark.parametrize(
+    "method, target",
+    [
+        ("POST", "/events"),
+        ("DELETE", "/events/day?date=2025-01-01"),
+        ("GET", "/sessions"),
+        ("GET", "/events/1/attend"),
+    ],
+)
+def test_wrong_method_is_405(service, method, target):
+    event_id = service.events[0]["id"]
+    target = target.replace("/1/", f"/{event_id}/")
+    assert _call(service, method, target)[0] == 405
+
+
+def test_handler_bug_is_500(service, monkeypatch, capsys):
+    def broken(*args):
+        raise KeyError("oops")
+
+    monkeypatch.setattr(service, "_route", broken)
+    assert _call(service, "GET", "/events") == (500, {"error": "internal error"})
+    assert "KeyError" in capsys.readouterr().err
+
+
+# --------------------------
+# Writes and sessions
+# --------------------------
+def test_writes_need_a_valid_session(service):
+    target = f"/events/{service.events[0]['id']}/attend"
+    assert _call(service, "POST", target)[0] == 401
+    assert _call(service, "POST", target, authorization="Basic YnVkaQ==")[0] == 401
+    assert _call(service, "POST", target, authorization="Bearer x.y")[0] == 401
+
+    auth = _token(service)
+    status, data = _call(service, "POST", target, authorization=auth)
+    assert status == 201 and data["event"]["attendee_count"] == 1
+    assert _call(service, "POST", target, authorization=auth)[0] == 409
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        (b"{", 400),
+        (b"[5]", 400),
+        (b'{"rating": "5"}', 400),
+        (b'{"rating": 6}', 400),
+        (b'{"rating": 4}', 409),  # the past event was not attended
+    ],
+)
+def test_bad_review_bodies(service, body, status):
+    past = next(e for e in service.events if e["name"] == "Pameran")
+    target = f"/events/{past['id']}/reviews"
+    assert _call(service, "POST", target, body, _token(service))[0] == status
+
+
+def test_login_and_logout(service):
+    assert _login(service, b"nope")[0] == 400
+    assert _login(service, b'{"password": "x"}')[0] == 400
+    assert _login(service, b'{"username": "budi", "password": "salah"}')[0] == 401
+    assert _login(service, b'{"username": "siapa", "password": "x"}')[0] == 401
+
+    status, data = _login(service, b'{"username": "BUDI", "password": "rahasia"}')
+    assert (status, data["username"]) == (201, "budi")
+    assert not kdf.needs_rehash(storage.find_user("budi")["password"])
+
+    auth = "Bearer " + data["token"]
+    assert _call(service, "DELETE", "/sessions", authorization=auth)[0] == 200
+    target = f"/events/{service.events[0]['id']}/attend"
+    assert _call(service, "POST", target, authorization=auth)[0] == 401
+    assert _call(service, "DELETE", "/sessions", authorization="Bearer x")[0] == 401
+
+
+# --------------------------
+# Request parsing
+# --------------------------
+def _parse(raw: bytes):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    return asyncio.run(run())
+
+
+def test_request_parsing():
+    request = _parse(b"post /sessions HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert request == ("POST", "/sessions", "HTTP/1.1", {"content-length": "2"}, b"{}")
+    assert _parse(b"") is None
+
+
+@pytest.mark.parametrize(
+    "raw, status",
+    [
+        (b"GET /events\r\n\r\n", 400),
+        (b"GET /events HTTP/1.1\r\nContent-Length: dua\r\n\r\n", 400),
+        (b"POST /sessions HTTP/1.1\r\nContent-Length: 999999\r\n\r\n", 413),
+    ],
+)
+def test_malformed_requests(raw, status):
+    with pytest.raises(HTTPError) as exc:
+        _parse(raw)
+    assert exc.value.status == status
@@ -0,0 +1,91 @@
+import base64
+import json
+import os
+import time
+
+import pytest
+
+from utils import storage
+from utils.auth import create_session, resume_session, revoke_session
+
+from helpers import run_other_process
+
+BUDI = {"username": "budi", "password": {"salt": "00", "hash": "00"}}
+
+
+@pytest.fixture(autouse=True)
+def budi():
+    storage.add_user(dict(BUDI, role="visitor"))
+
+
+def _parts(token):
+    payload, signature = token.split(".")
+    return json.loads(base64.urlsafe_b64decode(payload + "==")), signature
+
+
+def _encode(claims):
+    data = json.dumps(claims, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def test_a_valid_token_resumes_its_user():
+    token = create_session(BUDI)
+    assert resume_session(token)["username"] == "budi"
+    claims, _ = _parts(token)
+    assert claims["sub"] == "budi" and claims["exp"] > time.time()
+    assert create_session(BUDI) != token  # every login is its own session
+
+
+def test_forged_tokens_are_rejected():
+    token = create_session(BUDI)
+    claims, signature = _parts(token)
+    admin = _encode(dict(claims, sub="admin", exp=claims["exp"] + 10**6))
+    assert resume_session(f"{admin}.{signature}") is None
+    flipped = signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")
+    assert resume_session(f"{token.split('.')[0]}.{flipped}") is None
+    assert resume_session(f"{admin}.") is None
+
+    storage._session_key = os.urandom(storage.SESSION_KEY_BYTES)  # another site
+    elsewhere = create_session(BUDI)
+    storage._session_key = None  # read back from data/session.key
+    assert resume_session(elsewhere) is None
+    assert resume_session(token) is not None
+
+
+@pytest.mark.parametrize(
+    "token", ["", "abc", "a.b.c", "!!!.###", "e30.", ".", "x" * 10_000]
+)
+def test_malformed_tokens_are_rejected(token):
+    assert resume_session(token) is None
+    assert revoke_session(token) is False
+
+
+def test_expired_tokens_are_rejected():
+    assert resume_session(create_session(BUDI, ttl=-1)) is None
+    assert resume_session(create_session(BUDI, ttl=60)) is not None
+
+
+def test_revoked_tokens_are_rejected_in_every_process():
+    kept, revoked = create_session(BUDI), create_session(BUDI)
+    run_other_process(
+        "json",
+        f"""
+        from utils.auth import revoke_session
+        assert revoke_session({revoked!r})
+        """,
+    )
+    assert resume_session(revoked) is None
+    assert resume_session(kept) is not None  # only that session ends
+
+
+def test_revocations_of_expired_tokens_are_dropped():
+    revoke_session(create_session(BUDI, ttl=-1))  # nothing to remember
+    assert storage.revoked_sessions() == {}
+    storage.revoke_session("lama", int(time.time()) - 1)
+    token = create_session(BUDI)
+    revoke_session(token)
+    assert list(storage.revoked_sessions()) == [_parts(token)[0]["sid"]]
+
+
+def test_tokens_of_removed_accounts_are_rejected():
+    assert resume_session(create_session({"username": "hilang"})) is None
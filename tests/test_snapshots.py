@@ -0,0 +1,92 @@
+import threading
+
+from core.actions import record_attendance
+from utils import storage
+from utils.event_store import find_event, remove_event, writable_event
+
+from helpers import add_event, open_store
+
+
+def _edit(events, e, **fields):
+    e = writable_event(events, e)
+    e.update(fields)
+    storage.log_change(events, "edit_event", {"id": e["id"], "fields": fields})
+    return e
+
+
+def _names(snap):
+    return [e["name"] for e in snap]
+
+
+def test_a_snapshot_never_sees_later_changes():
+    events = open_store("json")
+    konser = add_event(events, "Konser", days=1)
+    pameran = add_event(events, "Pameran", days=2)
+    lomba = add_event(events, "Lomba", days=3)
+    before = events.snapshot()
+
+    _edit(events, konser, name="Konser Jazz")
+    record_attendance(events, find_event(events, pameran["id"]), "budi")
+    remove_event(events, find_event(events, lomba["id"]))
+    storage.log_change(events, "delete_event", {"id": lomba["id"]})
+    add_event(events, "Seminar", days=4)
+
+    assert _names(before) == ["Konser", "Pameran", "Lomba"]
+    assert before.by_id[pameran["id"]]["attendees"] == []
+    assert before.by_id[pameran["id"]]["attendee_count"] == 0
+    after = events.snapshot()
+    assert after.version > before.version
+    assert _names(after) == ["Konser Jazz", "Pameran", "Seminar"]
+    assert after.by_id[pameran["id"]]["attendee_count"] == 1
+
+
+def test_only_changed_events_are_copied():
+    events = open_store("json")
+    konser = add_event(events, "Konser", days=1)
+    pameran = add_event(events, "Pameran", days=2)
+    before = events.snapshot()
+
+    copy = writable_event(events, konser)
+    assert copy is not konser
+    assert writable_event(events, copy) is copy  # not published yet
+    assert find_event(events, konser["id"]) is copy
+    copy["name"] = "Konser Jazz"
+    storage.log_change(
+        events, "edit_event", {"id": copy["id"], "fields": {"name": copy["name"]}}
+    )
+
+    after = events.snapshot()
+    assert after.by_id[konser["id"]] is copy
+    assert after.by_id[pameran["id"]] is before.by_id[pameran["id"]]
+    assert writable_event(events, copy) is not copy  # now a snapshot holds it
+
+
+def test_readers_never_see_an_edit_half_done():
+    events = open_store("json")
+    for i in range(10):
+        add_event(events, f"Acara {i}", days=i + 1, description=f"Acara {i}")
+    torn = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            for e in events.snapshot():
+                if e["name"] != e["description"]:
+                    torn.append(e["name"])
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(10):
+            for e in list(events):
+                e = writable_event(events, e)
+                e["name"] = f"{e['name']}."
+                e["description"] = e["name"]
+                fields = {"name": e["name"], "description": e["name"]}
+                storage.log_change(
+                    events, "edit_event", {"id": e["id"], "fields": fields}
+                )
+    finally:
+        done.set()
+        reader.join()
+    assert torn == []
@@ -0,0 +1,75 @@
+from core.actions import record_attendance, record_review
+from utils import storage
+from utils.event_store import find_event, remove_event, writable_event
+from utils.stats_engine import StatsEngine
+
+from helpers import add_event, open_store, run_other_process
+
+
+def _edit(events, e, **fields):
+    e = writable_event(events, e)
+    e.update(fields)
+    storage.log_change(events, "edit_event", {"id": e["id"], "fields": fields})
+    return e
+
+
+def _scanned(events):
+    return StatsEngine(list(events)).snapshot()
+
+
+def test_counters_follow_adds_edits_and_deletes():
+    events = open_store("json")
+    konser = add_event(events, "Konser", days=-3)
+    pameran = add_event(events, "Pameran", days=40, location="Batu")
+    engine = events.ensure_stats()
+    assert engine.snapshot() == _scanned(events)
+
+    lomba = add_event(events, "Lomba", days=70, category="OLAHRAGA")
+    record_attendance(events, pameran, "budi")
+    record_attendance(events, find_event(events, pameran["id"]), "sari")
+    konser = _edit(events, konser, status="finished", location="Surabaya")
+    record_review(events, konser, "budi", 4, "")
+    _edit(events, lomba, organizer="Karang Taruna", datetime="2020-01-05T09:00:00")
+    remove_event(events, find_event(events, pameran["id"]))
+    storage.log_change(events, "delete_event", {"id": pameran["id"]})
+
+    assert events.ensure_stats() is engine
+    counters = engine.snapshot()
+    assert counters == _scanned(events)
+    assert counters["by_city"] == {"Surabaya": 1, "Malang": 1}
+    assert counters["by_month"]["2020-01"] == 1
+    assert counters["rating_distribution"] == {4: 1}
+    assert sum(counters["attendance_by_month"].values()) == 0
+
+
+def test_a_snapshot_keeps_the_counters_it_was_published_with():
+    events = open_store("json")
+    add_event(events, "Konser", days=3)
+    events.ensure_stats()
+    before = events.snapshot()
+    add_event(events, "Pameran", days=3, location="Batu")
+
+    assert before.stats()["by_city"] == {"Malang": 1}
+    assert events.snapshot().stats()["by_city"] == {"Malang": 1, "Batu": 1}
+
+
+def test_counters_follow_changes_merged_from_another_process():
+    events = open_store("journal")
+    e = add_event(events, "Konser", days=3)
+    engine = events.ensure_stats()
+    storage.flush()
+    run_other_process(
+        "journal",
+        f"""
+        record_attendance(events, find_event(events, {e['id']}), "sari")
+        e = writable_event(events, find_event(events, {e['id']}))
+        e["location"] = "Batu"
+        storage.log_change(
+            events, "edit_event", {{"id": e["id"], "fields": {{"location": "Batu"}}}}
+        )
+        """,
+    )
+
+    assert storage.sync_events(events)
+    assert engine.snapshot() == _scanned(events)
+    assert engine.snapshot()["by_city"] == {"Batu": 1}
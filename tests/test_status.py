@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from utils import storage
+from utils.event_store import find_event, remove_event, writable_event
+from utils.status_updater import refresh_event_statuses
+
+from helpers import add_event, open_store
+
+
+def _edit(events, e, **fields):
+    e = writable_event(events, e)
+    e.update(fields)
+    storage.log_change(events, "edit_event", {"id": e["id"], "fields": fields})
+    return e
+
+
+def _soon(minutes):
+    when = datetime.now().replace(microsecond=0) + timedelta(minutes=minutes)
+    return when.isoformat()
+
+
+def _journal_ops():
+    storage.flush()
+    with open(storage.JOURNAL_FILE, encoding="utf-8") as f:
+        return [line for line in f if '"set_status"' in line]
+
+
+def test_an_event_edited_several_times_finishes_once():
+    events = open_store("journal")
+    e = add_event(events, "Konser", datetime=_soon(-10))
+    for i in range(3):  # edits that keep the time
+        e = _edit(events, e, name=f"Konser {i}")
+    snap = events.snapshot()
+    held = snap.by_id[e["id"]]
+
+    assert refresh_event_statuses(events)
+    assert find_event(events, e["id"])["status"] == "finished"
+    assert held["status"] == "scheduled"  # the published copy is untouched
+    assert len(_journal_ops()) == 1
+    assert not refresh_event_statuses(events)
+    assert events.schedule.pop_due(datetime.now()) == []
+
+
+def test_only_due_scheduled_events_finish():
+    events = open_store("json")
+    past = add_event(events, "Lalu", days=1)
+    moved = add_event(events, "Ditunda", days=1)
+    cancelled = add_event(events, "Batal", days=1)
+    deleted = add_event(events, "Hapus", days=1)
+    past = _edit(events, past, datetime=_soon(-5))
+    moved = _edit(events, moved, datetime=_soon(-5))
+    moved = _edit(events, moved, datetime=_soon(60))  # rescheduled later
+    _edit(events, cancelled, datetime=_soon(-5), status="cancelled")
+    _edit(events, deleted, datetime=_soon(-5))
+    remove_event(events, find_event(events, deleted["id"]))
+    storage.log_change(events, "delete_event", {"id": deleted["id"]})
+
+    assert [e["id"] for e in events.schedule.pop_due(datetime.now())] == [past["id"]]
+    later = datetime.now() + timedelta(hours=2)
+    assert [e["id"] for e in events.schedule.pop_due(later)] == [moved["id"]]
+
+
+def test_stale_entries_do_not_pile_up():
+    events = open_store("json")
+    e = add_event(events, "Konser", days=1)
+    for i in range(500):
+        e = _edit(events, e, datetime=_soon(60 + i))
+    assert len(events.schedule.heap) < 100
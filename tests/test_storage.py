@@ -0,0 +1,392 @@
+import json
+import os
+
+import pytest
+
+from core.actions import record_attendance, record_review
+from utils import sqlite_backend, storage
+from utils.event_store import find_event, remove_event, writable_event
+
+from helpers import add_event, open_store, run_other_process
+
+
+def _state(events):
+    """Everything a reload has to give back, attendees and reviews included."""
+    storage.require_events(events)
+    state = {}
+    for e in events:
+        e.load_details()
+        state[e["id"]] = (
+            e["name"],
+            e["datetime"],
+            e["status"],
+            [a["username"] for a in e["attendees"]],
+            [(r["username"], r["rating"], r["comment"]) for r in e["reviews"]],
+        )
+    return state
+
+
+def _edit(events, e, **fields):
+    e = writable_event(events, e)
+    e.update(fields)
+    storage.log_change(events, "edit_event", {"id": e["id"], "fields": fields})
+    return e
+
+
+def _reloaded(mode):
+    storage.flush()
+    return open_store(mode) and storage.load_events(fresh=True)
+
+
+# --------------------------
+# Round trips
+# --------------------------
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_round_trip(mode):
+    events = open_store(mode)
+    konser = add_event(events, "Konser", days=10)
+    pameran = add_event(events, "Pameran", days=40)
+    lomba = add_event(events, "Lomba", days=-60)  # an older month shard
+    seminar = add_event(events, "Seminar", days=3)
+    record_attendance(events, konser, "budi")
+    record_attendance(events, find_event(events, konser["id"]), "sari")
+    _edit(events, pameran, name="Pameran Batik", datetime=seminar["datetime"])
+    lomba = _edit(events, lomba, status="finished")
+    record_review(events, lomba, "budi", 4, "seru")
+    remove_event(events, seminar)
+    storage.log_change(events, "delete_event", {"id": seminar["id"]})
+    expected = _state(events)
+
+    assert len(expected) == 3
+    assert _state(_reloaded(mode)) == expected
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_reload_without_changes_is_the_same_store(mode):
+    events = open_store(mode)
+    add_event(events, "Konser")
+    storage.flush()
+    assert storage.load_events() is events  # nothing committed from outside
+
+
+@pytest.mark.parametrize("loaded", [False, True])
+def test_binary_edits_outside_the_header_survive_a_reload(loaded):
+    events = open_store("binary")
+    e = add_event(events, "Konser")
+    record_attendance(events, e, "budi")
+    storage.flush()
+    events = storage.load_events(fresh=True)
+    e = find_event(events, e["id"])
+    if loaded:
+        e.load_details()  # payload merged and cached, not yet modified
+    # a new key, and a header field whose value no longer fits the header
+    _edit(events, e, sponsor="Bank Jatim", htm=5000)
+    storage.flush()
+
+    e = find_event(storage.load_events(fresh=True), e["id"])
+    assert (e.get("sponsor"), e.get("htm")) == ("Bank Jatim", 5000)
+    assert [a["username"] for a in e["attendees"]] == ["budi"]
+
+
+# --------------------------
+# Journal
+# --------------------------
+def _journal_lines():
+    with open(storage.JOURNAL_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_journal_appends_operations_and_replays_them():
+    events = open_store("journal")
+    e = add_event(events, "Konser")
+    record_attendance(events, e, "budi")
+    storage.flush()
+
+    assert [op["op"] for op in _journal_lines()] == ["add_event", "add_attendee"]
+    assert not os.path.exists(storage.DATA_FILE)  # not compacted yet
+    reloaded = storage.load_events(fresh=True)
+    assert [a["username"] for a in find_event(reloaded, e["id"])["attendees"]] == [
+        "budi"
+    ]
+
+
+def test_journal_compaction_folds_it_into_the_snapshot(monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_COMPACT_THRESHOLD", 5)
+    events = open_store("journal")
+    ids = [add_event(events, f"Acara {i}")["id"] for i in range(5)]
+    storage.flush()
+    storage.wait_for_compaction()
+
+    assert not os.path.exists(storage.JOURNAL_COMPACTING_FILE)
+    assert not os.path.exists(storage.JOURNAL_FILE)
+    assert sorted(e["id"] for e in storage.load_json(storage.DATA_FILE, [])) == ids
+
+    later = add_event(events, "Sesudah")
+    storage.flush()
+    assert [op["event"]["id"] for op in _journal_lines()] == [later["id"]]
+    assert sorted(storage.load_events(fresh=True).by_id) == sorted(ids + [later["id"]])
+
+
+def test_interrupted_compaction_is_replayed():
+    events = open_store("journal")
+    first = add_event(events, "Sebelum")
+    storage.flush()
+    # crash after rotating the journal aside, before the snapshot was written
+    os.replace(storage.JOURNAL_FILE, storage.JOURNAL_COMPACTING_FILE)
+    second = add_event(events, "Sesudah")
+    storage.flush()
+
+    assert sorted(storage.load_events(fresh=True).by_id) == [first["id"], second["id"]]
+    storage.compact_journal(background=False)
+    assert not os.path.exists(storage.JOURNAL_COMPACTING_FILE)
+    assert sorted(storage.load_events(fresh=True).by_id) == [first["id"], second["id"]]
+
+
+# --------------------------
+# Merging another process' commits
+# --------------------------
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_concurrent_writers_keep_each_others_changes(mode):
+    events = open_store(mode)
+    konser = add_event(events, "Konser")
+    pameran = add_event(events, "Pameran")
+    storage.flush()
+
+    run_other_process(
+        mode,
+        f"""
+        record_attendance(events, find_event(events, {konser["id"]}), "sari")
+        e = writable_event(events, find_event(events, {pameran["id"]}))
+        e["name"] = "Pameran Batik"
+        storage.log_change(
+            events, "edit_event", {{"id": e["id"], "fields": {{"name": e["name"]}}}}
+        )
+        """,
+    )
+    # this process has not synced: its copies still predate those commits
+    record_attendance(events, konser, "budi")
+    _edit(events, pameran, status="postponed")
+    added = add_event(events, "Seminar")
+    storage.flush()
+
+    state = _state(storage.load_events(fresh=True))
+    assert sorted(state[konser["id"]][3]) == ["budi", "sari"]
+    assert state[pameran["id"]][0] == "Pameran Batik"
+    assert state[pameran["id"]][2] == "postponed"
+    assert added["id"] in state
+
+
+def _shard_ids():
+    return {
+        name[: -len(".json")]: sorted(e["id"] for e in storage.load_json(path, []))
+        for name in os.listdir(storage.SHARD_DIR)
+        if name != os.path.basename(storage.SHARD_MANIFEST_FILE)
+        for path in [os.path.join(storage.SHARD_DIR, name)]
+    }
+
+
+def test_shard_changes_follow_events_another_process_moved():
+    events = open_store("sharded")
+    a, b, c = (add_event(events, name, days=400) for name in ("A", "B", "C"))
+    storage.flush()
+    old_month = a.month
+
+    run_other_process(
+        "sharded",
+        f"""
+        for event_id in ({a["id"]}, {b["id"]}, {c["id"]}):
+            e = writable_event(events, find_event(events, event_id))
+            fields = {{"datetime": "2099" + e["datetime"][4:]}}
+            e.update(fields)
+            change = {{"id": event_id, "fields": fields}}
+            storage.log_change(events, "edit_event", change)
+        """,
+    )
+    # still in the old month here: an RSVP, a rename and a delete
+    record_attendance(events, a, "budi")
+    _edit(events, b, name="B2")
+    remove_event(events, c)
+    storage.log_change(events, "delete_event", {"id": c["id"]})
+    storage.flush()
+
+    shards = _shard_ids()
+    assert old_month not in shards  # nothing was written back to it
+    assert [ids for key, ids in shards.items() if key.startswith("2099")] == [
+        sorted([a["id"], b["id"]])
+    ]
+    state = _state(storage.load_events(fresh=True))
+    assert state[a["id"]][3] == ["budi"] and state[a["id"]][1].startswith("2099")
+    assert state[b["id"]][0] == "B2"
+    assert c["id"] not in state
+
+
+# --------------------------
+# Group commit and atomic saves
+# --------------------------
+class _Timers:
+    """A flush scheduler that only records what it was asked to run."""
+
+    def __init__(self):
+        self.calls = []
+        self.cancelled = 0
+
+    def __call__(self, delay, callback):
+        self.calls.append((delay, callback))
+        return self
+
+    def cancel(self):
+        self.cancelled += 1
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_writes_in_the_window_are_committed_together(mode):
+    events = open_store(mode, write_window_ms=500)
+    timers = _Timers()
+    storage.set_flush_scheduler(timers)
+    try:
+        for name in ("Konser", "Pameran", "Lomba"):
+            add_event(events, name)
+        assert storage.store_version() == 0  # nothing written yet
+        assert [delay for delay, _ in timers.calls] == [0.5]
+
+        timers.calls[0][1]()  # the window closes
+        assert storage.store_version() == 1
+        fresh = storage.load_events(fresh=True)
+        storage.require_events(fresh)
+        assert sorted(e["name"] for e in fresh) == ["Konser", "Lomba", "Pameran"]
+    finally:
+        storage.set_flush_scheduler()
+
+
+def test_a_full_batch_is_written_without_waiting():
+    events = open_store("journal", write_window_ms=60_000, write_batch_size=3)
+    timers = _Timers()
+    storage.set_flush_scheduler(timers)
+    try:
+        add_event(events, "Konser")
+        add_event(events, "Pameran")
+        assert storage.store_version() == 0
+        add_event(events, "Lomba")
+        assert storage.store_version() == 1
+        assert timers.cancelled == 1
+        with open(storage.JOURNAL_FILE, encoding="utf-8") as f:
+            assert len(f.readlines()) == 3
+        storage.flush()
+        assert storage.store_version() == 1  # nothing left to write
+    finally:
+        storage.set_flush_scheduler()
+
+
+def test_a_failed_save_leaves_the_old_file():
+    events = open_store("json")
+    add_event(events, "Konser")
+    storage.flush()
+    assert not [n for n in os.listdir("data") if n.endswith(".tmp")]
+    with open(storage.DATA_FILE, encoding="utf-8") as f:
+        before = f.read()
+    assert [e["name"] for e in json.loads(before)] == ["Konser"]
+
+    with pytest.raises(TypeError):
+        storage.save_json(storage.DATA_FILE, [{"name": "x" * 100_000}, object()])
+    with open(storage.DATA_FILE, encoding="utf-8") as f:
+        assert f.read() == before
+
+
+# --------------------------
+# Load cache
+# --------------------------
+def _count_parses(monkeypatch):
+    parses = []
+    load_json = storage.load_json
+
+    def counting(path, default):
+        parses.append(path)
+        return load_json(path, default)
+
+    monkeypatch.setattr(storage, "load_json", counting)
+    return parses
+
+
+def test_settings_are_parsed_again_only_after_a_change(monkeypatch):
+    monkeypatch.setattr(storage, "RACY_WINDOW_NS", 0)
+    storage.save_settings({"lang": "en"})
+    parses = _count_parses(monkeypatch)
+    settings = storage.load_settings()
+    settings["lang"] = "id"  # a caller's copy, not the cached value
+    assert storage.load_settings() == {"lang": "en"}
+    assert len(parses) == 1
+
+    # another process replaces the file: same size and mtime, new inode
+    stat = os.stat(storage.SETTINGS_FILE)
+    with open("settings.new", "w", encoding="utf-8") as f:
+        json.dump({"lang": "jp"}, f, indent=2)
+    os.utime("settings.new", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace("settings.new", storage.SETTINGS_FILE)
+    assert storage.load_settings() == {"lang": "jp"}
+    assert len(parses) == 2
+
+
+def test_a_file_changed_within_the_racy_window_is_read_again():
+    storage.save_settings({"lang": "en"})
+    assert storage.load_settings() == {"lang": "en"}
+    # rewritten in place, stamp unchanged: only its age gives it away
+    stat = os.stat(storage.SETTINGS_FILE)
+    with open(storage.SETTINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"lang": "jp"}, f, indent=2)
+    os.utime(storage.SETTINGS_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert storage.load_settings() == {"lang": "jp"}
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_events_are_loaded_again_after_another_process_commits(mode):
+    events = open_store(mode)
+    konser = add_event(events, "Konser")
+    storage.flush()
+    run_other_process(
+        mode,
+        f"""
+        e = writable_event(events, find_event(events, {konser["id"]}))
+        e["name"] = "Konser Jazz"
+        storage.log_change(
+            events, "edit_event", {{"id": e["id"], "fields": {{"name": e["name"]}}}}
+        )
+        """,
+    )
+
+    reloaded = storage.load_events()
+    assert reloaded is not events
+    assert find_event(reloaded, konser["id"])["name"] == "Konser Jazz"
+    assert storage.load_events() is reloaded
+
+
+# --------------------------
+# Whole-store saves and SQLite queries
+# --------------------------
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_save_events_replaces_the_store(mode):
+    events = open_store(mode)
+    add_event(events, "Lama")
+    queued = add_event(events, "Belum disimpan")  # superseded by the save
+    replacement = [dict(queued, name="Baru"), dict(queued, id=1, name="Lain")]
+    storage.save_events(replacement)
+    storage.flush()
+
+    reloaded = storage.load_events(fresh=True)
+    storage.require_events(reloaded)
+    assert sorted(e["name"] for e in reloaded) == ["Baru", "Lain"]
+
+
+def test_sqlite_pages_are_read_without_loading_the_store():
+    events = open_store("sqlite")
+    for i in range(5):
+        e = add_event(events, f"Acara {i}", days=i + 1, location="Malang")
+        record_attendance(events, e, "budi")
+    add_event(events, "Di Batu", days=2, location="Batu")
+    storage.flush()
+
+    assert sqlite_backend.count_events(location="malang") == 5
+    page = sqlite_backend.query_events(location="malang", offset=1, limit=2)
+    assert [e["name"] for e in page] == ["Acara 1", "Acara 2"]
+    assert all(e._lazy is not None for e in page)  # details not read yet
+    assert [a["username"] for a in page[0]["attendees"]] == ["budi"]
+    assert len(sqlite_backend.query_events(offset=4)) == 2
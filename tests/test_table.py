@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from core import actions
+from core.actions import TABLE_PAGE_SIZE, browse_table, new_event_object, print_table
+from localizations.translations import TRANSLATIONS
+
+T = TRANSLATIONS["id"]
+
+
+def _events(n, long_name_at=None):
+    start = datetime(2099, 1, 1, 19, 0)
+    events = []
+    for i in range(n):
+        name = "Acara " + ("panjang " * 3 if i == long_name_at else "") + str(i + 1)
+        events.append(
+            new_event_object(
+                name,
+                start + timedelta(days=i),
+                "Malang",
+                "Jl. Ijen 1",
+                "Panitia",
+                "",
+                "gratis",
+                "SENI",
+            )
+        )
+    return events
+
+
+def _row_numbers(out):
+    cells = [line.split(" | ")[0].strip() for line in out.splitlines()]
+    return [int(c) for c in cells if c.isdigit()]
+
+
+def test_a_page_formats_only_its_own_rows(capsys):
+    events = _events(30, long_name_at=0)
+    print_table(events, T, presorted=True, offset=20, limit=TABLE_PAGE_SIZE)
+    out = capsys.readouterr().out
+    assert _row_numbers(out) == list(range(21, 31))  # numbered from the top
+    assert "Acara panjang" not in out
+    assert "Acara 21 | " in out  # the long name on page 1 sets no width here
+
+    print_table(events, T, presorted=True)
+    assert _row_numbers(capsys.readouterr().out) == list(range(1, 31))
+
+
+def test_browsing_moves_between_pages(capsys, monkeypatch):
+    events = _events(2 * TABLE_PAGE_SIZE + 5)
+    typed = iter(["n", "n", "n", "p", "g1", "g9", "x", "7"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(typed))
+    monkeypatch.setattr(actions, "clear_screen", lambda: None)
+    shown = []
+
+    def print_and_record(*args, **kwargs):
+        print_table(*args, **kwargs)
+        shown.extend(_row_numbers(capsys.readouterr().out)[:1])
+
+    monkeypatch.setattr(actions, "print_table", print_and_record)
+    assert browse_table(events, T, "> ") == ("x", 2)
+    assert shown == [1, 21, 41, 41, 21, 1, 41]
+
+    shown.clear()
+    assert browse_table(events, T, "> ", page=1) == ("7", 1)  # kept from a detail
+    assert shown == [21]
+
+
+def test_a_single_page_has_no_navigation(capsys, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": "n")
+    assert browse_table(_events(3), T, "> ") == ("n", 0)
+    assert "Halaman" not in capsys.readouterr().out
+
@@ -0,0 +1,55 @@
+from core.actions import record_attendance, record_review
+from utils import storage
+from utils.event_store import (
+    attended_events,
+    find_event,
+    remove_event,
+    reviewed_events,
+    writable_event,
+)
+
+from helpers import add_event, open_store
+
+
+def _names(found):
+    return [e["name"] for e in found]
+
+
+def _finished(events, e):
+    e = writable_event(events, e)
+    e["status"] = "finished"
+    storage.log_change(events, "set_status", {"id": e["id"], "status": "finished"})
+    return e
+
+
+def test_attendance_and_reviews_per_user():
+    events = open_store("json")
+    konser = add_event(events, "Konser", days=-2)
+    pameran = add_event(events, "Pameran", days=-1)
+    lomba = add_event(events, "Lomba", days=5)
+    record_attendance(events, konser, "Budi")  # before the index exists
+    assert _names(attended_events(events, "budi")) == ["Konser"]
+
+    for e in (pameran, lomba):
+        record_attendance(events, find_event(events, e["id"]), "budi")
+    record_attendance(events, find_event(events, lomba["id"]), "sari")
+    for e in (konser, pameran):
+        e = _finished(events, find_event(events, e["id"]))
+        record_review(events, e, "BUDI", 5, "")
+
+    assert _names(attended_events(events, "BUDI")) == ["Konser", "Pameran", "Lomba"]
+    assert _names(reviewed_events(events, "budi")) == ["Konser", "Pameran"]
+    assert _names(attended_events(events, "sari")) == ["Lomba"]
+    assert reviewed_events(events, "sari") == []
+
+    remove_event(events, find_event(events, pameran["id"]))
+    storage.log_change(events, "delete_event", {"id": pameran["id"]})
+    assert _names(attended_events(events, "budi")) == ["Konser", "Lomba"]
+    assert _names(reviewed_events(events, "budi")) == ["Konser"]
+
+    # the scan over a plain list agrees, and a reload rebuilds the same index
+    storage.flush()
+    reloaded = storage.load_events(fresh=True)
+    for find in (attended_events, reviewed_events):
+        assert _names(find(list(events), "budi")) == _names(find(events, "budi"))
+        assert _names(find(reloaded, "budi")) == _names(find(events, "budi"))
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from utils import storage
+
+from helpers import open_store, run_other_process
+
+
+def _user(name, role="user"):
+    return {"username": name, "password": {"hash": name[::-1]}, "role": role}
+
+
+def _reread():
+    """Drop this process' directory, as a fresh start would."""
+    storage._users = None
+
+
+@pytest.mark.parametrize("mode", storage.STORAGE_MODES)
+def test_names_are_unique_whatever_the_case(mode):
+    open_store(mode)
+    assert storage.add_user(_user("Budi"))
+    assert not storage.add_user(_user("BUDI", role="admin"))
+    assert storage.add_user(_user("sari"))
+    assert storage.set_user_password("BUDI", {"hash": "baru"})
+
+    _reread()
+    assert storage.find_user("budi")["role"] == "user"
+    assert storage.find_user("Budi")["password"] == {"hash": "baru"}
+    assert storage.find_user("SARI")["username"] == "sari"
+    assert storage.find_user("dewi") is None
+
+
+@pytest.mark.parametrize("mode", ["json", "binary"])
+def test_the_journal_is_folded_into_the_users_file(mode, monkeypatch):
+    monkeypatch.setattr(storage, "USERS_COMPACT_MIN", 3)
+    open_store(mode)
+    for name in ("budi", "sari", "dewi"):
+        storage.add_user(_user(name))
+    assert not os.path.exists(storage.USERS_JOURNAL_FILE)
+    base = [u["username"] for u in storage.load_users()]
+    assert base == ["budi", "sari", "dewi"]
+
+    storage.add_user(_user("rina"))
+    with open(storage.USERS_JOURNAL_FILE, encoding="utf-8") as f:
+        assert [json.loads(line)["username"] for line in f] == ["rina"]
+    _reread()
+    assert [u["username"] for u in storage.user_directory().users] == base + ["rina"]
+
+
+def test_registrations_from_another_process_are_read_from_the_journal():
+    open_store("json")
+    storage.add_user(_user("budi"))
+    directory = storage.user_directory()
+    run_other_process("json", "storage.add_user({'username': 'sari', 'role': 'user'})")
+    with open(storage.USERS_JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write('{"username": "ri')  # a line still being written
+
+    assert storage.find_user("sari")["username"] == "sari"
+    assert storage.user_directory() is directory  # only the new lines were read
+    assert storage.find_user("ri") is None
+    assert not storage.add_user(_user("SARI"))
@@ -1,35 +1,176 @@
 import os
-import hashlib
-import binascii
+import base64
+import contextlib
 import getpass
+import hashlib
+import hmac
+import json
+import multiprocessing
+import secrets
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
 from typing import Dict, Any, Optional
-from utils.storage import load_users, save_users
+from utils import kdf
+from utils import storage
+from utils.storage import find_user, add_user, set_user_password
 from utils.colors import color_text, Colors
 
+# Key derivation runs in a pool of worker processes so that concurrent logins
+# (several kiosk threads, the HTTP service) spread over the cores instead of
+# queueing on the caller's. At most KDF_WORKERS derivations run at once.
+KDF_WORKERS = os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _kdf_pool() -> ProcessPoolExecutor:
+    """The pool; caller holds _pool_lock."""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs timer/flush threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=KDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+@contextlib.contextmanager
+def _bare_main_module():
+    """Start processes as if the parent had no main module. A spawned worker
+    first re-imports its parent's __main__ (main.py or core.server, and with
+    it the whole application); with an empty stand-in it imports only what
+    the task it is sent needs: utils.kdf, i.e. hashlib."""
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def set_kdf_workers(workers: int):
+    """Resize the pool (it is started again on next use)."""
+    global KDF_WORKERS, _pool
+    with _pool_lock:
+        KDF_WORKERS = max(1, workers)
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def submit_kdf(fn, *args) -> Future:
+    """Start kdf.`fn`(*args) in the pool without waiting for it (the HTTP
+    service awaits the Future instead of blocking its event loop)."""
+    with _pool_lock, _bare_main_module():
+        # the pool starts its workers on demand, from inside submit()
+        return _kdf_pool().submit(fn, *args)
+
+
+def hash_password(
+    password: str, params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """A stored password record (kdf.DEFAULT_PARAMS unless given)."""
+    return submit_kdf(kdf.hash_password, password, params).result()
+
+
+def verify_password(stored: Dict[str, Any], attempt: str) -> bool:
+    return submit_kdf(kdf.verify_password, stored, attempt).result()
+
+
+def authenticate(username: str, password: str) -> Optional[Dict[str, Any]]:
+    """The account if `password` is right, else None. A password stored with
+    other than the current KDF parameters is re-hashed with them on the way."""
+    u = find_user(username)
+    if u is None or not verify_password(u["password"], password):
+        return None
+    if kdf.needs_rehash(u["password"]):
+        rehashed = hash_password(password)
+        if set_user_password(u["username"], rehashed):
+            u["password"] = rehashed
+    return u
+
 
-def hash_password(password: str, salt: Optional[bytes] = None) -> Dict[str, str]:
-    if salt is None:
-        salt = os.urandom(16)
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100_000)
-    return {
-        "salt": binascii.hexlify(salt).decode(),
-        "hash": binascii.hexlify(dk).decode(),
+# --------------------------
+# Sessions
+# --------------------------
+# A session token is <payload>.<signature>, both base64url: the payload is
+# JSON {"sid", "sub" (username), "exp"} and the signature its HMAC-SHA256
+# under storage.session_key(). Resuming checks the signature, the expiry and
+# the revocation set, so a returning user skips the password KDF entirely.
+SESSION_TTL = 12 * 60 * 60  # seconds
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(storage.session_key(), payload, hashlib.sha256).digest()
+
+
+def create_session(user: Dict[str, Any], ttl: int = SESSION_TTL) -> str:
+    """A signed token for `user`, valid for `ttl` seconds unless revoked."""
+    claims = {
+        "sid": secrets.token_hex(16),
+        "sub": user["username"],
+        "exp": int(time.time()) + ttl,
     }
+    payload = json.dumps(claims, separators=(",", ":")).encode("utf-8")
+    return _b64encode(payload) + "." + _b64encode(_sign(payload))
 
 
-def verify_password(stored: Dict[str, str], attempt: str) -> bool:
-    salt = binascii.unhexlify(stored["salt"].encode())
-    dk = hashlib.pbkdf2_hmac("sha256", attempt.encode("utf-8"), salt, 100_000)
-    return binascii.hexlify(dk).decode() == stored["hash"]
+def _session_claims(token: str) -> Optional[Dict[str, Any]]:
+    """The claims of a token with a valid signature, else None."""
+    try:
+        payload_part, signature_part = token.split(".")
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, AttributeError):  # binascii.Error is a ValueError
+        return None
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def resume_session(token: str) -> Optional[Dict[str, Any]]:
+    """The account `token` was issued to, or None if the token is forged,
+    expired or revoked (or the account is gone)."""
+    claims = _session_claims(token)
+    if claims is None or claims["exp"] <= time.time():
+        return None
+    if claims["sid"] in storage.revoked_sessions():
+        return None
+    return find_user(claims["sub"])
+
+
+def revoke_session(token: str) -> bool:
+    """Revoke `token` (logout); False if it was not a valid token."""
+    claims = _session_claims(token)
+    if claims is None:
+        return False
+    if claims["exp"] > time.time():
+        storage.revoke_session(claims["sid"], claims["exp"])
+    return True
 
 
 def register_user(t_default: Dict[str, Any]):
-    users = load_users()
     print(color_text("Register new user (0 = cancel)", Colors.GREEN))
     username = input(t_default["prompt_username"]).strip()
     if username == "" or username == "0":
         return
-    if any(u["username"].lower() == username.lower() for u in users):
+    if find_user(username) is not None:
         print(color_text(t_default["register_fail_exists"], Colors.RED))
         return
     password = getpass.getpass(t_default["prompt_password"]).strip()
@@ -42,25 +183,22 @@ def register_user(t_default: Dict[str, Any]):
         print(color_text("Invalid role. Use 'visitor' or 'organizer'.", Colors.RED))
         return
     hashed = hash_password(password)
-    users.append({"username": username, "password": hashed, "role": role})
-    save_users(users)
+    if not add_user({"username": username, "password": hashed, "role": role}):
+        # taken by another instance while the password was typed
+        print(color_text(t_default["register_fail_exists"], Colors.RED))
+        return
     print(color_text(t_default["register_success"], Colors.GREEN))
 
 
 def login_user(t_default: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    users = load_users()
     print(color_text("Login (0 = cancel)", Colors.CYAN))
     username = input(t_default["prompt_username"]).strip()
     if username == "" or username == "0":
         return None
     password = getpass.getpass(t_default["prompt_password"]).strip()
-    for u in users:
-        if u["username"].lower() == username.lower():
-            if verify_password(u["password"], password):
-                print(color_text("Login sukses.", Colors.GREEN))
-                return u
-            else:
-                print(color_text(t_default["login_fail"], Colors.RED))
-                return None
+    u = authenticate(username, password)
+    if u is not None:
+        print(color_text("Login sukses.", Colors.GREEN))
+        return u
     print(color_text(t_default["login_fail"], Colors.RED))
     return None
@@ -1,5 +1,6 @@
-import os
+from utils import screen
 
 
 def clear_screen():
-    os.system("cls" if os.name == "nt" else "clear")
+    # ANSI escapes (utils.screen) instead of forking a shell to run clear/cls
+    screen.clear()
@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 class Colors:
     HEADER = "\033[95m"
     BLUE = "\033[94m"
@@ -9,5 +12,10 @@ class Colors:
     END = "\033[0m"
 
 
+# menus redraw the same titles, headers and options on every screen
+COLOR_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
 def color_text(s: str, style: str) -> str:
     return f"{style}{s}{Colors.END}"
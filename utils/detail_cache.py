@@ -0,0 +1,45 @@
+import collections
+
+# Number of events whose detail payload (attendees, reviews, unknown keys) may
+# be held in memory at once when the backend can load them per event.
+DETAIL_CACHE_SIZE = 256
+
+
+class DetailCache:
+    """LRU of records whose lazy detail payload has been loaded (see
+    Record._load_lazy). Past `capacity` the least recently used one drops its
+    payload and goes back to its lazy reference, so browsing memory follows
+    the number of events rather than the number of RSVPs and reviews.
+    A record whose details are modified leaves the cache and stays loaded:
+    its reference no longer matches what is in memory."""
+
+    def __init__(self, capacity: int = DETAIL_CACHE_SIZE):
+        self.capacity = max(1, capacity)
+        self._records = collections.OrderedDict()  # id(record) -> record
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, record):
+        self._records[id(record)] = record
+        self._records.move_to_end(id(record))
+        self._shrink()
+
+    def touch(self, record):
+        if id(record) in self._records:
+            self._records.move_to_end(id(record))
+
+    def discard(self, record):
+        self._records.pop(id(record), None)
+
+    def resize(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._shrink()
+
+    def _shrink(self):
+        while len(self._records) > self.capacity:
+            _, record = self._records.popitem(last=False)
+            record._unload()
+
+
+details = DetailCache()
@@ -0,0 +1,589 @@
+import bisect
+import itertools
+import threading
+from datetime import date
+from typing import List, Dict, Any, Optional, Set, Tuple
+from utils.models import Event
+from utils.text_index import TextIndex
+from utils.stats_engine import StatsEngine
+from utils.status_scheduler import StatusScheduler
+
+
+class DateIndex:
+    """Events kept sorted by their "datetime" string (the order print_table
+    uses). Keys are (datetime, seq) so equal datetimes keep insertion order."""
+
+    def __init__(self, events: List[Event]):
+        self._seq = itertools.count()
+        self._key_of: Dict[Any, Tuple[str, int]] = {}
+        pairs = sorted(((self._new_key(e), e) for e in events), key=lambda p: p[0])
+        self.keys: List[Tuple[str, int]] = [k for k, _ in pairs]
+        self.events: List[Event] = [e for _, e in pairs]
+        # bumped whenever `keys` changes (replace() leaves it alone)
+        self.generation = 0
+
+    def _new_key(self, e: Event) -> Tuple[str, int]:
+        key = (str(e.get("datetime", "")), next(self._seq))
+        self._key_of[e.get("id")] = key
+        return key
+
+    def add(self, e: Event):
+        key = self._new_key(e)
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.events.insert(i, e)
+        self.generation += 1
+
+    def remove(self, event_id):
+        key = self._key_of.pop(event_id, None)
+        if key is None:
+            return
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.events[i]
+            self.generation += 1
+
+    def replace(self, e: Event) -> Optional[int]:
+        """Put `e` in the slot of the event with the same id and datetime;
+        the slot's position, or None if there is none."""
+        key = self._key_of.get(e.get("id"))
+        if key is None:
+            return None
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self.events[i] = e
+            return i
+        return None
+
+    def move(self, e: Event):
+        """Re-position an event whose datetime changed."""
+        key = self._key_of.get(e.get("id"))
+        if key is not None and key[0] == str(e.get("datetime", "")):
+            return
+        self.remove(e.get("id"))
+        self.add(e)
+
+    def at(self, datetime_str: str) -> List[Event]:
+        """Events whose "datetime" is exactly `datetime_str`. O(log n + k)."""
+        lo = bisect.bisect_left(self.keys, (datetime_str,))
+        hi = bisect.bisect_right(self.keys, (datetime_str, float("inf")))
+        return self.events[lo:hi]
+
+    def range(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> List[Event]:
+        """Events with start <= date < end (either bound may be None), in order.
+        O(log n + k)."""
+        lo, hi = _range_bounds(self.keys, start, end)
+        return [e for e in self.events[lo:hi] if e.dt is not None]
+
+
+def _range_bounds(
+    keys, start: Optional[date], end: Optional[date]
+) -> Tuple[int, int]:
+    lo, hi = 0, len(keys)
+    if start is not None:
+        lo = bisect.bisect_left(keys, (start.isoformat(),))
+    if end is not None:
+        hi = bisect.bisect_left(keys, (end.isoformat(),))
+    return lo, hi
+
+
+# events per chunk of a published snapshot (see ChunkedEvents)
+SNAPSHOT_CHUNK = 512
+
+
+class ChunkedEvents:
+    """An immutable sequence of events kept as tuples of SNAPSHOT_CHUNK.
+    A version that only replaced a few slots is built by re-making their
+    chunks and sharing all the others with the previous version, so
+    publishing an RSVP costs a chunk, not a copy of every event."""
+
+    __slots__ = ("chunks", "_len")
+
+    def __init__(self, chunks: Tuple[Tuple[Event, ...], ...]):
+        self.chunks = chunks
+        self._len = sum(len(c) for c in chunks)
+
+    @classmethod
+    def build(cls, events: List[Event]) -> "ChunkedEvents":
+        return cls(
+            tuple(
+                tuple(events[i : i + SNAPSHOT_CHUNK])
+                for i in range(0, len(events), SNAPSHOT_CHUNK)
+            )
+        )
+
+    def replaced(self, events: List[Event], positions: Set[int]) -> "ChunkedEvents":
+        """This sequence with the chunks holding `positions` re-read from
+        `events` (same length and order as this one)."""
+        chunks = list(self.chunks)
+        for c in {i // SNAPSHOT_CHUNK for i in positions}:
+            start = c * SNAPSHOT_CHUNK
+            chunks[c] = tuple(events[start : start + SNAPSHOT_CHUNK])
+        return ChunkedEvents(tuple(chunks))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.chunks)
+
+    def iter_range(self, start: int, stop: int):
+        """The events at positions start .. stop-1, without a copy."""
+        stop = min(stop, self._len)
+        while start < stop:
+            c, offset = divmod(start, SNAPSHOT_CHUNK)
+            part = self.chunks[c][offset : offset + stop - start]
+            yield from part
+            start += len(part)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._len)
+            if step != 1:
+                return list(self)[i]
+            return list(self.iter_range(start, stop))
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ChunkedEvents index out of range")
+        c, offset = divmod(i, SNAPSHOT_CHUNK)
+        return self.chunks[c][offset]
+
+
+class RangeView:
+    """A run of a snapshot's events (in datetime order) that is sliced on
+    demand instead of copied into a list, so showing one page of a long
+    listing costs one page. Supports len(), indexing, slicing and iteration."""
+
+    __slots__ = ("_events", "_lo", "_hi")
+
+    def __init__(self, events: ChunkedEvents, lo: int, hi: int):
+        self._events = events
+        self._lo = lo
+        self._hi = max(lo, hi)
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __iter__(self):
+        return self._events.iter_range(self._lo, self._hi)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            return self._events[self._lo + start : self._lo + stop : step]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("RangeView index out of range")
+        return self._events[self._lo + i]
+
+
+class Snapshot:
+    """One published version of an EventStore: the events in datetime order
+    (chunks of tuples, see ChunkedEvents) that are never modified. Events
+    that did not change between two versions are the same objects in both; a
+    writer copies an event before changing it (EventStore.writable), so a
+    snapshot never shows an edit that is half done. Safe to read from any
+    thread without locking."""
+
+    __slots__ = ("version", "keys", "events", "_by_id", "_stats")
+
+    def __init__(
+        self,
+        version: int,
+        keys: Tuple[Tuple[str, int], ...],
+        events: ChunkedEvents,
+        stats: Optional[Dict[str, Dict[Any, int]]] = None,
+    ):
+        self.version = version
+        self.keys = keys
+        self.events = events
+        self._by_id: Optional[Dict[Any, Event]] = None
+        self._stats = stats
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    @property
+    def by_id(self) -> Dict[Any, Event]:
+        if self._by_id is None:
+            self._by_id = {e.get("id"): e for e in self.events}
+        return self._by_id
+
+    def range(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> List[Event]:
+        """Like DateIndex.range, on this version."""
+        lo, hi = _range_bounds(self.keys, start, end)
+        return [e for e in self.events[lo:hi] if e.dt is not None]
+
+    def view(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> RangeView:
+        """range() without the copy: O(log n) whatever the size. Unlike
+        range(), events without a valid datetime are not skipped when the
+        bounds take in their raw string (as in sorted_events)."""
+        lo, hi = _range_bounds(self.keys, start, end)
+        return RangeView(self.events, lo, hi)
+
+    def stats(self) -> Dict[str, Dict[Any, int]]:
+        """Statistik counters of this version (copied from the store's engine
+        when published, else counted once on first use)."""
+        if self._stats is None:
+            self._stats = StatsEngine(self.events).snapshot()
+        return self._stats
+
+
+class EventStore(list):
+    """The full list of loaded events plus indexes over it.
+    Reading works like a plain list. Every mutation is reported through
+    storage.log_change(), which calls changed() so the indexes follow.
+    Readers on other threads use snapshot() instead: once one has been taken,
+    changes are published as a new Snapshot when they are logged, and events
+    held by the published snapshot are copied before they are changed."""
+
+    def __init__(self, events: List[Event]):
+        super().__init__(events)
+        self.by_id: Dict[Any, Event] = {e.get("id"): e for e in self}
+        self.by_date = DateIndex(self)
+        self.schedule = StatusScheduler(self.by_id, self)
+        self._text: Optional[TextIndex] = None
+        self._stats: Optional[StatsEngine] = None
+        # event id -> normalized usernames, for O(1) duplicate checks; filled
+        # per event on first use so loading never walks the attendee lists
+        self.attendee_names: Dict[Any, Set[str]] = {}
+        self.reviewer_names: Dict[Any, Set[str]] = {}
+        # username -> event ids attended / reviewed, built on first use
+        self._attending_by_user: Optional[Dict[str, Set[Any]]] = None
+        self._reviewed_by_user: Optional[Dict[str, Set[Any]]] = None
+        # month shards held when the storage backend loads partially (None:
+        # every stored event is here), see storage.require_events()
+        self.shards: Optional[Set[str]] = None
+        # copy-on-write state: the last published snapshot (None until a
+        # reader asks for one) and the events created or copied since, which
+        # no snapshot holds yet and so may be changed in place
+        self.version = 0
+        self._current: Optional[Snapshot] = None
+        self._private: Dict[int, Event] = {}
+        self._keys_generation = -1
+        # date index slots replaced since the last publish (their chunks are
+        # the only ones the next snapshot has to re-make)
+        self._replaced: Set[int] = set()
+        # event id -> position in the list, checked before each use and
+        # rebuilt when stale (a delete shifted it), so writable() can put a
+        # copy in the list without scanning for the original
+        self._positions: Dict[Any, int] = {}
+        self._lock = threading.RLock()
+
+    def attendees_of(self, event_id) -> Set[str]:
+        names = self.attendee_names.get(event_id)
+        if names is None:
+            e = self.by_id.get(event_id)
+            attendees = e.get("attendees", []) if e is not None else []
+            names = self.attendee_names[event_id] = {a.username_lc for a in attendees}
+        return names
+
+    def reviewers_of(self, event_id) -> Set[str]:
+        names = self.reviewer_names.get(event_id)
+        if names is None:
+            e = self.by_id.get(event_id)
+            reviews = e.get("reviews", []) if e is not None else []
+            names = self.reviewer_names[event_id] = {r.username_lc for r in reviews}
+        return names
+
+    def _build_user_index(self):
+        attending: Dict[str, Set[Any]] = {}
+        reviewed: Dict[str, Set[Any]] = {}
+        for event_id in self.by_id:
+            for name in self.attendees_of(event_id):
+                attending.setdefault(name, set()).add(event_id)
+            for name in self.reviewers_of(event_id):
+                reviewed.setdefault(name, set()).add(event_id)
+        self._attending_by_user = attending
+        self._reviewed_by_user = reviewed
+
+    def attended_by(self, username: str) -> List[Event]:
+        """Events `username` RSVP'd to, in datetime order; cost follows the
+        user's own RSVPs, not the number of events."""
+        if self._attending_by_user is None:
+            self._build_user_index()
+        ids = self._attending_by_user.get(username.lower(), ())
+        return self._events_in_order(ids)
+
+    def reviewed_by(self, username: str) -> List[Event]:
+        """Events `username` reviewed, in datetime order (same index and cost
+        as attended_by)."""
+        if self._reviewed_by_user is None:
+            self._build_user_index()
+        ids = self._reviewed_by_user.get(username.lower(), ())
+        return self._events_in_order(ids)
+
+    def _events_in_order(self, ids) -> List[Event]:
+        events = [self.by_id[i] for i in ids if i in self.by_id]
+        return sorted(events, key=lambda x: x.datetime)
+
+    @property
+    def text(self) -> TextIndex:
+        """Keyword index, built on first use so startup doesn't pay for it."""
+        if self._text is None:
+            self._text = TextIndex(self.by_id)
+        return self._text
+
+    def ensure_stats(self) -> StatsEngine:
+        """Statistik counters, built on the first call and updated
+        incrementally from then on (published snapshots carry a copy)."""
+        if self._stats is None:
+            self._stats = StatsEngine(self)
+        return self._stats
+
+    # ---- snapshots ----
+    def snapshot(self) -> Snapshot:
+        """The current published version; no lock once one exists."""
+        snap = self._current
+        if snap is None:
+            with self._lock:
+                if self._current is None:
+                    self._publish()
+                snap = self._current
+        return snap
+
+    def publish(self):
+        """Make the changes reported so far visible to snapshot() readers.
+        Nothing to do while no snapshot has been taken."""
+        if self._current is not None:
+            with self._lock:
+                self._publish()
+
+    def _publish(self):
+        self.version += 1
+        prev, generation = self._current, self.by_date.generation
+        if prev is not None and self._keys_generation == generation:
+            # only slots were replaced: same order and keys, and every chunk
+            # without a replaced slot is shared with the previous version
+            keys = prev.keys
+            events = prev.events
+            if self._replaced:
+                events = events.replaced(self.by_date.events, self._replaced)
+        else:
+            keys = tuple(self.by_date.keys)
+            events = ChunkedEvents.build(self.by_date.events)
+        stats = self._stats.snapshot() if self._stats is not None else None
+        self._current = Snapshot(self.version, keys, events, stats)
+        self._keys_generation = generation
+        self._replaced.clear()
+        self._private.clear()
+
+    def _position(self, e: Event) -> Optional[int]:
+        """Index of `e` in the list (O(1) unless the list was reordered)."""
+        event_id = e.get("id")
+        i = self._positions.get(event_id)
+        if i is None or i >= len(self) or self[i] is not e:
+            self._positions = {x.get("id"): j for j, x in enumerate(self)}
+            i = self._positions.get(event_id)
+        return i if i is not None and self[i] is e else None
+
+    def writable(self, e: Event) -> Event:
+        """The record to change for `e`: `e` itself while it is a copy not
+        reported yet (so no snapshot can hold it), else a copy that takes its
+        place in the list and in by_id. The date index (what snapshots are
+        made of) switches to the copy when the change is reported through
+        changed(). Copying before the first snapshot too keeps a reader that
+        takes it meanwhile from seeing the edit half done."""
+        with self._lock:
+            event_id = e.get("id")
+            if id(e) in self._private or self.by_id.get(event_id) is not e:
+                return e
+            new = e.copy()
+            self._private[id(new)] = new
+            self.by_id[event_id] = new
+            i = self._position(e)
+            if i is not None:
+                self[i] = new
+            return new
+
+    def changed(self, op: str, data: Dict[str, Any]):
+        with self._lock:
+            if op != "add_event" and data.get("id") in self.by_id:
+                e = self.by_id[data["id"]]
+                i = self.by_date.replace(e)
+                if self._current is None:
+                    # in the date index now, so the first snapshot may take
+                    # it: the next change needs a copy again
+                    self._private.pop(id(e), None)
+                elif i is not None:
+                    self._replaced.add(i)
+            self._changed(op, data)
+
+    def _changed(self, op: str, data: Dict[str, Any]):
+        if self._stats is not None:
+            if op == "delete_event":
+                self._stats.remove(data["id"])
+            elif op == "add_event":
+                self._stats.add(data["event"])
+            elif data.get("id") in self.by_id:
+                self._stats.update(self.by_id[data["id"]])
+        if op in ("edit_event", "set_status") and data["id"] in self.by_id:
+            self.schedule.schedule(self.by_id[data["id"]])
+        if op == "add_event":
+            e = data["event"]
+            event_id = e.get("id")
+            if self._current is not None:
+                self._private[id(e)] = e
+            if self and self[-1] is e:  # appended, as add_event callers do
+                self._positions[event_id] = len(self) - 1
+            self.by_id[event_id] = e
+            self.by_date.add(e)
+            self.schedule.schedule(e)
+            self.attendee_names.pop(event_id, None)
+            self.reviewer_names.pop(event_id, None)
+            if self._attending_by_user is not None:
+                for name in self.attendees_of(event_id):
+                    self._attending_by_user.setdefault(name, set()).add(event_id)
+                for name in self.reviewers_of(event_id):
+                    self._reviewed_by_user.setdefault(name, set()).add(event_id)
+            if self._text is not None:
+                self._text.add(e)
+        elif op == "add_attendee":
+            name = data["attendee"].username_lc
+            self.attendees_of(data["id"]).add(name)
+            if self._attending_by_user is not None:
+                self._attending_by_user.setdefault(name, set()).add(data["id"])
+        elif op == "add_review":
+            name = data["review"].username_lc
+            self.reviewers_of(data["id"]).add(name)
+            if self._reviewed_by_user is not None:
+                self._reviewed_by_user.setdefault(name, set()).add(data["id"])
+        elif op == "delete_event":
+            self.by_id.pop(data["id"], None)
+            self.by_date.remove(data["id"])
+            attendees = self.attendee_names.pop(data["id"], None) or set()
+            reviewers = self.reviewer_names.pop(data["id"], None) or set()
+            if self._attending_by_user is not None:
+                for name in attendees:
+                    self._attending_by_user.get(name, set()).discard(data["id"])
+                for name in reviewers:
+                    self._reviewed_by_user.get(name, set()).discard(data["id"])
+            if self._text is not None:
+                self._text.remove(data["id"])
+        elif op == "edit_event":
+            e = self.by_id.get(data["id"])
+            if e is None:
+                return
+            if "datetime" in data["fields"]:
+                self.by_date.move(e)
+            if self._text is not None:
+                self._text.update(e)
+
+    def add_loaded(self, records: List[Dict[str, Any]]):
+        """Add events read from storage later on (nothing to persist)."""
+        for d in records:
+            if d.get("id") in self.by_id:
+                continue
+            e = Event.from_dict(d)
+            self.append(e)
+            self.changed("add_event", {"event": e})
+        self.publish()
+
+    def sync(self, records: List[Dict[str, Any]]):
+        """Bring the store in line with `records` (the merged on-disk state
+        after another process wrote). Only events that differ are re-indexed;
+        existing Event objects are updated in place so references stay valid
+        (unless a published snapshot holds them, see writable())."""
+        fresh = {d.get("id"): d for d in records}
+        for e in [e for e in self if e.get("id") not in fresh]:
+            self.changed("delete_event", {"id": e.get("id")})
+        self[:] = [e for e in self if e.get("id") in fresh]
+        for event_id, d in fresh.items():
+            e = self.by_id.get(event_id)
+            if e is None:
+                e = Event.from_dict(d)
+                self.append(e)
+                self.changed("add_event", {"event": e})
+            elif e is not d and not _same_record(e, d):
+                # re-index from scratch: drop the old entries, update, add back
+                e = self.writable(e)
+                self.changed("delete_event", {"id": event_id})
+                e.update(d)
+                self.changed("add_event", {"event": e})
+        self.publish()
+
+    def sorted_events(self) -> List[Event]:
+        return list(self.snapshot().events)
+
+
+def _same_record(e: Event, d: Dict[str, Any]) -> bool:
+    if e._lazy is not None and isinstance(d, Event) and d._lazy is not None:
+        # both payloads still sit in snapshot files: compare the header fields
+        # and the raw payload bytes instead of decoding them
+        same_header = all(getattr(e, f) == getattr(d, f) for f in Event.FIELDS)
+        return same_header and e._lazy.raw() == d._lazy.raw()
+    return e == d
+
+
+def find_event(events: List[Event], event_id) -> Optional[Event]:
+    """The event with `event_id`: a hash lookup for a store, else a scan."""
+    if isinstance(events, EventStore):
+        return events.by_id.get(event_id)
+    return next((e for e in events if e.get("id") == event_id), None)
+
+
+def writable_event(events: List[Event], e: Event) -> Event:
+    """The record to change for `e` (EventStore.writable); `e` itself for a
+    plain list."""
+    if isinstance(events, EventStore):
+        return events.writable(e)
+    return e
+
+
+def remove_event(events: List[Event], e: Event):
+    """Take `e` out of the list by identity (list.remove would compare every
+    record before it field by field)."""
+    for i, x in enumerate(events):
+        if x is e:
+            del events[i]
+            return
+
+
+def is_attending(events: List[Event], e: Event, username: str) -> bool:
+    """Whether `username` already RSVP'd to `e`; constant time for a store."""
+    name = username.lower()
+    if isinstance(events, EventStore):
+        return name in events.attendees_of(e.get("id"))
+    return any(a.username_lc == name for a in e.get("attendees", []))
+
+
+def has_reviewed(events: List[Event], e: Event, username: str) -> bool:
+    """Whether `username` already reviewed `e`; constant time for a store."""
+    name = username.lower()
+    if isinstance(events, EventStore):
+        return name in events.reviewers_of(e.get("id"))
+    return any(r.username_lc == name for r in e.get("reviews", []))
+
+
+def attended_events(events: List[Event], username: str) -> List[Event]:
+    """Events `username` attends; uses the store's reverse index when possible."""
+    if isinstance(events, EventStore):
+        return events.attended_by(username)
+    return in_display_order([e for e in events if is_attending(events, e, username)])
+
+
+def reviewed_events(events: List[Event], username: str) -> List[Event]:
+    """Events `username` reviewed; uses the store's reverse index when possible."""
+    if isinstance(events, EventStore):
+        return events.reviewed_by(username)
+    return in_display_order([e for e in events if has_reviewed(events, e, username)])
+
+
+def in_display_order(events: List[Event]) -> List[Event]:
+    """Events sorted by datetime: the presorted index order for a store,
+    otherwise a sort of the given list."""
+    if isinstance(events, EventStore):
+        return events.sorted_events()
+    return sorted(events, key=lambda x: x.datetime)
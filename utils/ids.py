@@ -0,0 +1,74 @@
+"""Event id generator.
+
+Ids are 63-bit integers laid out like this, so they sort by creation time,
+stay unique across processes and fit the int64 columns of the SQLite table
+and the binary snapshot key index:
+
+    | 41 bits: ms since ID_EPOCH | 10 bits: node | 12 bits: sequence |
+
+The node is claimed from a counter in the data directory when storage is
+configured (falling back to a mix of host name and pid), the sequence counts
+ids handed out within the same millisecond (4096 per ms; past that the
+generator borrows the next millisecond). Ids made before this scheme were
+plain millisecond timestamps, which are all smaller than any new id.
+"""
+import os
+import socket
+import threading
+import time
+import zlib
+
+ID_EPOCH_MS = 1577836800000  # 2020-01-01T00:00:00Z
+NODE_BITS = 10
+SEQ_BITS = 12
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQ = (1 << SEQ_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = -1
+_seq = 0
+_node = None
+
+
+def default_node() -> int:
+    """A node number for this process: host name and pid mixed together."""
+    host = zlib.crc32(socket.gethostname().encode("utf-8"))
+    return (host ^ (os.getpid() * 2654435761)) & MAX_NODE
+
+
+def set_node(node: int):
+    """Use `node` for this process (see storage.claim_id_node)."""
+    global _node
+    if not 0 <= node <= MAX_NODE:
+        raise ValueError(f"node must be between 0 and {MAX_NODE}")
+    with _lock:
+        _node = node
+
+
+def _after_fork():
+    # a forked worker must not keep handing out its parent's node/sequence
+    global _lock, _last_ms, _seq, _node
+    _lock = threading.Lock()
+    _last_ms, _seq, _node = -1, 0, None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def new_event_id() -> int:
+    """A new id, strictly greater than the previous one from this process."""
+    global _last_ms, _seq, _node
+    with _lock:
+        if _node is None:
+            _node = default_node()
+        now = int(time.time() * 1000) - ID_EPOCH_MS
+        if now > _last_ms:
+            _last_ms, _seq = now, 0
+        elif _seq < MAX_SEQ:
+            # same millisecond, or the clock went back: keep counting
+            _seq += 1
+        else:
+            _last_ms, _seq = _last_ms + 1, 0
+        return (_last_ms << (NODE_BITS + SEQ_BITS)) | (_node << SEQ_BITS) | _seq
+
@@ -0,0 +1,80 @@
+"""Password key derivation.
+
+A stored password records how it was derived, so the parameters can be
+raised later and old hashes upgraded when their owner next logs in:
+
+    {"algorithm": "scrypt", "n": 16384, "r": 8, "p": 1, "salt": ..., "hash": ...}
+    {"algorithm": "pbkdf2_sha256", "iterations": 600000, "salt": ..., "hash": ...}
+
+Records from before this format ({"salt", "hash"} only) are PBKDF2-SHA256
+at 100,000 iterations. Only hashlib is imported here, and the pool workers
+(utils.auth) are started without their parent's main module, so this is all
+a worker loads.
+"""
+import binascii
+import hashlib
+import hmac
+import os
+from typing import Dict, Any, Optional
+
+LEGACY_PARAMS = {"algorithm": "pbkdf2_sha256", "iterations": 100_000}
+if hasattr(hashlib, "scrypt"):
+    # about as slow as the legacy setting, but needs 16 MiB per guess
+    DEFAULT_PARAMS = {"algorithm": "scrypt", "n": 2**14, "r": 8, "p": 1}
+else:  # Python built against an OpenSSL without scrypt
+    DEFAULT_PARAMS = {"algorithm": "pbkdf2_sha256", "iterations": 600_000}
+PARAM_KEYS = {"pbkdf2_sha256": ("iterations",), "scrypt": ("n", "r", "p")}
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def params_of(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Algorithm and parameters of a stored password record."""
+    algorithm = stored.get("algorithm")
+    if algorithm is None:
+        return dict(LEGACY_PARAMS)
+    if algorithm not in PARAM_KEYS:
+        raise ValueError(f"unknown password algorithm: {algorithm}")
+    return {"algorithm": algorithm, **{k: stored[k] for k in PARAM_KEYS[algorithm]}}
+
+
+def _derive(password: str, salt: bytes, params: Dict[str, Any]) -> bytes:
+    secret = password.encode("utf-8")
+    if params["algorithm"] == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        # OpenSSL's default 32 MiB cap is too small past n=2**14
+        maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+        return hashlib.scrypt(
+            secret, salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=HASH_BYTES
+        )
+    return hashlib.pbkdf2_hmac("sha256", secret, salt, params["iterations"])
+
+
+def hash_password(
+    password: str,
+    params: Optional[Dict[str, Any]] = None,
+    salt: Optional[bytes] = None,
+) -> Dict[str, Any]:
+    """A new stored record for `password` (DEFAULT_PARAMS unless given)."""
+    params = dict(params or DEFAULT_PARAMS)
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    dk = _derive(password, salt, params)
+    return {
+        **params,
+        "salt": binascii.hexlify(salt).decode(),
+        "hash": binascii.hexlify(dk).decode(),
+    }
+
+
+def verify_password(stored: Dict[str, Any], attempt: str) -> bool:
+    salt = binascii.unhexlify(stored["salt"].encode())
+    dk = _derive(attempt, salt, params_of(stored))
+    return hmac.compare_digest(binascii.hexlify(dk).decode(), stored["hash"])
+
+
+def needs_rehash(
+    stored: Dict[str, Any], params: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Whether `stored` was derived with other than the current parameters."""
+    return params_of(stored) != (params or DEFAULT_PARAMS)
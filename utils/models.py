@@ -0,0 +1,377 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from utils.detail_cache import details
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+
+class Record:
+    """Slot-based record that still behaves like the JSON dict it came from
+    (get / [] / setdefault / update / items), so code written against plain
+    dicts keeps working. Keys outside FIELDS are kept in `extra` so the
+    record round-trips to the same JSON object.
+    A record may leave part of its fields behind `_lazy`, a payload reference
+    (binary snapshot, SQLite rows) whose load() returns them; they are merged
+    in on first access and can be dropped again by the detail cache."""
+
+    __slots__ = ("extra", "_lazy", "_loaded")
+    FIELDS: tuple = ()
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs):
+        self.extra = {}
+        self._lazy = None
+        self._loaded = None  # (reference, keys merged from it) while cached
+        for f in self.FIELDS:
+            object.__setattr__(self, f, MISSING)
+        for k, v in (data or {}).items():
+            self[k] = v
+        for k, v in kwargs.items():
+            self[k] = v
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        return data if isinstance(data, cls) else cls(data)
+
+    def _on_change(self, key: str):
+        pass
+
+    def _load_lazy(self):
+        ref, self._lazy = self._lazy, None
+        payload = ref.load()
+        keys = [k for k in payload if k not in self]  # fields set since win
+        for k in keys:
+            self[k] = payload[k]
+        self._loaded = (ref, keys)
+        details.add(self)
+
+    def _unload(self):
+        """Drop the fields merged by _load_lazy and go back to the reference."""
+        ref, keys = self._loaded
+        self._loaded = None
+        for k in keys:
+            if k in self.FIELDS:
+                setattr(self, k, MISSING)
+            else:
+                self.extra.pop(k, None)
+        self._lazy = ref
+
+    def release_details(self):
+        """The loaded payload is being modified: keep it in memory for good."""
+        if self._loaded is not None:
+            self._loaded = None
+            details.discard(self)
+
+    def copy(self):
+        """A copy that can be changed without touching this record: list
+        fields get new lists (their items are shared) and a payload still
+        behind its lazy reference stays there."""
+        new = object.__new__(type(self))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                object.__setattr__(new, name, getattr(self, name))
+        new.extra = dict(self.extra)
+        for f in self.FIELDS:
+            v = getattr(self, f)
+            if isinstance(v, list):
+                object.__setattr__(new, f, list(v))
+        if new._loaded is not None:
+            details.add(new)  # unchanged payload: may be dropped like ours
+        return new
+
+    def load_details(self):
+        """Load the detail payload now if it is still lazy and mark it as
+        recently used."""
+        if self._lazy is not None:
+            self._load_lazy()
+        else:
+            details.touch(self)
+
+    def payload_source(self):
+        """The reference the record's payload can be read back from unchanged
+        (pending or loaded and unmodified), else None. Keys outside FIELDS
+        always live in the payload, so setting one drops the reference."""
+        if self._lazy is not None:
+            return self._lazy
+        return self._loaded[0] if self._loaded is not None else None
+
+    def __getitem__(self, key: str):
+        if key in self.FIELDS:
+            v = getattr(self, key)
+            if v is MISSING:
+                if self._lazy is not None:
+                    self._load_lazy()
+                    return self[key]
+                raise KeyError(key)
+            return v
+        if self._lazy is not None and key not in self.extra:
+            self._load_lazy()
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value):
+        if self._lazy is not None and (
+            key not in self.FIELDS or getattr(self, key) is MISSING
+        ):
+            self._load_lazy()  # the payload may hold this key
+        if self._loaded is not None and (
+            key in self._loaded[1] or key not in self.FIELDS
+        ):
+            self.release_details()  # the stored payload no longer matches
+        if key in self.FIELDS:
+            setattr(self, key, value)
+            self._on_change(key)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.FIELDS:
+            if getattr(self, key) is MISSING and self._lazy is not None:
+                self._load_lazy()
+            return getattr(self, key) is not MISSING
+        if self._lazy is not None and key not in self.extra:
+            self._load_lazy()
+        return key in self.extra
+
+    def get(self, key: str, default=None):
+        if key in self.FIELDS:
+            v = getattr(self, key)
+            if v is MISSING and self._lazy is not None:
+                self._load_lazy()
+                v = getattr(self, key)
+            return default if v is MISSING else v
+        if self._lazy is not None and key not in self.extra:
+            self._load_lazy()
+        return self.extra.get(key, default)
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other: Dict[str, Any]):
+        for k, v in other.items():
+            self[k] = v
+
+    def keys(self):
+        return [k for k, _ in self.items()]
+
+    def items(self):
+        if self._lazy is not None:
+            self._load_lazy()
+        res = [(f, getattr(self, f)) for f in self.FIELDS]
+        return [(k, v) for k, v in res if v is not MISSING] + list(self.extra.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {}
+        for k, v in self.items():
+            if isinstance(v, list):
+                v = [x.to_dict() if isinstance(x, Record) else x for x in v]
+            d[k] = v
+        return d
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Attendee(Record):
+    __slots__ = ("username", "timestamp", "username_lc")
+    FIELDS = ("username", "timestamp")
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs):
+        self.username_lc = ""
+        super().__init__(data, **kwargs)
+
+    def _on_change(self, key: str):
+        if key == "username":
+            self.username_lc = str(self.username).strip().lower()
+
+
+class Review(Record):
+    __slots__ = ("username", "rating", "comment", "timestamp", "username_lc")
+    FIELDS = ("username", "rating", "comment", "timestamp")
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs):
+        self.username_lc = ""
+        super().__init__(data, **kwargs)
+
+    def _on_change(self, key: str):
+        if key == "username":
+            self.username_lc = str(self.username).strip().lower()
+
+
+# Fields that filter_menu / keyword search compare case-insensitively.
+SEARCH_FIELDS = (
+    "name",
+    "location",
+    "address",
+    "organizer",
+    "category",
+    "status",
+    "htm",
+    "description",
+)
+
+
+class Event(Record):
+    """An event parsed once at load time: `dt`, `date_ordinal` and `month`
+    ("YYYY-MM") are derived from "datetime" and `lc` holds lowercased copies
+    of SEARCH_FIELDS. Derived values are refreshed whenever a field is set
+    through the dict interface (e["datetime"] = ...)."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "datetime",
+        "location",
+        "address",
+        "organizer",
+        "description",
+        "htm",
+        "category",
+        "status",
+        "attendees",
+        "reviews",
+        "attendee_count",
+        "review_count",
+        "rating_sum",
+        "rating_hist",
+        "dt",
+        "date_ordinal",
+        "month",
+        "lc",
+    )
+    FIELDS = (
+        "id",
+        "name",
+        "datetime",
+        "location",
+        "address",
+        "organizer",
+        "description",
+        "htm",
+        "category",
+        "status",
+        "attendees",
+        "reviews",
+        "attendee_count",
+        "review_count",
+        "rating_sum",
+        "rating_hist",
+    )
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs):
+        self.dt = None
+        self.date_ordinal = None
+        self.month = None
+        self.lc = {}
+        super().__init__(data, **kwargs)
+        backfill_aggregates(self)
+
+    def copy(self):
+        new = super().copy()
+        new.lc = dict(self.lc)
+        return new
+
+    @property
+    def avg_rating(self) -> Optional[float]:
+        count = self.get("review_count", 0)
+        return round(self.get("rating_sum", 0) / count, 2) if count else None
+
+    def _on_change(self, key: str):
+        if key == "datetime":
+            try:
+                self.dt = datetime.fromisoformat(self.datetime)
+            except Exception:
+                self.dt = None
+            self.date_ordinal = self.dt.toordinal() if self.dt else None
+            self.month = f"{self.dt.year:04d}-{self.dt.month:02d}" if self.dt else None
+        elif key == "attendees":
+            self.attendees = [Attendee.from_dict(a) for a in self.attendees or []]
+        elif key == "reviews":
+            self.reviews = [Review.from_dict(r) for r in self.reviews or []]
+        elif key in SEARCH_FIELDS:
+            v = getattr(self, key)
+            self.lc[key] = "" if v is MISSING or v is None else str(v).lower()
+
+
+# --------------------------
+# Running aggregates (stored in the event record)
+# --------------------------
+AGGREGATE_FIELDS = ("attendee_count", "review_count", "rating_sum", "rating_hist")
+
+
+def _rating_hist(reviews) -> List[int]:
+    hist = [0] * 5
+    for r in reviews:
+        rating = r.get("rating", 0)
+        if isinstance(rating, int) and 1 <= rating <= 5:
+            hist[rating - 1] += 1
+    return hist
+
+
+def backfill_aggregates(e):
+    """Fill attendee_count / review_count / rating_sum / rating_hist from the
+    attendee and review lists for records saved before they existed."""
+    if "attendee_count" not in e:
+        e["attendee_count"] = len(e.get("attendees", []))
+    if "review_count" not in e:
+        e["review_count"] = len(e.get("reviews", []))
+    if "rating_sum" not in e:
+        e["rating_sum"] = sum(r.get("rating", 0) for r in e.get("reviews", []))
+    if "rating_hist" not in e:
+        e["rating_hist"] = _rating_hist(e.get("reviews", []))
+
+
+def append_attendee(e, attendee):
+    """Append an attendee to an event (Event or plain dict) and keep the
+    running attendee_count in step."""
+    backfill_aggregates(e)
+    attendees = e.setdefault("attendees", [])
+    if isinstance(e, Record):
+        e.release_details()
+    attendees.append(attendee)
+    e["attendee_count"] += 1
+
+
+def append_review(e, review):
+    """Append a review and update review_count, rating_sum and rating_hist."""
+    backfill_aggregates(e)
+    reviews = e.setdefault("reviews", [])
+    if isinstance(e, Record):
+        e.release_details()
+    reviews.append(review)
+    rating = review.get("rating", 0)
+    e["review_count"] += 1
+    e["rating_sum"] += rating
+    if isinstance(rating, int) and 1 <= rating <= 5:
+        e["rating_hist"][rating - 1] += 1
+
+
+def lazy_event(summary: Dict[str, Any], ref) -> Event:
+    """An Event built from summary fields only; the rest (attendees, reviews,
+    unknown keys) stays behind `ref` until one of them is read."""
+    if not all(f in summary for f in AGGREGATE_FIELDS):
+        # the aggregates have to be computed from the lists, so load them now
+        return Event({**summary, **ref.load()})
+    e = Event(summary)
+    e._lazy = ref
+    return e
+
+
+def to_jsonable(o):
+    """json.dump `default=` hook for Record objects."""
+    if isinstance(o, Record):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
@@ -24,11 +24,19 @@ def parse_date(s: str) -> Optional[date]:
         return None
 
 
+def format_datetime(dt: datetime) -> str:
+    if dt.hour == 0 and dt.minute == 0:
+        return dt.strftime("%Y-%m-%d")
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+
 def format_dt(dt_str: str) -> str:
     try:
-        dt = datetime.fromisoformat(dt_str)
-        if dt.hour == 0 and dt.minute == 0:
-            return dt.strftime("%Y-%m-%d")
-        return dt.strftime("%Y-%m-%d %H:%M")
+        return format_datetime(datetime.fromisoformat(dt_str))
     except Exception:
         return dt_str
+
+
+def format_event_dt(e) -> str:
+    """format_dt for an Event, reusing its pre-parsed datetime."""
+    return format_datetime(e.dt) if e.dt else e.get("datetime", "")
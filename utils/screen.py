@@ -0,0 +1,112 @@
+"""Terminal output one screen at a time.
+
+main.py swaps sys.stdout for a FrameWriter: print() only appends to a
+buffer, and the buffer goes to the terminal in one write() when the output
+is flushed - which input() does before it reads, so a whole menu or table
+page plus its prompt arrives as one packet (over SSH: one round of
+terminal drawing instead of one per line). clear() starts the next screen
+with ANSI escapes instead of running clear(1) in a shell.
+"""
+import io
+import os
+import sys
+from typing import List, Optional
+
+# cursor home, erase the screen and its scrollback (what clear(1) sends)
+CLEAR_SEQUENCE = "\033[H\033[2J\033[3J"
+
+_ansi: Optional[bool] = None  # whether the terminal understands CLEAR_SEQUENCE
+
+
+def _enable_ansi() -> bool:
+    """Turn on escape sequence handling of a Windows console (Windows 10+)."""
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+def _write_all(stream, text: str):
+    """Write `text` to `stream`'s file descriptor in as few write() calls
+    as the kernel allows (one, for anything a terminal screen holds)."""
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):  # not a real file
+        stream.write(text)
+        stream.flush()
+        return
+    stream.flush()  # anything written to it directly comes first
+    data = text.encode(stream.encoding or "utf-8", stream.errors or "strict")
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+class FrameWriter(io.TextIOBase):
+    """Stands in for sys.stdout and holds everything written until flush().
+    It has no fileno(), so input() writes its prompt here and flushes it
+    together with the screen rather than handing it to readline."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._parts: List[str] = []
+
+    @property
+    def encoding(self):
+        return self.stream.encoding
+
+    @property
+    def errors(self):
+        return self.stream.errors
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+    def write(self, s: str) -> int:
+        self._parts.append(s)
+        return len(s)
+
+    def flush(self):
+        if self._parts:
+            text = "".join(self._parts)
+            self._parts.clear()
+            _write_all(self.stream, text)
+
+
+def install() -> FrameWriter:
+    """Buffer sys.stdout per screen from now on (idempotent)."""
+    if not isinstance(sys.stdout, FrameWriter):
+        sys.stdout = FrameWriter(sys.stdout)
+    return sys.stdout
+
+
+def clear():
+    """Start a new screen."""
+    global _ansi
+    if _ansi is None:
+        _ansi = _enable_ansi()
+    out = sys.stdout
+    if not _ansi:
+        out.flush()
+        os.system("cls")
+        return
+    # text printed since the last input() goes out before it is cleared
+    # (nothing is pending in the usual prompt -> clear -> draw cycle)
+    out.flush()
+    out.write(CLEAR_SEQUENCE)
+    if not isinstance(out, FrameWriter):
+        out.flush()
+    # a FrameWriter sends the sequence with the rest of the new screen
@@ -0,0 +1,348 @@
+"""Binary snapshot format for events and users.
+
+Layout (little-endian):
+
+    file header   magic, format version, kind, record count and the offsets
+                  of the string table, payload area and key index
+    record table  one fixed-width header per record: presence mask, flags,
+                  the schema fields (ints inline, strings as (offset, length)
+                  into the string table) and (offset, length) of its payload
+    string table  UTF-8 strings, each distinct value stored once
+    payloads      compact JSON of every field the header does not hold
+                  (attendees, reviews, unknown keys)
+    key index     (id, record number) pairs sorted by id
+
+The file is memory-mapped, so loading decodes only the record headers:
+events come back as Event records whose payload stays in the file until a
+field from it is first read. JSON stays the interchange format; see
+`python -m utils.snapshot --help` for the converter.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import List, Dict, Any, Optional, Iterable
+from utils.models import Event, MISSING, Record, lazy_event, to_jsonable
+
+MAGIC = b"IARB"
+FORMAT_VERSION = 1
+KIND_EVENTS = 0
+KIND_USERS = 1
+
+FILE_HEADER = struct.Struct("<4sHHIQQQ")
+KEY_ENTRY = struct.Struct("<qI")
+
+# (field, type): "int" is stored inline as int64, "str" as a string table
+# reference, "hist" as five uint32 counters. Values that don't fit their type
+# go to the payload instead.
+SCHEMAS = {
+    KIND_EVENTS: (
+        ("id", "int"),
+        ("name", "str"),
+        ("datetime", "str"),
+        ("location", "str"),
+        ("address", "str"),
+        ("organizer", "str"),
+        ("description", "str"),
+        ("htm", "str"),
+        ("category", "str"),
+        ("status", "str"),
+        ("attendee_count", "int"),
+        ("review_count", "int"),
+        ("rating_sum", "int"),
+        ("rating_hist", "hist"),
+    ),
+    KIND_USERS: (
+        ("username", "str"),
+        ("role", "str"),
+    ),
+}
+_CODES = {"int": "q", "str": "II", "hist": "5I"}
+_WIDTHS = {"int": 1, "str": 2, "hist": 5}
+
+# record flag: a header field's value was moved to the payload, so the
+# payload must be read before the record is used (Event.lc needs it)
+FLAG_EAGER = 1
+
+INT64 = (-(2**63), 2**63 - 1)
+
+
+def _record_struct(kind: int) -> struct.Struct:
+    codes = "".join(_CODES[t] for _, t in SCHEMAS[kind])
+    return struct.Struct("<II" + codes + "QI")
+
+
+def _raw_value(r, field: str):
+    """A field's value without triggering a lazy payload load."""
+    if isinstance(r, Record):
+        if field in r.FIELDS:
+            return getattr(r, field)
+        return r.extra.get(field, MISSING)
+    return r.get(field, MISSING)
+
+
+def _fits(kind: str, v) -> bool:
+    if kind == "str":
+        return isinstance(v, str)
+    if kind == "int":
+        return type(v) is int and INT64[0] <= v <= INT64[1]
+    return (
+        isinstance(v, list)
+        and len(v) == 5
+        and all(type(x) is int and 0 <= x < 2**32 for x in v)
+    )
+
+
+# --------------------------
+# Writing
+# --------------------------
+def write(f, records: Iterable[Dict[str, Any]], kind: int):
+    """Serialize `records` (dicts or Records) into the binary file `f`.
+    Records whose payload is still the one read from a snapshot (unread, or
+    loaded and unmodified) get their payload bytes copied as-is, unless a
+    header field of theirs has to move into the payload."""
+    schema = SCHEMAS[kind]
+    rec = _record_struct(kind)
+    strings: Dict[str, int] = {}
+    string_chunks: List[bytes] = []
+    string_size = 0
+    payload_chunks: List[bytes] = []
+    payload_size = 0
+    headers = []
+    keys = []
+
+    def intern(s: str):
+        nonlocal string_size
+        data = s.encode("utf-8")
+        off = strings.get(s)
+        if off is None:
+            off = strings[s] = string_size
+            string_chunks.append(data)
+            string_size += len(data)
+        return (off, len(data))
+
+    for n, r in enumerate(records):
+        if kind == KIND_EVENTS:
+            r = Event.from_dict(r)  # fills the aggregate fields
+        mask = flags = 0
+        values: List[int] = []
+        stored = set()
+        for bit, (name, t) in enumerate(schema):
+            v = _raw_value(r, name)
+            if v is not MISSING and _fits(t, v):
+                mask |= 1 << bit
+                stored.add(name)
+                if t == "str":
+                    values.extend(intern(v))
+                elif t == "int":
+                    values.append(v)
+                else:
+                    values.extend(v)
+            else:
+                if v is not MISSING:
+                    flags |= FLAG_EAGER
+                values.extend([0] * _WIDTHS[t])
+        ref = r.payload_source() if isinstance(r, Record) else None
+        # a header field whose value no longer fits has to join the payload
+        if isinstance(ref, PayloadRef) and ref.snapshot.kind == kind and not flags:
+            payload = ref.raw()
+        else:
+            rest = {k: v for k, v in r.items() if k not in stored}
+            payload = b""
+            if rest:
+                text = json.dumps(rest, ensure_ascii=False, default=to_jsonable)
+                payload = text.encode("utf-8")
+        headers.append((mask, flags, *values, payload_size, len(payload)))
+        payload_chunks.append(payload)
+        payload_size += len(payload)
+        if kind == KIND_EVENTS and mask & 1:
+            keys.append((values[0], n))
+
+    strings_off = FILE_HEADER.size + rec.size * len(headers)
+    payload_off = strings_off + string_size
+    index_off = payload_off + payload_size
+    count = len(headers)
+    f.write(
+        FILE_HEADER.pack(
+            MAGIC, FORMAT_VERSION, kind, count, strings_off, payload_off, index_off
+        )
+    )
+    for h in headers:
+        f.write(rec.pack(*h))
+    f.write(b"".join(string_chunks))
+    f.write(b"".join(payload_chunks))
+    for key, n in sorted(keys):
+        f.write(KEY_ENTRY.pack(key, n))
+
+
+# --------------------------
+# Reading
+# --------------------------
+class PayloadRef:
+    """Where a record's payload lives in a snapshot (see Record._lazy)."""
+
+    __slots__ = ("snapshot", "index")
+
+    def __init__(self, snapshot: "Snapshot", index: int):
+        self.snapshot = snapshot
+        self.index = index
+
+    def raw(self) -> bytes:
+        return self.snapshot.payload_bytes(self.index)
+
+    def load(self) -> Dict[str, Any]:
+        return self.snapshot.payload(self.index)
+
+
+class Snapshot:
+    """Read access to a snapshot file through a memory map (a plain read on
+    Windows, where a mapped file can't be replaced by the next save)."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if os.name == "nt" or os.fstat(f.fileno()).st_size == 0:
+                self.buf = f.read()
+            else:
+                self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buf) < FILE_HEADER.size:
+            raise ValueError(f"{path}: not a snapshot file")
+        (
+            magic,
+            version,
+            self.kind,
+            self.count,
+            self.strings_off,
+            self.payload_off,
+            self.index_off,
+        ) = FILE_HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or self.kind not in SCHEMAS:
+            raise ValueError(f"{path}: not a snapshot file (or unsupported version)")
+        self.schema = SCHEMAS[self.kind]
+        self.rec = _record_struct(self.kind)
+        self._strings: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, off: int, length: int) -> str:
+        if not length:
+            return ""  # shares its offset with the next string in the table
+        s = self._strings.get(off)
+        if s is None:
+            start = self.strings_off + off
+            s = self._strings[off] = str(self.buf[start : start + length], "utf-8")
+        return s
+
+    def _header(self, i: int):
+        return self.rec.unpack_from(self.buf, FILE_HEADER.size + i * self.rec.size)
+
+    def summary(self, i: int) -> Dict[str, Any]:
+        """The header fields of record `i` (no payload)."""
+        h = self._header(i)
+        mask = h[0]
+        out: Dict[str, Any] = {}
+        pos = 2
+        for bit, (name, t) in enumerate(self.schema):
+            width = _WIDTHS[t]
+            if mask & (1 << bit):
+                if t == "str":
+                    out[name] = self._string(h[pos], h[pos + 1])
+                elif t == "int":
+                    out[name] = h[pos]
+                else:
+                    out[name] = list(h[pos : pos + 5])
+            pos += width
+        return out
+
+    def flags(self, i: int) -> int:
+        return self._header(i)[1]
+
+    def payload_bytes(self, i: int) -> bytes:
+        h = self._header(i)
+        start = self.payload_off + h[-2]
+        return bytes(self.buf[start : start + h[-1]])
+
+    def payload(self, i: int) -> Dict[str, Any]:
+        data = self.payload_bytes(i)
+        return json.loads(data) if data else {}
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Record `i` as a plain dict (header fields and payload)."""
+        d = self.summary(i)
+        d.update(self.payload(i))
+        return d
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [self.record(i) for i in range(self.count)]
+
+    def find(self, key: int) -> Optional[int]:
+        """Record number of the event with id `key` (binary search over the
+        key index)."""
+        lo, hi = 0, (len(self.buf) - self.index_off) // KEY_ENTRY.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, i = KEY_ENTRY.unpack_from(
+                self.buf, self.index_off + mid * KEY_ENTRY.size
+            )
+            if found == key:
+                return i
+            if found < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+def load_events(path: str) -> List[Event]:
+    """Events from an events snapshot. Only headers are decoded; attendees,
+    reviews and unknown keys are read from the map on first access."""
+    snap = Snapshot(path)
+    if snap.kind != KIND_EVENTS:
+        raise ValueError(f"{path}: not an events snapshot")
+    events = []
+    for i in range(snap.count):
+        e = lazy_event(snap.summary(i), PayloadRef(snap, i))
+        if e._lazy is not None and snap.flags(i) & FLAG_EAGER:
+            e._load_lazy()
+        events.append(e)
+    return events
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """Every record of a snapshot as plain dicts (users, export)."""
+    return Snapshot(path).records()
+
+
+# --------------------------
+# Converter
+# --------------------------
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    from utils import storage
+
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.snapshot",
+        description="Convert between JSON and the binary snapshot format.",
+    )
+    parser.add_argument("direction", choices=("to-binary", "to-json"))
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument(
+        "--kind",
+        choices=("events", "users"),
+        default="events",
+        help="record type when converting to binary (default: events)",
+    )
+    args = parser.parse_args(argv)
+    if args.direction == "to-binary":
+        kind = KIND_USERS if args.kind == "users" else KIND_EVENTS
+        records = storage.load_json(args.src, [])
+        storage.save_snapshot(args.dst, records, kind)
+    else:
+        records = load_records(args.src)
+        storage.save_json(args.dst, records)
+    print(f"{len(records)} records: {args.src} -> {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import json
+import sqlite3
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+from utils.models import Event, backfill_aggregates, lazy_event
+
+DB_FILE = "data/events.db"
+
+EVENT_COLUMNS = (
+    "id",
+    "name",
+    "datetime",
+    "location",
+    "address",
+    "organizer",
+    "description",
+    "htm",
+    "category",
+    "status",
+    "attendee_count",
+    "review_count",
+    "rating_sum",
+    "rating_hist",
+)
+# running aggregates (NULL = not known yet, backfilled from the lists on load)
+AGGREGATE_COLUMNS = ("attendee_count", "review_count", "rating_sum", "rating_hist")
+# columns holding JSON-encoded values
+JSON_COLUMNS = ("rating_hist",)
+SELECT_EVENTS = "SELECT %s, extra FROM events" % ", ".join(EVENT_COLUMNS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    datetime TEXT,
+    location TEXT,
+    address TEXT,
+    organizer TEXT,
+    description TEXT,
+    htm TEXT,
+    category TEXT,
+    status TEXT,
+    extra TEXT,
+    attendee_count INTEGER DEFAULT 0,
+    review_count INTEGER DEFAULT 0,
+    rating_sum INTEGER DEFAULT 0,
+    rating_hist TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_datetime ON events(datetime);
+CREATE INDEX IF NOT EXISTS idx_events_location ON events(location COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_events_category ON events(category);
+CREATE INDEX IF NOT EXISTS idx_events_status ON events(status);
+CREATE TABLE IF NOT EXISTS attendees (
+    event_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_attendees_event_user
+    ON attendees(event_id, username COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_attendees_user ON attendees(username COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS reviews (
+    event_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    rating INTEGER,
+    comment TEXT,
+    timestamp TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_event_user
+    ON reviews(event_id, username COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY COLLATE NOCASE,
+    password TEXT,
+    role TEXT
+);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def connect(path: str = DB_FILE) -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(path, check_same_thread=False)
+        _conn.executescript(SCHEMA)
+        _migrate(_conn)
+    return _conn
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Add aggregate columns to databases created before they existed."""
+    have = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    if "attendee_count" in have:
+        return
+    with conn:
+        for col in ("attendee_count", "review_count", "rating_sum"):
+            conn.execute(f"ALTER TABLE events ADD COLUMN {col} INTEGER DEFAULT 0")
+        conn.execute("ALTER TABLE events ADD COLUMN rating_hist TEXT")
+        conn.execute(
+            "UPDATE events SET "
+            "attendee_count = (SELECT COUNT(*) FROM attendees WHERE event_id = id), "
+            "review_count = (SELECT COUNT(*) FROM reviews WHERE event_id = id), "
+            "rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews "
+            "WHERE event_id = id)"
+        )
+    # rating_hist stays NULL and is backfilled from the reviews on load
+
+
+def is_empty() -> bool:
+    conn = connect()
+    return conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+
+# --------------------------
+# Row <-> dict conversion
+# --------------------------
+def _insert_event(conn: sqlite3.Connection, e: Dict[str, Any]):
+    if any(c not in e for c in AGGREGATE_COLUMNS):
+        # raw JSON from before the aggregates existed: store them filled in
+        # so loading never has to read the lists to compute them
+        e = dict(e)
+        backfill_aggregates(e)
+    extra = {
+        k: v
+        for k, v in e.items()
+        if k not in EVENT_COLUMNS and k not in ("attendees", "reviews")
+    }
+    values = [
+        json.dumps(e[c]) if c in JSON_COLUMNS and c in e else e.get(c)
+        for c in EVENT_COLUMNS
+    ]
+    conn.execute(
+        "INSERT OR REPLACE INTO events (%s, extra) VALUES (%s)"
+        % (", ".join(EVENT_COLUMNS), ",".join("?" * (len(EVENT_COLUMNS) + 1))),
+        values + [json.dumps(extra) if extra else None],
+    )
+    for a in e.get("attendees", []):
+        _insert_attendee(conn, e["id"], a)
+    for r in e.get("reviews", []):
+        _insert_review(conn, e["id"], r)
+
+
+def _insert_attendee(
+    conn: sqlite3.Connection, event_id, a: Dict[str, Any]
+) -> bool:
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO attendees VALUES (?,?,?)",
+        (event_id, a.get("username", ""), a.get("timestamp")),
+    )
+    return cur.rowcount == 1
+
+
+def _insert_review(
+    conn: sqlite3.Connection, event_id, r: Dict[str, Any]
+) -> bool:
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO reviews VALUES (?,?,?,?,?)",
+        (
+            event_id,
+            r.get("username", ""),
+            r.get("rating"),
+            r.get("comment"),
+            r.get("timestamp"),
+        ),
+    )
+    return cur.rowcount == 1
+
+
+def _row_to_summary(row: tuple) -> Dict[str, Any]:
+    """An `events` row as a dict without attendees and reviews."""
+    e = dict(zip(EVENT_COLUMNS, row[: len(EVENT_COLUMNS)]))
+    for c in AGGREGATE_COLUMNS:
+        if e[c] is None:
+            del e[c]
+        elif c in JSON_COLUMNS:
+            e[c] = json.loads(e[c])
+    if row[-1]:
+        e.update(json.loads(row[-1]))
+    return e
+
+
+# --------------------------
+# Events
+# --------------------------
+def load_event_summaries() -> List[Dict[str, Any]]:
+    """Every event without its attendees and reviews (see DetailRef)."""
+    rows = connect().execute(f"{SELECT_EVENTS} ORDER BY rowid").fetchall()
+    return [_row_to_summary(row) for row in rows]
+
+
+def load_details(event_id) -> Dict[str, Any]:
+    """Attendees and reviews of one event (indexed by event id)."""
+    conn = connect()
+    attendees = [
+        {"username": username, "timestamp": ts}
+        for username, ts in conn.execute(
+            "SELECT username, timestamp FROM attendees WHERE event_id = ? "
+            "ORDER BY rowid",
+            (event_id,),
+        )
+    ]
+    reviews = [
+        {"username": username, "rating": rating, "comment": comment, "timestamp": ts}
+        for username, rating, comment, ts in conn.execute(
+            "SELECT username, rating, comment, timestamp FROM reviews "
+            "WHERE event_id = ? ORDER BY rowid",
+            (event_id,),
+        )
+    ]
+    return {"attendees": attendees, "reviews": reviews}
+
+
+class DetailRef:
+    """Lazy payload reference (see models.Record) for one event's rows."""
+
+    __slots__ = ("event_id",)
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+
+    def load(self) -> Dict[str, Any]:
+        return load_details(self.event_id)
+
+    def raw(self) -> None:
+        # attendees and reviews only change together with the aggregate
+        # columns, so comparing the summaries is enough
+        return None
+
+
+def save_events(events: List[Dict[str, Any]]):
+    conn = connect()
+    with conn:
+        conn.execute("DELETE FROM attendees")
+        conn.execute("DELETE FROM reviews")
+        conn.execute("DELETE FROM events")
+        for e in events:
+            _insert_event(conn, e)
+
+
+def apply_change(conn: sqlite3.Connection, op: str, data: Dict[str, Any]):
+    """Row-level equivalent of storage.apply_change (same operation names)."""
+    if op == "add_event":
+        _insert_event(conn, data["event"])
+    elif op == "delete_event":
+        conn.execute("DELETE FROM attendees WHERE event_id = ?", (data["id"],))
+        conn.execute("DELETE FROM reviews WHERE event_id = ?", (data["id"],))
+        conn.execute("DELETE FROM events WHERE id = ?", (data["id"],))
+    elif op == "edit_event":
+        fields = data["fields"]
+        cols = [k for k in fields if k in EVENT_COLUMNS and k != "id"]
+        if cols:
+            assignments = ", ".join(f"{c} = ?" for c in cols)
+            conn.execute(
+                f"UPDATE events SET {assignments} WHERE id = ?",
+                [fields[c] for c in cols] + [data["id"]],
+            )
+        extra = {k: v for k, v in fields.items() if k not in EVENT_COLUMNS}
+        if extra:
+            row = conn.execute(
+                "SELECT extra FROM events WHERE id = ?", (data["id"],)
+            ).fetchone()
+            merged = json.loads(row[0]) if row and row[0] else {}
+            merged.update(extra)
+            conn.execute(
+                "UPDATE events SET extra = ? WHERE id = ?",
+                (json.dumps(merged), data["id"]),
+            )
+    elif op == "set_status":
+        conn.execute(
+            "UPDATE events SET status = ? WHERE id = ?", (data["status"], data["id"])
+        )
+    elif op == "add_attendee":
+        if _insert_attendee(conn, data["id"], data["attendee"]):
+            conn.execute(
+                "UPDATE events SET attendee_count = attendee_count + 1 WHERE id = ?",
+                (data["id"],),
+            )
+    elif op == "add_review":
+        if _insert_review(conn, data["id"], data["review"]):
+            _bump_review_aggregates(conn, data["id"], data["review"].get("rating", 0))
+
+
+def _bump_review_aggregates(conn: sqlite3.Connection, event_id, rating):
+    row = conn.execute(
+        "SELECT rating_hist FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+    hist = json.loads(row[0]) if row and row[0] else None
+    if hist is not None and isinstance(rating, int) and 1 <= rating <= 5:
+        hist[rating - 1] += 1
+    conn.execute(
+        "UPDATE events SET review_count = review_count + 1, "
+        "rating_sum = rating_sum + ?, rating_hist = ? WHERE id = ?",
+        (rating, json.dumps(hist) if hist is not None else None, event_id),
+    )
+
+
+def apply_changes(changes: List[tuple]):
+    conn = connect()
+    with conn:
+        for op, data in changes:
+            apply_change(conn, op, data)
+
+
+def _where(
+    start: Optional[date], end: Optional[date], location: Optional[str]
+) -> Tuple[str, List[Any]]:
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("datetime >= ?")
+        params.append(start.isoformat())
+    if end is not None:
+        clauses.append("datetime < ?")
+        params.append(end.isoformat())
+    if location is not None:
+        escaped = (
+            location.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
+        )
+        pattern = "%" + escaped + "%"
+        clauses.append(r"(location LIKE ? ESCAPE '\' OR address LIKE ? ESCAPE '\')")
+        params.extend([pattern, pattern])
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_event_ids(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    location: Optional[str] = None,
+) -> List[Any]:
+    """Indexed lookup: ids of events with start <= date < end and/or whose
+    location/address contains `location` (case-insensitive), ordered by datetime."""
+    where, params = _where(start, end, location)
+    sql = f"SELECT id FROM events {where} ORDER BY datetime"
+    return [row[0] for row in connect().execute(sql, params)]
+
+
+def query_events(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    location: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Event]:
+    """Like query_event_ids but returns one page (`offset`, `limit`) of the
+    matching events themselves, read straight from the database: nothing
+    else is loaded, and attendees/reviews stay in their tables until first
+    used (see DetailRef)."""
+    where, params = _where(start, end, location)
+    sql = f"{SELECT_EVENTS} {where} ORDER BY datetime LIMIT ? OFFSET ?"
+    rows = connect().execute(sql, params + [-1 if limit is None else limit, offset])
+    return [
+        lazy_event(d, DetailRef(d["id"])) for d in (_row_to_summary(r) for r in rows)
+    ]
+
+
+def count_events(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    location: Optional[str] = None,
+) -> int:
+    """Number of events query_events would page through."""
+    where, params = _where(start, end, location)
+    sql = f"SELECT COUNT(*) FROM events {where}"
+    return connect().execute(sql, params).fetchone()[0]
+
+
+# --------------------------
+# Users
+# --------------------------
+def load_users() -> List[Dict[str, Any]]:
+    rows = connect().execute(
+        "SELECT username, password, role FROM users ORDER BY rowid"
+    )
+    return [
+        {"username": u, "password": json.loads(p), "role": r} for u, p, r in rows
+    ]
+
+
+def save_users(users: List[Dict[str, Any]]):
+    conn = connect()
+    with conn:
+        conn.execute("DELETE FROM users")
+        conn.executemany(
+            "INSERT OR REPLACE INTO users VALUES (?,?,?)",
+            [(u["username"], json.dumps(u["password"]), u.get("role")) for u in users],
+        )
+
+
+def users_empty() -> bool:
+    return connect().execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+
+
+def find_user(username: str) -> Optional[Dict[str, Any]]:
+    """Primary key lookup (the column compares case-insensitively)."""
+    row = (
+        connect()
+        .execute(
+            "SELECT username, password, role FROM users WHERE username = ?",
+            (username.strip(),),
+        )
+        .fetchone()
+    )
+    if row is None:
+        return None
+    return {"username": row[0], "password": json.loads(row[1]), "role": row[2]}
+
+
+def add_user(user: Dict[str, Any]) -> bool:
+    """Insert one account; False when the name is taken."""
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO users VALUES (?,?,?)",
+                (user["username"], json.dumps(user["password"]), user.get("role")),
+            )
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+
+def set_user_password(username: str, password: Dict[str, Any]) -> bool:
+    conn = connect()
+    with conn:
+        cur = conn.execute(
+            "UPDATE users SET password = ? WHERE username = ?",
+            (json.dumps(password), username.strip()),
+        )
+    return cur.rowcount > 0
@@ -0,0 +1,70 @@
+import collections
+from typing import List, Dict, Any, Iterable, Tuple
+from utils.models import Event
+
+# Statistik dimensions, all kept as Counters.
+DIMENSIONS = (
+    "by_category",
+    "by_month",
+    "by_city",
+    "by_status",
+    "by_organizer",
+    "attendance_by_month",
+    "rating_distribution",
+)
+
+
+def _contribution(e: Event) -> List[Tuple[str, Any, int]]:
+    """(dimension, bucket, amount) triples one event adds to the counters."""
+    items = [
+        ("by_category", e.get("category", "LAINNYA"), 1),
+        ("by_city", e.get("location", "Unknown"), 1),
+        ("by_status", e.get("status", "scheduled"), 1),
+        ("by_organizer", e.get("organizer", ""), 1),
+    ]
+    if e.month is not None:
+        items.append(("by_month", e.month, 1))
+        items.append(("attendance_by_month", e.month, e.get("attendee_count", 0)))
+    for rating, count in enumerate(e.get("rating_hist", []), start=1):
+        if count:
+            items.append(("rating_distribution", rating, count))
+    return items
+
+
+class StatsEngine:
+    """Counters for the Statistik menu, updated per event instead of
+    rebuilt by scanning. Each event's last contribution is remembered so a
+    change subtracts the old buckets and adds the new ones."""
+
+    def __init__(self, events: Iterable[Event] = ()):
+        self.counters: Dict[str, collections.Counter] = {
+            d: collections.Counter() for d in DIMENSIONS
+        }
+        self._applied: Dict[Any, List[Tuple[str, Any, int]]] = {}
+        for e in events:
+            self.add(e)
+
+    def _apply(self, items: List[Tuple[str, Any, int]], sign: int):
+        for dim, bucket, amount in items:
+            counter = self.counters[dim]
+            counter[bucket] += sign * amount
+            if counter[bucket] <= 0:
+                del counter[bucket]
+
+    def add(self, e: Event):
+        items = _contribution(e)
+        self._applied[e.get("id")] = items
+        self._apply(items, 1)
+
+    def remove(self, event_id):
+        items = self._applied.pop(event_id, None)
+        if items is not None:
+            self._apply(items, -1)
+
+    def update(self, e: Event):
+        self.remove(e.get("id"))
+        self.add(e)
+
+    def snapshot(self) -> Dict[str, Dict[Any, int]]:
+        """Plain dicts of every dimension: O(number of buckets)."""
+        return {d: dict(c) for d, c in self.counters.items()}
@@ -0,0 +1,57 @@
+import heapq
+import itertools
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Tuple
+from utils.models import Event
+
+
+class StatusScheduler:
+    """Min-heap of (datetime, seq, event id) for "scheduled" events, so the
+    auto status update only touches events whose time has passed.
+    Entries are never removed eagerly: an edit pushes a fresh entry and
+    becomes the event's only live one (`_live`), so older entries for it,
+    and entries of deleted events or events no longer "scheduled", are
+    skipped when they reach the top. The heap is rebuilt from the live
+    entries once stale ones outnumber them."""
+
+    def __init__(self, by_id: Dict[Any, Event], events: Iterable[Event] = ()):
+        self.by_id = by_id
+        self._seq = itertools.count()
+        # event id -> its live heap entry
+        self._live: Dict[Any, Tuple[datetime, int, Any]] = {}
+        for e in events:
+            if e.dt is not None and e.get("status") == "scheduled":
+                self._live[e.get("id")] = (e.dt, next(self._seq), e.get("id"))
+        self.heap: List[Tuple[datetime, int, Any]] = list(self._live.values())
+        heapq.heapify(self.heap)
+
+    def schedule(self, e: Event):
+        """(Re)schedule `e` after a change; replaces any earlier entry."""
+        event_id = e.get("id")
+        if e.dt is None or e.get("status") != "scheduled":
+            self._live.pop(event_id, None)
+            return
+        live = self._live.get(event_id)
+        if live is not None and live[0] == e.dt:
+            return  # already queued for this time
+        entry = self._live[event_id] = (e.dt, next(self._seq), event_id)
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self._live) + 64:
+            self.heap = list(self._live.values())
+            heapq.heapify(self.heap)
+
+    def pop_due(self, now: datetime) -> List[Event]:
+        """Events still "scheduled" whose datetime is before `now`, each at
+        most once. O(k log n) for k due entries."""
+        due = []
+        while self.heap and self.heap[0][0] < now:
+            entry = heapq.heappop(self.heap)
+            event_id = entry[2]
+            if self._live.get(event_id) != entry:
+                continue  # superseded by a later schedule()
+            del self._live[event_id]
+            e = self.by_id.get(event_id)
+            if e is None or e.dt != entry[0] or e.get("status") != "scheduled":
+                continue  # deleted or changed without being rescheduled
+            due.append(e)
+        return due
@@ -1,19 +1,38 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List
+from utils.models import Event
+from utils.event_store import EventStore
+from utils.storage import log_changes
 
 
-def auto_update_event_statuses(events: List[Dict[str, Any]]) -> bool:
+def auto_update_event_statuses(events: List[Event]) -> List[Event]:
     """Update events in-place: if scheduled and datetime < now -> finished.
-    Returns True if any changes were made (so caller can save)."""
-    changed = False
+    Returns the events that were changed (empty list if none) so the caller
+    can save them. For an EventStore only the due entries of its transition
+    heap are visited (O(k log n)); plain lists are scanned."""
     now = datetime.now()
+    if isinstance(events, EventStore):
+        changed = [events.writable(e) for e in events.schedule.pop_due(now)]
+        for e in changed:
+            e["status"] = "finished"
+        return changed
+    changed = []
     for e in events:
-        try:
-            dt = datetime.fromisoformat(e["datetime"])
-        except Exception:
+        if e.dt is None:
             continue
         # If event datetime < now (past) and status is scheduled => mark finished
-        if dt < now and e.get("status") == "scheduled":
+        if e.dt < now and e.get("status") == "scheduled":
             e["status"] = "finished"
-            changed = True
+            changed.append(e)
     return changed
+
+
+def refresh_event_statuses(events: List[Event]) -> bool:
+    """Run auto_update_event_statuses and persist only the changed events.
+    Returns True if anything changed."""
+    changed = auto_update_event_statuses(events)
+    log_changes(
+        events,
+        [("set_status", {"id": e.get("id"), "status": e["status"]}) for e in changed],
+    )
+    return bool(changed)
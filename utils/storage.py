@@ -1,11 +1,145 @@
 import os
 import json
-from typing import List, Dict, Any
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import List, Dict, Any, Callable, Tuple, Optional, Set
+from utils import sqlite_backend, snapshot
+from utils.ids import MAX_NODE, set_node
+from utils.models import Event, to_jsonable, append_attendee, append_review, lazy_event
+from utils.detail_cache import details, DETAIL_CACHE_SIZE
+from utils.event_store import EventStore
+from utils.user_directory import UserDirectory
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 DATA_FILE = "data/events.json"
 SETTINGS_FILE = "data/settings.json"
 USERS_FILE = "data/users.json"
 
+# Sharded mode: one JSON file per month of event datetime plus a manifest of
+# shard ranges and counts; only current/upcoming months are read at start.
+SHARD_DIR = "data/shards"
+SHARD_MANIFEST_FILE = "data/shards/manifest.json"
+UNDATED_SHARD = "undated"
+
+# Binary mode: the same data as memory-mapped snapshots (see utils/snapshot.py).
+EVENTS_SNAPSHOT_FILE = "data/events.bin"
+USERS_SNAPSHOT_FILE = "data/users.bin"
+
+# New accounts and password re-hashes are appended here (one JSON object per
+# line) and folded into the users file (users.json, or users.bin in binary
+# mode) once the journal holds at least USERS_COMPACT_MIN entries and half as
+# many as the file.
+USERS_JOURNAL_FILE = "data/users.journal"
+USERS_COMPACT_MIN = 1000
+
+# Login sessions (utils.auth): the key tokens are signed with, ids of tokens
+# revoked before they expired ({sid: exp}), and the token this kiosk resumes.
+SESSION_KEY_FILE = "data/session.key"
+REVOKED_SESSIONS_FILE = "data/sessions_revoked.json"
+KIOSK_SESSION_FILE = "data/session.token"
+SESSION_KEY_BYTES = 32
+
+# Journal mode: events.json is the last compacted snapshot, every mutation after
+# it is appended as one JSON line to the journal and replayed on load.
+JOURNAL_FILE = "data/events.journal"
+JOURNAL_COMPACTING_FILE = "data/events.journal.compacting"
+JOURNAL_COMPACT_THRESHOLD = 500
+
+# Group commit: mutations are buffered and written together once
+# WRITE_BATCH_SIZE of them are pending or WRITE_WINDOW_MS has passed since
+# the first one (0 = write every mutation immediately). flush() forces it.
+WRITE_WINDOW_MS = 200
+WRITE_BATCH_SIZE = 50
+
+_storage_mode = "json"
+_write_window_ms = WRITE_WINDOW_MS
+_write_batch_size = WRITE_BATCH_SIZE
+_write_lock = threading.RLock()
+_pending_events: Optional[List[Dict[str, Any]]] = None  # json: list to snapshot
+_pending_lines: List[str] = []  # journal: serialized operations
+_pending_changes: List[Tuple[str, Dict[str, Any]]] = []  # every queued operation
+_pending_count = 0
+_flush_timer = None  # pending delayed flush: anything with cancel()
+_journal_entries = 0
+_compaction_thread = None
+
+# Several processes may share data/. Every write happens under an exclusive
+# advisory lock on VERSION_FILE, which also holds the store version: a counter
+# bumped by each commit. A process that finds a version other than the one it
+# last saw merges its pending changes into the on-disk state instead of
+# overwriting it.
+VERSION_FILE = "data/events.version"
+# last id node handed out (utils.ids), so concurrent processes get distinct ones
+NODE_FILE = "data/events.node"
+
+STORAGE_MODES = ("json", "journal", "sqlite", "binary", "sharded")
+
+_store_lock = threading.RLock()
+_store_lock_depth = 0
+_store_lock_file = None
+_known_version = 0
+_shard_of: Dict[Any, str] = {}  # event id -> shard it is stored in
+_claimed_node: Optional[Tuple[int, int]] = None  # (pid, node) from claim_id_node
+
+
+# --------------------------
+# Load cache
+# --------------------------
+# path -> (stamp, parsed value, time it was parsed). A stamp is one stat():
+# (mtime_ns, size, inode); atomic saves replace the inode, so any rewrite
+# shows up even when size and mtime tick stay the same.
+_load_cache: Dict[str, Tuple[Tuple[int, int, int], Any, int]] = {}
+# A file modified less than this before it was parsed may change again within
+# the same mtime tick without its stamp changing ("racily clean", as git calls
+# it); such entries are re-read until they are old enough to trust.
+RACY_WINDOW_NS = 2_000_000_000
+# the EventStore from the last load_events(), handed out again while no other
+# process has committed (see load_events)
+_loaded_store: Optional[Tuple[str, EventStore]] = None
+# (storage mode, directory) behind find_user / add_user in file-based modes
+_users: Optional[Tuple[str, UserDirectory]] = None
+_session_key: Optional[bytes] = None
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _cached_load(path: str, load: Callable[[str], Any], default):
+    """load(path), parsed again only when the file changed since last time.
+    Lists and dicts come back as shallow copies, so callers may append to or
+    update the top level; records inside are shared and must only be changed
+    through a save (which invalidates the entry)."""
+    stamp = _file_stamp(path)
+    if stamp is None:
+        _load_cache.pop(path, None)
+        return default
+    hit = _load_cache.get(path)
+    if hit is None or hit[0] != stamp or stamp[0] + RACY_WINDOW_NS > hit[2]:
+        parsed_at = time.time_ns()
+        hit = _load_cache[path] = (stamp, load(path), parsed_at)
+    value = hit[1]
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _invalidate(path: str):
+    _load_cache.pop(path, None)
+
 
 def load_json(path: str, default):
     if not os.path.exists(path):
@@ -17,30 +151,936 @@ def load_json(path: str, default):
             return default
 
 
+def _fsync_dir(path: str):
+    if os.name == "nt":
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _atomic_file(path: str, binary: bool = False):
+    """Write through a temp file in the same directory, fsync, then rename
+    over the target, so a crash never leaves a truncated file."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
 def save_json(path: str, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Write JSON atomically (see _atomic_file)."""
+    with _atomic_file(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=to_jsonable)
+
+
+def save_snapshot(path: str, records: List[Dict[str, Any]], kind: int):
+    """Write a binary snapshot atomically (see _atomic_file)."""
+    with _atomic_file(path, binary=True) as f:
+        snapshot.write(f, records, kind)
+
+
+def _read_events_file() -> List[Dict[str, Any]]:
+    """The whole-file event store of json / binary mode."""
+    if _storage_mode != "binary":
+        return load_json(DATA_FILE, [])
+    if not os.path.exists(EVENTS_SNAPSHOT_FILE):
+        if not os.path.exists(DATA_FILE):
+            return []
+        # first start in binary mode: convert the existing JSON data once
+        records = load_json(DATA_FILE, [])
+        save_snapshot(EVENTS_SNAPSHOT_FILE, records, snapshot.KIND_EVENTS)
+    return snapshot.load_events(EVENTS_SNAPSHOT_FILE)
+
+
+def _write_events_file(events: List[Dict[str, Any]]):
+    if _storage_mode == "binary":
+        save_snapshot(EVENTS_SNAPSHOT_FILE, events, snapshot.KIND_EVENTS)
+    else:
+        save_json(DATA_FILE, events)
+
+
+def configure_storage(settings: Dict[str, Any]):
+    """Select the storage backend from settings (one of STORAGE_MODES: "json",
+    "journal", "sqlite", "binary" or "sharded"), the group-commit window/batch
+    size and the detail cache size. It also claims this process' id node."""
+    global _storage_mode, _write_window_ms, _write_batch_size
+    flush()
+    mode = settings.get("storage", "json")
+    _storage_mode = mode if mode in STORAGE_MODES else "json"
+    _write_window_ms = int(settings.get("write_window_ms", WRITE_WINDOW_MS))
+    batch = int(settings.get("write_batch_size", WRITE_BATCH_SIZE))
+    _write_batch_size = max(1, batch)
+    details.resize(int(settings.get("detail_cache_size", DETAIL_CACHE_SIZE)))
+    claim_id_node()
+
+
+# --------------------------
+# Cross-process lock and store version
+# --------------------------
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def store_lock():
+    """Hold the exclusive cross-process lock on the data directory.
+    Re-entrant within a process; other threads of this process wait on
+    _store_lock before touching the file lock."""
+    global _store_lock_depth, _store_lock_file
+    with _store_lock:
+        if _store_lock_depth == 0:
+            os.makedirs(os.path.dirname(VERSION_FILE) or ".", exist_ok=True)
+            fd = os.open(VERSION_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+            f = os.fdopen(fd, "r+", encoding="utf-8")
+            try:
+                _lock_file(f)
+            except OSError:
+                f.close()
+                raise
+            _store_lock_file = f
+        _store_lock_depth += 1
+        try:
+            yield
+        finally:
+            _store_lock_depth -= 1
+            if _store_lock_depth == 0:
+                _unlock_file(_store_lock_file)
+                _store_lock_file.close()
+                _store_lock_file = None
+
+
+def _read_version(f) -> int:
+    f.seek(0)
+    try:
+        return int(f.read().strip() or 0)
+    except ValueError:
+        return 0
+
+
+def store_version() -> int:
+    """Store version on disk (0 before the first commit). Read under the
+    lock when this process holds it, otherwise a best-effort peek."""
+    if _store_lock_file is not None:
+        return _read_version(_store_lock_file)
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            return _read_version(f)
+    except OSError:
+        return 0
+
+
+def _bump_version() -> int:
+    """Advance the store version; caller holds store_lock()."""
+    f = _store_lock_file
+    version = _read_version(f) + 1
+    f.seek(0)
+    f.truncate()
+    f.write(str(version))
+    f.flush()
+    return version
+
+
+def claim_id_node() -> int:
+    """Take the next id node number from NODE_FILE for this process, so ids
+    made by processes sharing data/ never collide (until 1024 later starts
+    wrap the counter around). Only the first call in a process takes one;
+    later calls (configure_storage runs on every login) return it again."""
+    global _claimed_node
+    if _claimed_node is not None and _claimed_node[0] == os.getpid():
+        return _claimed_node[1]  # a forked child has to claim its own
+    with store_lock():
+        try:
+            with open(NODE_FILE, "r", encoding="utf-8") as f:
+                last = int(f.read().strip())
+        except (OSError, ValueError):
+            last = -1
+        node = (last + 1) % (MAX_NODE + 1)
+        with open(NODE_FILE, "w", encoding="utf-8") as f:
+            f.write(str(node))
+    set_node(node)
+    _claimed_node = (os.getpid(), node)
+    return node
+
+
+# --------------------------
+# Journal (append-only operation log)
+# --------------------------
+def apply_change(
+    events: List[Dict[str, Any]],
+    op: str,
+    data: Dict[str, Any],
+    by_id: Dict[Any, Dict[str, Any]],
+):
+    """Apply one journal operation to the events list.
+    Operations are idempotent so a log replayed twice (crash during compaction)
+    gives the same result."""
+    if op == "add_event":
+        ev = data["event"]
+        if ev.get("id") not in by_id:
+            events.append(ev)
+            by_id[ev.get("id")] = ev
+        return
+    e = by_id.get(data.get("id"))
+    if e is None:
+        return
+    if op == "delete_event":
+        del by_id[data["id"]]
+        for i, ev in enumerate(events):
+            if ev is e:
+                events.pop(i)
+                break
+    elif op == "edit_event":
+        e.update(data["fields"])
+    elif op == "set_status":
+        e["status"] = data["status"]
+    elif op == "add_attendee":
+        att = data["attendee"]
+        name = att.get("username", "").lower()
+        if not any(
+            a.get("username", "").lower() == name for a in e.get("attendees", [])
+        ):
+            append_attendee(e, att)
+    elif op == "add_review":
+        rev = data["review"]
+        name = rev.get("username", "").lower()
+        if not any(
+            r.get("username", "").lower() == name for r in e.get("reviews", [])
+        ):
+            append_review(e, rev)
+
+
+def _read_journal(path: str) -> List[Dict[str, Any]]:
+    ops = []
+    if not os.path.exists(path):
+        return ops
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                # torn last line after a crash: everything before it is valid
+                break
+    return ops
+
+
+def _replay(events: List[Dict[str, Any]], ops: List[Dict[str, Any]]):
+    by_id = {e.get("id"): e for e in events}
+    for entry in ops:
+        apply_change(events, entry.get("op", ""), entry, by_id)
+
+
+def _compact(snapshot_path: str, rotated_path: str):
+    with store_lock():
+        if not os.path.exists(rotated_path):
+            return  # another process finished this compaction first
+        events = load_json(snapshot_path, [])
+        _replay(events, _read_journal(rotated_path))
+        save_json(snapshot_path, events)
+        os.remove(rotated_path)
+
+
+def compact_journal(background: bool = True):
+    """Fold the journal into the events.json snapshot.
+    The current journal is rotated aside first so new mutations keep appending
+    while the snapshot is rebuilt from disk (not from the in-memory list)."""
+    global _journal_entries, _compaction_thread
+    with _write_lock, store_lock():
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return
+        if os.path.exists(JOURNAL_COMPACTING_FILE):
+            # leftover from an interrupted compaction (or one still queued in
+            # another process): finish it first
+            pass
+        elif os.path.exists(JOURNAL_FILE):
+            os.replace(JOURNAL_FILE, JOURNAL_COMPACTING_FILE)
+        else:
+            return
+        _journal_entries = 0
+        if background:
+            _compaction_thread = threading.Thread(
+                target=_compact, args=(DATA_FILE, JOURNAL_COMPACTING_FILE), daemon=True
+            )
+            _compaction_thread.start()
+            return
+        _compact(DATA_FILE, JOURNAL_COMPACTING_FILE)
+
+
+def wait_for_compaction():
+    if _compaction_thread is not None:
+        _compaction_thread.join()
+
+
+# --------------------------
+# Month shards
+# --------------------------
+def shard_key(e: Event) -> str:
+    return e.month or UNDATED_SHARD
+
+
+def _shard_path(key: str) -> str:
+    return os.path.join(SHARD_DIR, f"{key}.json")
+
+
+def _read_manifest() -> Dict[str, Dict[str, Any]]:
+    return load_json(SHARD_MANIFEST_FILE, {}).get("shards", {})
+
+
+def _shard_entry(records: List[Event]) -> Dict[str, Any]:
+    dts = sorted(str(e.get("datetime", "")) for e in records)
+    return {
+        "count": len(records),
+        "first": dts[0],
+        "last": dts[-1],
+        "scheduled": sum(1 for e in records if e.get("status") == "scheduled"),
+    }
+
+
+def _write_shards(shards: Dict[str, List[Event]], manifest: Dict[str, Any]):
+    """Rewrite the given shards (an empty list removes one) and the manifest."""
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    for key, records in shards.items():
+        if records:
+            save_json(_shard_path(key), records)
+            manifest[key] = _shard_entry(records)
+            for e in records:
+                _shard_of[e.get("id")] = key
+        else:
+            if os.path.exists(_shard_path(key)):
+                os.remove(_shard_path(key))
+            manifest.pop(key, None)
+    save_json(SHARD_MANIFEST_FILE, {"shards": dict(sorted(manifest.items()))})
+
 
+def _split_shards(events: List[Dict[str, Any]]) -> Dict[str, List[Event]]:
+    shards: Dict[str, List[Event]] = {}
+    for d in events:
+        e = Event.from_dict(d)
+        shards.setdefault(shard_key(e), []).append(e)
+    return shards
 
-def load_events() -> List[Dict[str, Any]]:
-    return load_json(DATA_FILE, [])
+
+def _load_shards(keys) -> List[Event]:
+    records = []
+    for key in sorted(keys):
+        shard = [Event.from_dict(d) for d in load_json(_shard_path(key), [])]
+        for e in shard:
+            _shard_of[e.get("id")] = key
+        records.extend(shard)
+    return records
+
+
+def _hot_shards(manifest: Dict[str, Any]) -> Set[str]:
+    """Shards read at start: this month onwards, undated events, and older
+    months that still hold "scheduled" events for the status update."""
+    this_month = date.today().strftime("%Y-%m")
+    return {
+        key
+        for key, entry in manifest.items()
+        if key == UNDATED_SHARD or key >= this_month or entry.get("scheduled")
+    }
+
+
+def _shards_overlapping(
+    manifest: Dict[str, Any], start: Optional[date], end: Optional[date]
+) -> Set[str]:
+    """Month shards holding dates in [start, end); None leaves a side open."""
+    lo = start.strftime("%Y-%m") if start is not None else None
+    hi = (end - timedelta(days=1)).strftime("%Y-%m") if end is not None else None
+    if lo is None and hi is None:
+        return set(manifest)
+    return {
+        key
+        for key in manifest
+        if key != UNDATED_SHARD
+        and (lo is None or key >= lo)
+        and (hi is None or key <= hi)
+    }
+
+
+def _flush_shards(changes: List[Tuple[str, Dict[str, Any]]], in_sync: bool):
+    """Rewrite only the shards `changes` touch. They are re-read from disk
+    and the changes replayed on them (as in the json merge path), then each
+    changed event is filed under the month it ends up in, so concurrent
+    writers to other events of the same month are kept. When another
+    process has committed since we last synced (`in_sync` false), an event
+    missing from the shard we last saw it in was moved there: the other
+    shards are searched for it so its changes follow it."""
+    manifest = _read_manifest()
+    loaded: Dict[str, List[Event]] = {}
+    ids_in: Dict[str, Set[Any]] = {}
+
+    def read_shard(key: str) -> Set[Any]:
+        if key not in loaded:
+            records = [Event.from_dict(d) for d in load_json(_shard_path(key), [])]
+            loaded[key] = records
+            ids_in[key] = {e.get("id") for e in records}
+        return ids_in[key]
+
+    ops, changed, added = [], set(), set()
+    for op, data in changes:
+        event_id = data["event"].get("id") if op == "add_event" else data["id"]
+        changed.add(event_id)
+        if op == "add_event":
+            added.add(event_id)
+        ops.append({"op": op, **data})
+    touched: Set[str] = set()
+    for event_id in changed:
+        key = _shard_of.get(event_id)
+        if key is not None and key in manifest and event_id in read_shard(key):
+            touched.add(key)
+        elif not in_sync and event_id not in added:
+            for other in sorted(manifest):
+                if event_id in read_shard(other):
+                    touched.add(other)
+                    break
+    records = [e for key in sorted(touched) for e in loaded[key]]
+    _replay(records, ops)
+    for e in list(records):
+        key = shard_key(e)
+        if e.get("id") in changed and key not in touched:
+            touched.add(key)  # moved or added to a month not read yet
+            if key in manifest:
+                read_shard(key)
+                records.extend(loaded[key])
+    shards: Dict[str, List[Event]] = {key: [] for key in touched}
+    for e in records:
+        shards[shard_key(e)].append(e)
+    _write_shards(shards, manifest)
+    for event_id in changed - {e.get("id") for e in records}:
+        _shard_of.pop(event_id, None)  # deleted
+
+
+def _init_shards():
+    """First start in sharded mode: split events.json into shards once."""
+    if not os.path.exists(SHARD_MANIFEST_FILE):
+        _write_shards(_split_shards(load_json(DATA_FILE, [])), {})
+
+
+def require_events(
+    events: List[Dict[str, Any]],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Make sure every stored event with start <= date < end (None = open
+    side) is in `events`. Only sharded mode loads partially: the overlapping
+    shards not held yet are read into the store. They are only read; a
+    shard is written back only when one of its events changes."""
+    if not isinstance(events, EventStore) or events.shards is None:
+        return
+    with _write_lock, store_lock():
+        manifest = _read_manifest()
+        keys = _shards_overlapping(manifest, start, end) - events.shards
+        if keys:
+            events.add_loaded(_load_shards(keys))
+            events.shards |= keys
+
+
+def _start_timer(delay: float, callback: Callable[[], None]):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+_schedule_flush = _start_timer
+
+
+def set_flush_scheduler(schedule: Optional[Callable[..., Any]] = None):
+    """Run the delayed group commit through `schedule(delay_s, callback)`
+    instead of a timer thread; it must return a handle with cancel(), as
+    asyncio's loop.call_later does. An event loop uses this so the flush
+    runs on the loop thread that mutates the store. None restores the thread."""
+    global _schedule_flush
+    with _write_lock:
+        _schedule_flush = schedule or _start_timer
+
+
+def rewrites_all_events() -> bool:
+    """Whether a large commit ends up rewriting (about) every stored event,
+    so its cost grows with the store rather than with the change: json and
+    binary save the whole file, sharded the month files it touches, journal
+    compacts every JOURNAL_COMPACT_THRESHOLD entries. Only sqlite does not."""
+    return _storage_mode != "sqlite"
+
+
+def log_change(events: List[Dict[str, Any]], op: str, data: Dict[str, Any]):
+    """Persist one mutation that has already been applied to `events`.
+    In journal mode only the change is appended; in json mode the full list is
+    saved. Either way the write goes through the group commit (see flush())."""
+    log_changes(events, [(op, data)])
+
+
+def log_changes(
+    events: List[Dict[str, Any]], changes: List[Tuple[str, Dict[str, Any]]]
+):
+    """Queue already-applied mutations for the next group commit."""
+    global _pending_events, _pending_count, _flush_timer
+    if not changes:
+        return
+    if isinstance(events, EventStore):
+        for op, data in changes:
+            events.changed(op, data)
+        events.publish()
+    with _write_lock:
+        _pending_changes.extend(changes)
+        if _storage_mode == "journal":
+            _pending_lines.extend(
+                json.dumps({"op": op, **data}, ensure_ascii=False, default=to_jsonable)
+                + "\n"
+                for op, data in changes
+            )
+        elif _storage_mode in ("json", "binary"):
+            _pending_events = events
+        _pending_count += len(changes)
+        if _write_window_ms <= 0 or _pending_count >= _write_batch_size:
+            _flush_locked()
+        elif _flush_timer is None:
+            _flush_timer = _schedule_flush(_write_window_ms / 1000, flush)
+
+
+def _flush_locked():
+    global _pending_events, _pending_count, _flush_timer, _journal_entries
+    global _known_version
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    if _pending_count:
+        with store_lock():
+            in_sync = store_version() == _known_version
+            if _storage_mode == "sqlite":
+                # row-level statements: concurrent changes merge by themselves
+                sqlite_backend.apply_changes(_pending_changes)
+            elif _storage_mode == "sharded":
+                _flush_shards(_pending_changes, in_sync)
+            elif _pending_lines:
+                with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+                    f.write("".join(_pending_lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                _journal_entries += len(_pending_lines)
+            elif in_sync:
+                _write_events_file(_pending_events)
+            else:
+                # Another process committed since we last synced: re-apply our
+                # changes per event on top of its file instead of overwriting.
+                merged = _read_events_file()
+                _replay(merged, [{"op": op, **data} for op, data in _pending_changes])
+                _write_events_file(merged)
+            version = _bump_version()
+            if in_sync:
+                _known_version = version
+    _pending_changes.clear()
+    _pending_lines.clear()
+    _pending_events = None
+    _pending_count = 0
+    if _journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+        compact_journal(background=True)
+
+
+def _discard_pending():
+    """Drop queued writes that a full save_events() snapshot supersedes."""
+    global _pending_events, _pending_count, _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    _pending_changes.clear()
+    _pending_lines.clear()
+    _pending_events = None
+    _pending_count = 0
+
+
+def flush():
+    """Write every queued mutation now (call before exit)."""
+    with _write_lock:
+        _flush_locked()
+
+
+def _load_events(shards: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """Read the current on-disk state; caller holds store_lock().
+    In sharded mode only the start-up shards plus `shards` (those already
+    held) are read, and `shards` is extended with what was read."""
+    global _journal_entries
+    if _storage_mode == "sharded":
+        _init_shards()
+        manifest = _read_manifest()
+        keys = (_hot_shards(manifest) | (shards or set())) & set(manifest)
+        if shards is not None:
+            shards |= keys
+        return _load_shards(keys)
+    if _storage_mode == "sqlite":
+        if sqlite_backend.is_empty() and os.path.exists(DATA_FILE):
+            # first start on SQLite: import the existing JSON data once
+            sqlite_backend.save_events(load_json(DATA_FILE, []))
+        # attendees/reviews are read per event when first needed
+        return [
+            lazy_event(d, sqlite_backend.DetailRef(d["id"]))
+            for d in sqlite_backend.load_event_summaries()
+        ]
+    if _storage_mode != "journal":
+        return _read_events_file()
+    # A compaction in progress holds the lock, so the snapshot and the rotated
+    # journal seen here are consistent with each other.
+    events = load_json(DATA_FILE, [])
+    _replay(events, _read_journal(JOURNAL_COMPACTING_FILE))
+    ops = _read_journal(JOURNAL_FILE)
+    _replay(events, ops)
+    _journal_entries = len(ops)
+    return events
+
+
+def load_events(fresh: bool = False) -> EventStore:
+    """Load all events as Event records (datetime and search fields parsed once)
+    into an indexed EventStore.
+    While the store version on disk is still the one this process last saw,
+    nothing was committed from outside and the store returned last time
+    already holds every change made here, so that same store is returned
+    without reading the data files (fresh=True forces a reload)."""
+    global _known_version, _loaded_store
+    with _write_lock:
+        _flush_locked()
+        if (
+            not fresh
+            and _loaded_store is not None
+            and _loaded_store[0] == _storage_mode
+            and store_version() == _known_version
+        ):
+            return _loaded_store[1]
+        shards: Set[str] = set()
+        with store_lock():
+            records = _load_events(shards)
+            _known_version = store_version()
+        store = EventStore([Event.from_dict(d) for d in records])
+        if _storage_mode == "sharded":
+            store.shards = shards
+        _loaded_store = (_storage_mode, store)
+    return store
+
+
+def sync_events(events: List[Dict[str, Any]]) -> bool:
+    """Pull in what other processes committed since `events` was loaded or
+    last synced. Cheap when nothing changed (one small file read). Returns
+    True when the store was updated."""
+    global _known_version
+    if not isinstance(events, EventStore) or store_version() == _known_version:
+        return False
+    with _write_lock:
+        _flush_locked()  # our own queued changes must be on disk first
+        with store_lock():
+            version = store_version()
+            if version == _known_version:
+                return False
+            shards = set(events.shards or ())
+            events.sync(_load_events(shards))
+            if events.shards is not None:
+                events.shards = shards
+            _known_version = version
+    return True
+
+
+def query_events(
+    events: List[Dict[str, Any]],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    location: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Push a date range (start <= date < end) / location filter down to the
+    backend indexes. Only possible when `events` is the full EventStore returned
+    by load_events() and the backend can query; otherwise returns None and the
+    caller filters `events` itself (in sharded mode after the shards the
+    query covers have been loaded)."""
+    if _storage_mode == "sharded":
+        # bring in the months the range covers, then let the caller's
+        # date index answer
+        if location is None:
+            require_events(events, start, end)
+        else:
+            require_events(events)
+        return None
+    if _storage_mode != "sqlite" or not isinstance(events, EventStore):
+        return None
+    if _pending_count:
+        flush()  # the database must see queued changes before it answers
+    ids = sqlite_backend.query_event_ids(start, end, location)
+    return [events.by_id[i] for i in ids if i in events.by_id]
 
 
 def save_events(events: List[Dict[str, Any]]):
-    save_json(DATA_FILE, events)
+    """Replace the whole store with `events` (a full snapshot)."""
+    global _journal_entries, _known_version, _loaded_store
+    wait_for_compaction()
+    with _write_lock, store_lock():
+        _discard_pending()
+        if _storage_mode == "sharded":
+            require_events(events)  # a partial store would drop old months
+            shards = _split_shards(events)
+            for key in set(_read_manifest()) - set(shards):
+                shards[key] = []
+            _write_shards(shards, {})
+        elif _storage_mode == "sqlite":
+            sqlite_backend.save_events(events)
+        else:
+            _write_events_file(events)
+        if _storage_mode == "journal":
+            # A full snapshot supersedes every journaled change.
+            for path in (JOURNAL_FILE, JOURNAL_COMPACTING_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+            _journal_entries = 0
+        _known_version = _bump_version()
+        if _loaded_store is not None and _loaded_store[1] is not events:
+            _loaded_store = None  # replaced wholesale by another list
 
 
 def load_settings() -> Dict[str, Any]:
-    return load_json(SETTINGS_FILE, {"lang": "id", "user_location": ""})
+    defaults = {
+        "lang": "id",
+        "user_location": "",
+        "storage": "json",
+        "write_window_ms": WRITE_WINDOW_MS,
+        "write_batch_size": WRITE_BATCH_SIZE,
+        "detail_cache_size": DETAIL_CACHE_SIZE,
+    }
+    return _cached_load(SETTINGS_FILE, lambda path: load_json(path, defaults), defaults)
 
 
 def save_settings(s: Dict[str, Any]):
     save_json(SETTINGS_FILE, s)
+    _invalidate(SETTINGS_FILE)
 
 
-def load_users() -> List[Dict[str, Any]]:
+# --------------------------
+# Users
+# --------------------------
+def _users_base_file() -> str:
+    return USERS_SNAPSHOT_FILE if _storage_mode == "binary" else USERS_FILE
+
+
+def _load_base_users() -> List[Dict[str, Any]]:
+    """The users file of the current (file-based) mode, without the journal."""
+    if _storage_mode == "binary":
+        if os.path.exists(USERS_SNAPSHOT_FILE):
+            return snapshot.load_records(USERS_SNAPSHOT_FILE)
+        users = load_json(USERS_FILE, [])
+        if users:
+            save_snapshot(USERS_SNAPSHOT_FILE, users, snapshot.KIND_USERS)
+        return users
     return load_json(USERS_FILE, [])
 
 
+def _read_user_journal(offset: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Lines appended to the users journal after byte `offset`, and
+    the offset after the last complete line (a line still being written by
+    another process is left for next time)."""
+    try:
+        with open(USERS_JOURNAL_FILE, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = data.rfind(b"\n") + 1
+    users = []
+    for line in data[:end].splitlines():
+        try:
+            users.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue  # torn line from a crash; everything after it is intact
+    return users, offset + end
+
+
+def user_directory() -> UserDirectory:
+    """Users of the file-based modes keyed by normalized username. Parsed
+    once; later calls stat the users file and read only the journal lines
+    appended since (by this or another process), reloading in full only
+    when the users file itself was rewritten."""
+    global _users
+    if _users is not None:
+        mode, directory = _users
+        journal = _file_stamp(USERS_JOURNAL_FILE)
+        truncated = (journal[1] if journal else 0) < directory.journal_offset
+        stamp = _file_stamp(_users_base_file())
+        if mode != _storage_mode or directory.base_stamp != stamp or truncated:
+            _users = None
+    if _users is None:
+        with store_lock():  # no rewrite between reading the file and its stamp
+            users = _load_base_users()
+            stamp = _file_stamp(_users_base_file())
+            _users = (_storage_mode, UserDirectory(users, stamp))
+    directory = _users[1]
+    entries, directory.journal_offset = _read_user_journal(directory.journal_offset)
+    for entry in entries:
+        directory.apply(entry)
+    directory.journal_entries += len(entries)
+    return directory
+
+
+def find_user(username: str) -> Optional[Dict[str, Any]]:
+    """The account named `username` (case-insensitive), or None."""
+    if _storage_mode == "sqlite":
+        user = sqlite_backend.find_user(username)
+        if user is None and sqlite_backend.users_empty() and os.path.exists(USERS_FILE):
+            load_users()  # first start on SQLite: import users.json, then retry
+            user = sqlite_backend.find_user(username)
+        return user
+    return user_directory().get(username)
+
+
+def add_user(user: Dict[str, Any]) -> bool:
+    """Register `user` unless its name is taken (case-insensitively); True
+    when added. SQLite inserts one row; the other modes append one line to
+    USERS_JOURNAL_FILE under the store lock, so two processes can never both
+    claim a name, and fold the journal into the users file once it holds
+    as many accounts as half the file (amortized constant time)."""
+    if _storage_mode == "sqlite":
+        if sqlite_backend.users_empty() and os.path.exists(USERS_FILE):
+            load_users()  # first start on SQLite: import users.json
+        return sqlite_backend.add_user(user)
+    with store_lock():
+        directory = user_directory()  # everything registered so far
+        if not directory.add(user):
+            return False
+        _append_user_journal(directory, user)
+    return True
+
+
+def set_user_password(username: str, password: Dict[str, Any]) -> bool:
+    """Replace the stored password record of an existing account (a re-hash
+    with new parameters); one row update or one journal line."""
+    if _storage_mode == "sqlite":
+        return sqlite_backend.set_user_password(username, password)
+    with store_lock():
+        directory = user_directory()
+        if not directory.set_password(username, password):
+            return False
+        _append_user_journal(
+            directory, {"set_password": username, "password": password}
+        )
+    return True
+
+
+def _append_user_journal(directory: UserDirectory, entry: Dict[str, Any]):
+    """Append an entry `directory` already holds; caller holds store_lock()."""
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with open(USERS_JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    directory.journal_offset += len(line.encode("utf-8"))
+    directory.journal_entries += 1
+    if directory.journal_entries >= max(USERS_COMPACT_MIN, len(directory) // 2):
+        _write_users(directory.users)
+
+
+def _write_users(users: List[Dict[str, Any]]):
+    """Rewrite the users file of a file-based mode and empty the journal;
+    caller holds store_lock()."""
+    global _users
+    if _storage_mode == "binary":
+        save_snapshot(USERS_SNAPSHOT_FILE, users, snapshot.KIND_USERS)
+    else:
+        save_json(USERS_FILE, users)
+    if os.path.exists(USERS_JOURNAL_FILE):
+        os.remove(USERS_JOURNAL_FILE)
+    stamp = _file_stamp(_users_base_file())
+    _users = (_storage_mode, UserDirectory(users, stamp))
+
+
+def load_users() -> List[Dict[str, Any]]:
+    if _storage_mode == "sqlite":
+        users = sqlite_backend.load_users()
+        if not users and os.path.exists(USERS_FILE):
+            users = load_json(USERS_FILE, [])
+            sqlite_backend.save_users(users)
+        return users
+    return list(user_directory().users)
+
+
 def save_users(users: List[Dict[str, Any]]):
-    save_json(USERS_FILE, users)
+    if _storage_mode == "sqlite":
+        sqlite_backend.save_users(users)
+        return
+    with store_lock():
+        _write_users(users)
+
+
+# --------------------------
+# Sessions
+# --------------------------
+def _write_private(path: str, data: bytes):
+    """Atomically write a file only the owner can read."""
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def session_key() -> bytes:
+    """The secret session tokens are signed with; created on first use and
+    shared by every process using this data directory."""
+    global _session_key
+    if _session_key is None:
+        with store_lock():  # two first starts must not each pick a key
+            if not os.path.exists(SESSION_KEY_FILE):
+                _write_private(SESSION_KEY_FILE, os.urandom(SESSION_KEY_BYTES))
+            with open(SESSION_KEY_FILE, "rb") as f:
+                _session_key = f.read()
+    return _session_key
+
+
+def revoked_sessions() -> Dict[str, int]:
+    """Revoked session ids -> the time their token would have expired."""
+    return _cached_load(REVOKED_SESSIONS_FILE, lambda p: load_json(p, {}), {})
+
+
+def revoke_session(sid: str, expires: int):
+    """Add `sid` to the revocation set, dropping ids whose tokens have
+    expired anyway (so the set only holds sessions still in their TTL)."""
+    now = int(time.time())
+    with store_lock():
+        revoked = load_json(REVOKED_SESSIONS_FILE, {})
+        revoked = {k: exp for k, exp in revoked.items() if exp > now}
+        revoked[sid] = expires
+        save_json(REVOKED_SESSIONS_FILE, revoked)
+        _invalidate(REVOKED_SESSIONS_FILE)
+
+
+def load_kiosk_session() -> Optional[str]:
+    try:
+        with open(KIOSK_SESSION_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_kiosk_session(token: Optional[str]):
+    """Remember `token` for the next start of this kiosk (None forgets it)."""
+    if token is None:
+        if os.path.exists(KIOSK_SESSION_FILE):
+            os.remove(KIOSK_SESSION_FILE)
+        return
+    _write_private(KIOSK_SESSION_FILE, token.encode("utf-8"))
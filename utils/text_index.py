@@ -0,0 +1,101 @@
+from typing import List, Dict, Any, Set, Tuple
+from utils.models import Event
+
+# Columns covered by the inverted index (lowercased values come from Event.lc).
+TEXT_FIELDS = (
+    "name",
+    "location",
+    "address",
+    "organizer",
+    "category",
+    "description",
+    "htm",
+)
+
+
+def trigrams(s: str) -> Set[str]:
+    return {s[i : i + 3] for i in range(len(s) - 2)}
+
+
+class TextIndex:
+    """Per-field trigram -> event ids postings for substring keyword search.
+    A keyword of 3+ characters is looked up by intersecting the postings of
+    its trigrams, then verified with `kw in value` so results are exactly
+    the old substring semantics. Shorter keywords and fields outside
+    TEXT_FIELDS fall back to scanning the lowercased values."""
+
+    def __init__(self, by_id: Dict[Any, Event]):
+        self.by_id = by_id
+        self.postings: Dict[str, Dict[str, Set[Any]]] = {f: {} for f in TEXT_FIELDS}
+        # the values each event was indexed with, so edits can unindex them
+        self._indexed: Dict[Any, Dict[str, str]] = {}
+        for e in by_id.values():
+            self.add(e)
+
+    def add(self, e: Event):
+        event_id = e.get("id")
+        values = {f: e.lc.get(f, "") for f in TEXT_FIELDS}
+        self._indexed[event_id] = values
+        for f, v in values.items():
+            postings = self.postings[f]
+            for g in trigrams(v):
+                postings.setdefault(g, set()).add(event_id)
+
+    def remove(self, event_id):
+        values = self._indexed.pop(event_id, None)
+        if values is None:
+            return
+        for f, v in values.items():
+            postings = self.postings[f]
+            for g in trigrams(v):
+                ids = postings.get(g)
+                if ids is not None:
+                    ids.discard(event_id)
+                    if not ids:
+                        del postings[g]
+
+    def update(self, e: Event):
+        self.remove(e.get("id"))
+        self.add(e)
+
+    def match(self, field: str, kw: str) -> Set[Any]:
+        """Ids of events whose `field` contains `kw` (already lowercased)."""
+        if field in self.postings and len(kw) >= 3:
+            postings = self.postings[field]
+            lists = [postings.get(g, set()) for g in trigrams(kw)]
+            lists.sort(key=len)
+            candidates = set(lists[0])
+            for ids in lists[1:]:
+                candidates &= ids
+                if not candidates:
+                    break
+        else:
+            candidates = self.by_id.keys()
+        return {i for i in candidates if kw in self.by_id[i].lc.get(field, "")}
+
+    def search(self, criteria: List[Tuple[str, str]]) -> Set[Any]:
+        """Ids matching every (field, keyword) pair."""
+        result = None
+        for field, kw in criteria:
+            ids = self.match(field, kw)
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result or set()
+
+
+def rank(events: List[Event], criteria: List[Tuple[str, str]]) -> List[Event]:
+    """Order keyword matches: whole-word hits, then prefix hits, then plain
+    substring hits; ties by datetime."""
+
+    def score(e: Event) -> int:
+        total = 0
+        for field, kw in criteria:
+            value = e.lc.get(field, "")
+            if kw in value.split():
+                total += 2
+            elif value.startswith(kw):
+                total += 1
+        return total
+
+    return sorted(events, key=lambda e: (-score(e), e.datetime))
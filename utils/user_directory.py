@@ -0,0 +1,56 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def normalize_username(username: str) -> str:
+    """The key usernames are compared by (login is case-insensitive)."""
+    return str(username).strip().lower()
+
+
+class UserDirectory:
+    """Accounts keyed by normalized username, so lookups and duplicate checks
+    are one hash probe. `users` keeps the stored order; the first account
+    with a given name wins, as with the old linear scan.
+    Also remembers which version of the users file it was built from and how
+    much of the registration journal it has read (see storage.user_directory)."""
+
+    def __init__(
+        self,
+        users: List[Dict[str, Any]],
+        base_stamp: Optional[Tuple[int, int, int]] = None,
+    ):
+        self.users: List[Dict[str, Any]] = []
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.base_stamp = base_stamp
+        self.journal_offset = 0  # bytes of users.journal applied
+        self.journal_entries = 0  # journal lines not yet in the users file
+        for u in users:
+            self.add(u)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(normalize_username(username))
+
+    def apply(self, entry: Dict[str, Any]):
+        """Apply one users journal line: an account, or a password change."""
+        if "set_password" in entry:
+            self.set_password(entry["set_password"], entry["password"])
+        else:
+            self.add(entry)
+
+    def set_password(self, username: str, password: Dict[str, Any]) -> bool:
+        user = self.get(username)
+        if user is None:
+            return False
+        user["password"] = password
+        return True
+
+    def add(self, user: Dict[str, Any]) -> bool:
+        """Add `user` unless the name is taken; True when added."""
+        key = normalize_username(user.get("username", ""))
+        if key in self.by_name:
+            return False
+        self.by_name[key] = user
+        self.users.append(user)
+        return True